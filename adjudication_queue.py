@@ -0,0 +1,274 @@
+import functools
+import math
+import os
+import threading
+import time
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import (
+    LOCAL_DATA_DIR,
+    ADJUDICATION_LOCK_SECONDS,
+    ADJUDICATION_PRIORITY_WEIGHTS,
+)
+from claim_pipeline import get_claim_pipeline
+from local_db import connect_sqlite
+
+logger = logging.getLogger(__name__)
+
+QUEUE_COLUMNS = ("claim_id", "employee_id", "claim_type", "amount", "fraud_score",
+                 "reason", "submitted_at", "priority", "locked_by", "lock_until")
+
+
+def priority_key(amount: float, fraud_score: float, submitted_at: float,
+                 weights: Dict[str, float] = ADJUDICATION_PRIORITY_WEIGHTS) -> float:
+    """Static sort key for the queue index.
+
+    The age term grows at the same rate for every waiting claim, so ranking
+    by ``age_weight * (now - submitted_at)`` equals ranking by
+    ``-age_weight * submitted_at``. That makes the key fixed at insert time
+    and lets one B-tree index serve "highest priority first" without ever
+    rescoring the queue.
+    """
+    return (weights["amount"] * math.log10(max(amount, 1.0))
+            + weights["fraud"] * fraud_score
+            - weights["age_per_day"] * submitted_at / 86400.0)
+
+
+class ClaimLocked(Exception):
+    """The claim is already being worked by another adjuster, or was decided"""
+
+
+class AdjudicationQueue:
+    """Indexed queue of claims held for manual adjudication.
+
+    Claims arrive from the pipeline's review hand-off. Reads are indexed
+    ``ORDER BY priority`` walks with an optional claim type filter, so the
+    next item and each rendered window cost O(log n) no matter how deep the
+    queue is. Adjusters take a claim with a single conditional UPDATE; the
+    lock expires after ``lock_seconds`` if they walk away.
+    """
+
+    def __init__(self, pipeline, db_path: Optional[str] = None,
+                 lock_seconds: float = ADJUDICATION_LOCK_SECONDS):
+        self.pipeline = pipeline
+        self.db_path = db_path or os.path.join(LOCAL_DATA_DIR, "adjudication.db")
+        self.lock_seconds = lock_seconds
+        self._lock = threading.Lock()
+        self._conn = connect_sqlite(self.db_path)
+        with self._conn:
+            self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS adjudication_queue (
+                claim_id TEXT PRIMARY KEY,
+                employee_id TEXT NOT NULL,
+                claim_type TEXT,
+                amount REAL NOT NULL,
+                fraud_score REAL NOT NULL,
+                reason TEXT,
+                submitted_at REAL NOT NULL,
+                priority REAL NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                locked_by TEXT,
+                lock_until REAL,
+                decided_by TEXT,
+                decided_at REAL
+            )
+            ''')
+            self._conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_adjudication_priority
+            ON adjudication_queue (status, priority DESC, claim_id)
+            ''')
+            self._conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_adjudication_type_priority
+            ON adjudication_queue (status, claim_type, priority DESC, claim_id)
+            ''')
+            self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS adjudication_state (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                synced_until REAL NOT NULL
+            )
+            ''')
+
+    # ------------------------------------------------------------------
+    # Intake
+    # ------------------------------------------------------------------
+    def add(self, claims: List[Dict[str, Any]]) -> int:
+        records = [(c["claim_id"], c["employee_id"], c.get("claim_type"), c["amount"],
+                    c["fraud_score"], c.get("reason"), c["submitted_at"],
+                    priority_key(c["amount"], c["fraud_score"], c["submitted_at"]))
+                   for c in claims]
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany('''
+            INSERT OR IGNORE INTO adjudication_queue
+                (claim_id, employee_id, claim_type, amount, fraud_score, reason, submitted_at, priority)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', records)
+            return self._conn.total_changes - before
+
+    def sync(self) -> int:
+        """Pull claims newly held by the pipeline since the last sync"""
+        with self._lock:
+            row = self._conn.execute("SELECT synced_until FROM adjudication_state WHERE id = 1").fetchone()
+        since = row[0] if row else 0.0
+        held = self.pipeline.held_claims(since=since)
+        if not held:
+            return 0
+        added = self.add(held)
+        with self._lock, self._conn:
+            self._conn.execute('''
+            INSERT INTO adjudication_state (id, synced_until) VALUES (1, ?)
+            ON CONFLICT(id) DO UPDATE SET synced_until = excluded.synced_until
+            ''', (max(c["held_at"] for c in held),))
+        if added:
+            logger.info(f"⚖️ {added} claims added to the adjudication queue")
+        return added
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def window(self, limit: int, after: Optional[Tuple[float, str]] = None,
+               claim_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """One window of pending claims in priority order, seeking past ``after``"""
+        where, params = ["status = 'pending'"], []
+        if claim_type:
+            where.append("claim_type = ?")
+            params.append(claim_type)
+        if after is not None:
+            where.append("(priority < ? OR (priority = ? AND claim_id > ?))")
+            params += [after[0], after[0], after[1]]
+        with self._lock:
+            rows = self._conn.execute(f'''
+            SELECT {', '.join(QUEUE_COLUMNS)} FROM adjudication_queue
+            WHERE {' AND '.join(where)}
+            ORDER BY priority DESC, claim_id
+            LIMIT ?
+            ''', params + [limit]).fetchall()
+        return [dict(zip(QUEUE_COLUMNS, r)) for r in rows]
+
+    def pending_count(self, claim_type: Optional[str] = None) -> int:
+        sql = "SELECT COUNT(*) FROM adjudication_queue WHERE status = 'pending'"
+        params = ()
+        if claim_type:
+            sql += " AND claim_type = ?"
+            params = (claim_type,)
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()[0]
+
+    def claim_types(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute('''
+            SELECT DISTINCT claim_type FROM adjudication_queue
+            WHERE status = 'pending' AND claim_type IS NOT NULL ORDER BY claim_type
+            ''').fetchall()
+        return [r[0] for r in rows]
+
+    # ------------------------------------------------------------------
+    # Claim-and-lock
+    # ------------------------------------------------------------------
+    def claim_next(self, adjuster: str, claim_type: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Lock and return the highest-priority claim nobody else holds"""
+        now = time.time()
+        type_filter = "AND claim_type = ?" if claim_type else ""
+        params = [adjuster, now + self.lock_seconds]
+        params += ([claim_type] if claim_type else []) + [now, adjuster]
+        with self._lock, self._conn:
+            row = self._conn.execute(f'''
+            UPDATE adjudication_queue SET locked_by = ?, lock_until = ?
+            WHERE claim_id = (
+                SELECT claim_id FROM adjudication_queue
+                WHERE status = 'pending' {type_filter}
+                  AND (locked_by IS NULL OR lock_until < ? OR locked_by = ?)
+                ORDER BY priority DESC, claim_id LIMIT 1
+            )
+            RETURNING {', '.join(QUEUE_COLUMNS)}
+            ''', params).fetchone()
+        return dict(zip(QUEUE_COLUMNS, row)) if row else None
+
+    def claim(self, claim_id: str, adjuster: str) -> Dict[str, Any]:
+        """Lock a specific claim; raises ClaimLocked if someone else holds it"""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(f'''
+            UPDATE adjudication_queue SET locked_by = ?, lock_until = ?
+            WHERE claim_id = ? AND status = 'pending'
+              AND (locked_by IS NULL OR lock_until < ? OR locked_by = ?)
+            RETURNING {', '.join(QUEUE_COLUMNS)}
+            ''', (adjuster, now + self.lock_seconds, claim_id, now, adjuster)).fetchone()
+            if row is None:
+                holder = self._conn.execute(
+                    "SELECT status, locked_by FROM adjudication_queue WHERE claim_id = ?", (claim_id,)
+                ).fetchone()
+        if row is None:
+            if holder and holder[0] != "pending":
+                raise ClaimLocked(f"{claim_id} was already {holder[0]}")
+            raise ClaimLocked(f"{claim_id} is being reviewed by {holder[1] if holder else 'someone else'}")
+        return dict(zip(QUEUE_COLUMNS, row))
+
+    def release(self, claim_id: str, adjuster: str):
+        with self._lock, self._conn:
+            self._conn.execute('''
+            UPDATE adjudication_queue SET locked_by = NULL, lock_until = NULL
+            WHERE claim_id = ? AND locked_by = ? AND status = 'pending'
+            ''', (claim_id, adjuster))
+
+    def decide(self, claim_id: str, adjuster: str, approved: bool, note: str = ""):
+        """Record a decision on a claim this adjuster holds and hand it back to the pipeline"""
+        now = time.time()
+        status = "approved" if approved else "rejected"
+        with self._lock, self._conn:
+            row = self._conn.execute('''
+            UPDATE adjudication_queue
+            SET status = ?, decided_by = ?, decided_at = ?, lock_until = NULL
+            WHERE claim_id = ? AND status = 'pending' AND locked_by = ? AND lock_until >= ?
+            RETURNING claim_id
+            ''', (status, adjuster, now, claim_id, adjuster, now)).fetchone()
+        if row is None:
+            raise ClaimLocked(f"{claim_id} is not locked by {adjuster}; claim it first")
+        # The pipeline lives in another database, so the decision only sticks
+        # once it has accepted it; otherwise the row goes back to the adjuster
+        try:
+            resolved = self.pipeline.resolve_review(claim_id, approved, adjuster, note)
+        except Exception:
+            self._undecide(claim_id, adjuster, "pending")
+            raise
+        if not resolved:
+            # No longer held for review upstream: take it off the queue undecided
+            self._undecide(claim_id, adjuster, "withdrawn")
+            raise ClaimLocked(f"{claim_id} is no longer awaiting review")
+
+    def _undecide(self, claim_id: str, adjuster: str, status: str):
+        """Revert a decision the pipeline did not take; a pending claim stays locked to the adjuster"""
+        lock_until = time.time() + self.lock_seconds if status == "pending" else None
+        with self._lock, self._conn:
+            self._conn.execute('''
+            UPDATE adjudication_queue
+            SET status = ?, decided_by = NULL, decided_at = NULL, lock_until = ?
+            WHERE claim_id = ? AND decided_by = ?
+            ''', (status, lock_until, claim_id, adjuster))
+        logger.warning(f"⚠️ Decision on {claim_id} not applied by the pipeline; claim is {status}")
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            pending, locked = self._conn.execute('''
+            SELECT COUNT(*), COALESCE(SUM(locked_by IS NOT NULL AND lock_until >= ?), 0)
+            FROM adjudication_queue WHERE status = 'pending'
+            ''', (now,)).fetchone()
+            decided = self._conn.execute(
+                "SELECT COUNT(*) FROM adjudication_queue WHERE status IN ('approved', 'rejected')"
+            ).fetchone()[0]
+        return {"pending": pending, "locked": locked, "decided": decided}
+
+
+@functools.lru_cache(maxsize=None)
+def get_adjudication_queue() -> AdjudicationQueue:
+    """Process-wide instance, created on first use"""
+    return AdjudicationQueue(get_claim_pipeline())
+
+
+def __getattr__(name):
+    # Keeps ``from adjudication_queue import adjudication_queue`` working without import-time setup
+    if name == "adjudication_queue":
+        return get_adjudication_queue()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
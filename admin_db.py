@@ -1,16 +1,52 @@
-import sqlite3
+import functools
+import threading
 import bcrypt
-import streamlit as st
+import logging
 from datetime import datetime
+from typing import Optional
+
+from config import (
+    MAX_LOGIN_ATTEMPTS,
+    MAX_LOGIN_ATTEMPTS_PER_CLIENT,
+    LOGIN_ATTEMPT_WINDOW_SECONDS,
+    BCRYPT_MAX_WORKERS,
+    BCRYPT_MAX_QUEUE,
+    BCRYPT_VERIFY_TIMEOUT_SECONDS,
+    ADMIN_WRITE_FLUSH_SECONDS,
+    ADMIN_WRITE_MAX_BATCH,
+)
+from local_db import WriteBehindQueue, connect_sqlite
+from instrumentation import metrics
+from login_guard import LoginGuard, LoginRejected, PasswordVerifier, SlidingWindowLimiter
+
+logger = logging.getLogger(__name__)
+
+# Prepared once per connection via sqlite3's statement cache
+SELECT_ADMIN_SQL = '''
+SELECT id, username, password_hash, full_name, email, role
+FROM admins WHERE username = ?
+'''
+UPDATE_LAST_LOGIN_SQL = 'UPDATE admins SET last_login = ? WHERE username = ?'
 
 class AdminDatabase:
     def __init__(self):
         self.db_path = "admin_users.db"
+        self._lock = threading.Lock()
+        self.login_guard = LoginGuard(
+            PasswordVerifier(BCRYPT_MAX_WORKERS, BCRYPT_MAX_QUEUE, BCRYPT_VERIFY_TIMEOUT_SECONDS),
+            user_limiter=SlidingWindowLimiter(MAX_LOGIN_ATTEMPTS, LOGIN_ATTEMPT_WINDOW_SECONDS),
+            client_limiter=SlidingWindowLimiter(MAX_LOGIN_ATTEMPTS_PER_CLIENT, LOGIN_ATTEMPT_WINDOW_SECONDS),
+        )
         self.init_database()
+        # Long-lived WAL connection for the read path; bookkeeping writes go
+        # through a separate background writer so logins never wait on them.
+        self.conn = connect_sqlite(self.db_path)
+        self.writer = WriteBehindQueue(self.db_path, ADMIN_WRITE_FLUSH_SECONDS,
+                                       ADMIN_WRITE_MAX_BATCH, name="admin-writer")
     
     def init_database(self):
         """Initialize admin database"""
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_sqlite(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -38,23 +74,24 @@ class AdminDatabase:
         conn.commit()
         conn.close()
     
-    def authenticate_admin(self, username: str, password: str) -> dict:
-        """Authenticate admin user"""
+    @metrics.timed("auth_seconds", portal="admin")
+    def authenticate_admin(self, username: str, password: str,
+                           client_id: Optional[str] = None) -> dict:
+        """Authenticate admin user.
+
+        Raises LoginRejected when the attempt is throttled or the verifier
+        pool is saturated (no hash is computed then), or when the check
+        times out.
+        """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            self.login_guard.admit(username, client_id)
+            with self._lock:
+                result = self.conn.execute(SELECT_ADMIN_SQL, (username,)).fetchone()
             
-            cursor.execute('''
-            SELECT id, username, password_hash, full_name, email, role
-            FROM admins WHERE username = ?
-            ''', (username,))
-            
-            result = cursor.fetchone()
-            
-            if result and bcrypt.checkpw(password.encode(), result[2].encode()):
-                cursor.execute('UPDATE admins SET last_login = ? WHERE username = ?', 
-                             (datetime.now(), username))
-                conn.commit()
+            if result and self.login_guard.verifier.verify(password, result[2]):
+                self.login_guard.succeeded(username)
+                metrics.inc("auth_attempts_total", portal="admin", outcome="success")
+                self.writer.submit(UPDATE_LAST_LOGIN_SQL, (datetime.now(), username))
                 
                 admin_data = {
                     "id": result[0],
@@ -64,14 +101,35 @@ class AdminDatabase:
                     "role": result[5],
                     "is_admin": True
                 }
-                conn.close()
                 return admin_data
             
-            conn.close()
+            metrics.inc("auth_attempts_total", portal="admin", outcome="invalid")
             return None
+        except LoginRejected:
+            metrics.inc("auth_attempts_total", portal="admin", outcome="rejected")
+            raise
         except Exception as e:
-            print(f"Admin auth error: {e}")
+            logger.error(f"Admin auth error: {e}")
             return None
 
-# Create instance
-admin_db = AdminDatabase()
+    def login_metrics(self) -> dict:
+        """Limiter, bcrypt pool and write-behind queue state"""
+        metrics = self.login_guard.stats()
+        metrics["writer"] = self.writer.stats()
+        return metrics
+
+# Created lazily: table setup and the default admin's bcrypt hash run on
+# the first admin login, not when the app starts.
+@functools.lru_cache(maxsize=None)
+def get_admin_db() -> AdminDatabase:
+    """Process-wide instance, created on first use"""
+    db = AdminDatabase()
+    metrics.register_collector("admin_login", db.login_metrics)
+    return db
+
+
+def __getattr__(name):
+    # Keeps ``from admin_db import admin_db`` working without import-time setup
+    if name == "admin_db":
+        return get_admin_db()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
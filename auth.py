@@ -1,6 +1,14 @@
 import streamlit as st
-from admin_db import admin_db
-from database import policyholder_db
+from admin_db import get_admin_db
+from database import get_policyholder_db
+from login_guard import LoginRejected
+
+def _client_id():
+    """Best-effort client address for per-client login throttling"""
+    try:
+        return getattr(st.context, "ip_address", None)
+    except Exception:
+        return None
 
 class InsuranceAuthenticator:
     def authenticate(self, username: str, password: str = None, is_admin_login: bool = False):
@@ -12,7 +20,11 @@ class InsuranceAuthenticator:
                 st.error("❌ Admin login requires username and password")
                 return None
             
-            admin = admin_db.authenticate_admin(username, password)
+            try:
+                admin = get_admin_db().authenticate_admin(username, password, client_id=_client_id())
+            except LoginRejected as e:
+                st.error(f"❌ {e}")
+                return None
             if admin:
                 st.success(f"✅ Welcome, Admin {admin['full_name']}!")
                 return admin
@@ -25,7 +37,7 @@ class InsuranceAuthenticator:
                 st.error("❌ Please enter Employee ID, Email, or Policy Number")
                 return None
             
-            policyholder = policyholder_db.authenticate_policyholder(username)
+            policyholder = get_policyholder_db().authenticate_policyholder(username)
             if policyholder:
                 st.success(f"✅ Welcome, {policyholder['first_name']}!")
                 return policyholder
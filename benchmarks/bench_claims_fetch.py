@@ -0,0 +1,82 @@
+"""
+Benchmark: get_policyholder_claims fetch modes (dicts vs Arrow vs pandas).
+
+Generates a synthetic claims table for a single employee with
+``synthetic_data.py`` and fetches 10k to 1M rows through each mode of
+``DatabricksDatabase.get_policyholder_claims``.
+Reports rows/s from an untraced run and peak memory from a second run
+(Python heap via tracemalloc plus the Arrow memory pool). Requires
+``pip install duckdb``.
+
+    python benchmarks/bench_claims_fetch.py --sizes 10000 100000 1000000
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pyarrow as pa
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabricksDatabase  # noqa: E402
+from synthetic_data import connect_factory, generate  # noqa: E402
+
+MODES = ("dicts", "arrow", "pandas")
+
+
+def make_db(path: str) -> DatabricksDatabase:
+    return DatabricksDatabase(connect=connect_factory(path))
+
+
+def measure(db: DatabricksDatabase, mode: str, rows: int) -> dict:
+    db.get_policyholder_claims("EMP10001", limit=rows, fetch=mode)  # warm the pool
+    gc.collect()
+    started = time.perf_counter()
+    result = db.get_policyholder_claims("EMP10001", limit=rows, fetch=mode)
+    elapsed = time.perf_counter() - started
+    assert len(result) == rows, f"{mode}: expected {rows} rows, got {len(result)}"
+    del result
+    gc.collect()
+
+    pool = pa.default_memory_pool()
+    arrow_before = pool.bytes_allocated()
+    tracemalloc.start()
+    result = db.get_policyholder_claims("EMP10001", limit=rows, fetch=mode)
+    _, python_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    arrow_held = pool.bytes_allocated() - arrow_before
+    del result
+    gc.collect()
+
+    return {
+        "rows_per_second": rows / elapsed,
+        "elapsed_ms": elapsed * 1000,
+        "peak_mb": (python_peak + max(arrow_held, 0)) / 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_fetch_")
+    table_path = os.path.join(workdir, "insurance_db.duckdb")
+    generate(table_path, max(args.sizes), employees=1)
+    db = make_db(table_path)
+
+    print(f"{'rows':>10}  {'mode':<8}{'rows/s':>14}{'ms':>10}{'peak MB':>10}")
+    for rows in args.sizes:
+        for mode in MODES:
+            r = measure(db, mode, rows)
+            print(f"{rows:>10,}  {mode:<8}{r['rows_per_second']:>14,.0f}"
+                  f"{r['elapsed_ms']:>10.1f}{r['peak_mb']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
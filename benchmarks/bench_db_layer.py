@@ -0,0 +1,178 @@
+"""
+Benchmark: DB layer throughput and tail latency under concurrent clients.
+
+Runs ``DatabricksDatabase`` against a synthetic warehouse table in DuckDB
+(see ``synthetic_data.py``) and drives each operation from 1..N client
+threads for a fixed duration:
+
+  * auth       - ``authenticate_policyholder`` with known EmployeeID, Email
+                 and PolicyNumber values (profile cache off unless --cache)
+  * claims     - ``get_policyholder_claims`` for random employees
+  * dashboard  - the daily KPI aggregate over the lookback window, which is
+                 the query ``KpiService.refresh`` sends to the warehouse
+
+Clients share the connection pool as Streamlit sessions do, so pool
+waits are part of the measured latency. ``--mirror`` syncs a
+``LocalMirror`` first, so auth and claims reads are served from the local
+SQLite copy (the dashboard aggregate always goes to the warehouse). ``--json`` writes one
+machine-readable record for regression tracking.
+
+    python benchmarks/bench_db_layer.py --rows 5000000 --clients 1 4 16 --json db_layer.json
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import KPI_LOOKBACK_DAYS  # noqa: E402
+from dashboard_metrics import DAILY_KPI_SQL  # noqa: E402
+from database import DatabricksDatabase  # noqa: E402
+from local_mirror import LocalMirror  # noqa: E402
+from profile_cache import ProfileCache  # noqa: E402
+from synthetic_data import connect_factory, employee_id, generate, sample_identifiers  # noqa: E402
+
+OPERATIONS = ("auth", "claims", "dashboard")
+
+
+def make_db(path: str, pool_size: int, cache: bool, mirror: bool = False) -> DatabricksDatabase:
+    # ttl 0 disables the profile cache so every call reaches the warehouse
+    db = DatabricksDatabase(connect=connect_factory(path),
+                            cache=ProfileCache() if cache else ProfileCache(ttl_seconds=0))
+    db.pool.max_size = pool_size
+    if mirror:
+        db.mirror = LocalMirror(db, os.path.join(os.path.dirname(path), "mirror.db"), pool_size=pool_size)
+        rows = db.mirror.sync()
+        print(f"Mirrored {rows:,} rows in {db.mirror.last_sync_seconds:.1f}s")
+    return db
+
+
+def dashboard_aggregate(db: DatabricksDatabase):
+    since = (date.today() - timedelta(days=KPI_LOOKBACK_DAYS)).isoformat()
+    with db.connection() as conn, closing(conn.cursor()) as cursor:
+        cursor.execute(DAILY_KPI_SQL.format(source=f"{db.database}.{db.table}"), (since,))
+        return cursor.fetchall()
+
+
+def make_operation(name: str, db: DatabricksDatabase, employees: int, seed: int):
+    if name == "auth":
+        identifiers = sample_identifiers(employees, 10000, seed)
+        return lambda rng: db.authenticate_policyholder(rng.choice(identifiers))
+    if name == "claims":
+        return lambda rng: db.get_policyholder_claims(employee_id(rng.randrange(employees)), limit=10)
+    if name == "dashboard":
+        return lambda rng: dashboard_aggregate(db)
+    raise ValueError(f"Unknown operation: {name}")
+
+
+def run_load(operation, clients: int, duration: float, seed: int) -> dict:
+    """Each client calls ``operation`` back to back until ``duration`` ends"""
+    deadline = time.perf_counter() + duration
+    lock = threading.Lock()
+    latencies, errors = [], [0]
+
+    def client(n: int):
+        rng = random.Random(seed + n)
+        local, failed = [], 0
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                result = operation(rng)
+                if result is None:
+                    failed += 1
+            except Exception:
+                failed += 1
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        list(pool.map(client, range(clients)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    ms = [v * 1000 for v in latencies]
+
+    def pct(q):
+        return ms[min(len(ms) - 1, int(q * len(ms)))] if ms else 0.0
+
+    return {
+        "clients": clients,
+        "ops": len(ms),
+        "errors": errors[0],
+        "ops_per_second": len(ms) / elapsed if elapsed else 0.0,
+        "mean_ms": statistics.fmean(ms) if ms else 0.0,
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "max_ms": ms[-1] if ms else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--employees", type=int, default=None, help="default: rows / 8")
+    parser.add_argument("--data", help="reuse this DuckDB file instead of generating one")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per operation and client count")
+    parser.add_argument("--operations", nargs="+", choices=OPERATIONS, default=list(OPERATIONS))
+    parser.add_argument("--pool-size", type=int, default=None, help="default: max client count")
+    parser.add_argument("--cache", action="store_true", help="keep the profile cache on for auth")
+    parser.add_argument("--mirror", action="store_true", help="serve auth and claims from a local mirror")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    if args.data:
+        path = args.data
+        employees = args.employees or max(1, args.rows // 8)
+        dataset = {"path": path, "rows": args.rows, "employees": employees, "reused": True}
+    else:
+        path = os.path.join(tempfile.mkdtemp(prefix="bench_db_"), "insurance_db.duckdb")
+        dataset = generate(path, args.rows, args.employees, args.seed)
+        employees = dataset["employees"]
+        print(f"Generated {dataset['rows']:,} rows in {dataset['seconds']:.1f}s ({path})")
+
+    db = make_db(path, args.pool_size or max(args.clients), args.cache, args.mirror)
+    results = []
+    print(f"\n{'operation':<11}{'clients':>8}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}"
+          f"{'p99 ms':>10}{'errors':>8}")
+    for name in args.operations:
+        operation = make_operation(name, db, employees, args.seed)
+        operation(random.Random(args.seed))  # open a connection and warm caches
+        for clients in args.clients:
+            r = dict(operation=name, **run_load(operation, clients, args.duration, args.seed))
+            results.append(r)
+            print(f"{name:<11}{clients:>8}{r['ops_per_second']:>10.1f}{r['p50_ms']:>10.2f}"
+                  f"{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['errors']:>8}")
+
+    if args.json:
+        record = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "dataset": {k: v for k, v in dataset.items() if k != "seconds"},
+            "settings": {"duration": args.duration, "pool_size": db.pool.max_size, "cache": args.cache,
+                         "mirror": args.mirror},
+            "pool": db.pool_stats(),
+            "results": results,
+        }
+        with open(args.json, "w") as f:
+            json.dump(record, f, indent=2, default=str)
+        print(f"\nWrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
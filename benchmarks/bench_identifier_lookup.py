@@ -0,0 +1,113 @@
+"""
+Benchmark: policyholder login lookup, OR predicate vs identifier routing.
+
+Builds a synthetic ``insurance_db.insurance_data`` table (one claim per
+employee) with ``synthetic_data.py`` and times ``DatabricksDatabase.authenticate_policyholder`` three ways:
+
+  * legacy   - ``EmployeeID = ? OR Email = ? OR PolicyNumber = ?``
+  * routed   - identifier classified first, single-column predicate
+  * indexed  - routed + local identifier index (unknown ids never hit the DB)
+
+DuckDB keeps min/max zone maps per row group, which behave like the
+warehouse's per-file statistics: a single-column equality skips row groups,
+an OR across columns does not. Requires ``pip install duckdb``.
+
+    python benchmarks/bench_identifier_lookup.py --rows 5000000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabricksDatabase  # noqa: E402
+from identifiers import IdentifierIndex  # noqa: E402
+from profile_cache import ProfileCache  # noqa: E402
+from synthetic_data import connect_factory, generate, sample_identifiers  # noqa: E402
+
+
+def make_db(path: str, index=None) -> DatabricksDatabase:
+    # ttl 0 disables the profile cache so every call reaches the lookup path
+    return DatabricksDatabase(connect=connect_factory(path), cache=ProfileCache(ttl_seconds=0),
+                              identifier_index=index)
+
+
+def time_lookups(db, identifiers) -> dict:
+    samples = []
+    for identifier in identifiers:
+        started = time.perf_counter()
+        db.authenticate_policyholder(identifier)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "p50_ms": statistics.median(samples),
+        "p95_ms": samples[int(len(samples) * 0.95) - 1],
+        "mean_ms": statistics.fmean(samples),
+    }
+
+
+LEGACY_QUERY = """
+SELECT EmployeeID, FirstName, LastName, Email, PolicyNumber, PolicyStatus, CoverageAmountUSD
+FROM insurance_db.insurance_data
+WHERE EmployeeID = ? OR Email = ? OR PolicyNumber = ?
+LIMIT 1
+"""
+
+
+class LegacyLookup:
+    """The pre-routing query, run over the same connection pool"""
+
+    def __init__(self, db: DatabricksDatabase):
+        self.db = db
+
+    def authenticate_policyholder(self, identifier: str):
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(LEGACY_QUERY, (identifier, identifier, identifier))
+            return cursor.fetchone()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, default=5000000)
+    parser.add_argument("--lookups", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_ident_")
+    table_path = os.path.join(workdir, "insurance_db.duckdb")
+
+    started = time.perf_counter()
+    generate(table_path, args.rows, employees=args.rows, seed=args.seed)
+    print(f"Built {args.rows:,} rows in {time.perf_counter() - started:.1f}s ({table_path})")
+
+    known = sample_identifiers(args.rows, args.lookups, seed=args.seed)
+    unknown = [f"EMP{999999999 - n}" for n in range(args.lookups)]
+
+    db = LegacyLookup(make_db(table_path))
+    legacy = {"known": time_lookups(db, known), "unknown": time_lookups(db, unknown)}
+
+    db = make_db(table_path)
+    routed = {"known": time_lookups(db, known), "unknown": time_lookups(db, unknown)}
+
+    index = IdentifierIndex(os.path.join(workdir, "identifier_index.db"),
+                            refresh_interval=3600)
+    db = make_db(table_path, index=index)
+    started = time.perf_counter()
+    db.refresh_identifier_index()
+    print(f"Identifier index loaded in {time.perf_counter() - started:.1f}s")
+    indexed = {"known": time_lookups(db, known), "unknown": time_lookups(db, unknown)}
+
+    print(f"\n{'path':<10}{'ids':<10}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}")
+    for name, result in (("legacy", legacy), ("routed", routed), ("indexed", indexed)):
+        for kind in ("known", "unknown"):
+            r = result[kind]
+            print(f"{name:<10}{kind:<10}{r['p50_ms']:>10.3f}{r['p95_ms']:>10.3f}{r['mean_ms']:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark: claims trend chart load time vs length of claim history.
+
+For each history length a synthetic ``insurance_data`` table (see
+``synthetic_data.py``) is generated with a fixed number of claims per day,
+then ``ClaimRollups`` is built from it and timed three ways:
+
+  * full build   - first ``refresh`` over the whole history
+  * incremental  - a later ``refresh`` from the watermark (lookback window only)
+  * chart read   - ``series`` for each range the System Analytics tab offers,
+                   at the grain it would pick
+
+Chart reads should stay flat as history grows; only the full build scales
+with it. Requires ``pip install duckdb``.
+
+    python benchmarks/bench_rollups.py --years 1 5 20 --claims-per-day 500
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dashboard_metrics import ClaimRollups  # noqa: E402
+from database import DatabricksDatabase  # noqa: E402
+from synthetic_data import connect_factory, generate  # noqa: E402
+
+RANGES = {"30d": 30, "6m": 183, "12m": 365, "5y": 1826, "all": None}
+
+
+def time_reads(rollups: ClaimRollups, repeats: int) -> dict:
+    first, last = rollups.history_range()
+    out = {}
+    for label, days in RANGES.items():
+        start = first if days is None else max(first, last - timedelta(days=days - 1))
+        grain = rollups.grain_for(start, last)
+        samples = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            frame = rollups.series("claims", start, last, grain=grain)
+            samples.append((time.perf_counter() - started) * 1000)
+        out[label] = {"grain": grain, "points": len(frame), "median_ms": statistics.median(samples)}
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 5, 20])
+    parser.add_argument("--claims-per-day", type=int, default=500)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = []
+    workdir = tempfile.mkdtemp(prefix="bench_rollups_")
+    print(f"{'years':>6}{'rows':>12}{'build s':>9}{'incr ms':>9}  chart read ms (grain)")
+    for years in args.years:
+        days = years * 365
+        path = os.path.join(workdir, f"insurance_{years}y.duckdb")
+        dataset = generate(path, days * args.claims_per_day, seed=args.seed, days=days)
+        db = DatabricksDatabase(connect=connect_factory(path))
+        rollups = ClaimRollups(db, summary_path=os.path.join(workdir, f"summary_{years}y.db"))
+
+        started = time.perf_counter()
+        rollups.refresh()
+        build_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        rollups.refresh()
+        incremental_ms = (time.perf_counter() - started) * 1000
+
+        reads = time_reads(rollups, args.repeats)
+        results.append({"years": years, "rows": dataset["rows"], "build_seconds": build_seconds,
+                        "incremental_ms": incremental_ms, "reads": reads})
+        cells = "  ".join(f"{k} {v['median_ms']:.2f} ({v['grain']})" for k, v in reads.items())
+        print(f"{years:>6}{dataset['rows']:>12,}{build_seconds:>9.2f}{incremental_ms:>9.1f}  {cells}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "today": date.today().isoformat(),
+                       "claims_per_day": args.claims_per_day, "results": results}, f, indent=2)
+        print(f"\nWrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Benchmark: cold start (import time) and time to first render.
+
+Each sample runs in a fresh interpreter inside a scratch working directory,
+so nothing is warm from a previous run and no local state is reused:
+
+* ``-X importtime`` over the app's own modules: total import cost plus the
+  slowest modules by self time
+* first render of app.py through Streamlit's AppTest: the login page
+  (cold start) and the first admin dashboard render (first request), plus
+  a rerun of the same page for comparison
+
+Results print as a table; ``--json`` appends one record per invocation so
+numbers can be compared across releases.
+
+    python benchmarks/bench_startup.py --runs 5 --json startup_history.jsonl
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules app.py imports from this repo, in import order
+APP_MODULES = ("auth", "adjudication_queue", "claim_import", "claim_pipeline", "claims_pager",
+               "coverage_ledger", "dashboard_data", "dashboard_metrics", "document_analysis", "document_store",
+               "database", "fraud_scan", "fraud_serving", "fraud_training", "query_cache", "session_routes",
+               "session_store", "styles")
+
+RENDER_SCRIPT = """
+import json, sys, time
+sys.path.insert(0, {repo!r})
+from streamlit.testing.v1 import AppTest
+
+timings = {{}}
+at = AppTest.from_file({app!r}, default_timeout=120)
+started = time.perf_counter()
+at.run()
+timings["login_first_render_ms"] = (time.perf_counter() - started) * 1000
+
+at.session_state.authenticated = True
+at.session_state.is_admin = True
+at.session_state.user = {{"name": "System Admin", "role": "superadmin"}}
+at.session_state.page = "admin_dashboard"
+started = time.perf_counter()
+at.run()
+timings["admin_first_render_ms"] = (time.perf_counter() - started) * 1000
+
+started = time.perf_counter()
+at.run()
+timings["admin_rerun_ms"] = (time.perf_counter() - started) * 1000
+timings["exceptions"] = [str(e.value) for e in at.exception]
+print(json.dumps(timings))
+"""
+
+
+def _run(args, workdir):
+    return subprocess.run([sys.executable] + args, cwd=workdir, capture_output=True, text=True, check=True)
+
+
+def measure_imports(workdir):
+    """Cumulative and per-module import cost from one cold interpreter"""
+    code = f"import sys; sys.path.insert(0, {REPO!r}); " + "; ".join(f"import {m}" for m in APP_MODULES)
+    started = time.perf_counter()
+    proc = _run(["-X", "importtime", "-c", code], workdir)
+    wall_ms = (time.perf_counter() - started) * 1000
+
+    self_us, cumulative_us = {}, {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        self_us[name.strip()] = int(own)
+        cumulative_us[name.strip()] = int(cumulative)
+    return {
+        "interpreter_wall_ms": wall_ms,
+        "app_modules_ms": {m: cumulative_us.get(m, 0) / 1000 for m in APP_MODULES},
+        "slowest_self_ms": sorted(((n, us / 1000) for n, us in self_us.items()),
+                                  key=lambda item: item[1], reverse=True)[:10],
+    }
+
+
+def measure_render(workdir):
+    script = RENDER_SCRIPT.format(repo=REPO, app=os.path.join(REPO, "app.py"))
+    proc = _run(["-c", script], workdir)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters per measurement")
+    parser.add_argument("--json", help="append a JSON record of the results to this file")
+    args = parser.parse_args()
+
+    imports, renders = [], []
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory(prefix="bench_startup_") as workdir:
+            imports.append(measure_imports(workdir))
+        with tempfile.TemporaryDirectory(prefix="bench_startup_") as workdir:
+            renders.append(measure_render(workdir))
+
+    def median(values):
+        return statistics.median(values)
+
+    summary = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+        "interpreter_wall_ms": median([r["interpreter_wall_ms"] for r in imports]),
+        "app_modules_ms": {m: median([r["app_modules_ms"][m] for r in imports]) for m in APP_MODULES},
+        "login_first_render_ms": median([r["login_first_render_ms"] for r in renders]),
+        "admin_first_render_ms": median([r["admin_first_render_ms"] for r in renders]),
+        "admin_rerun_ms": median([r["admin_rerun_ms"] for r in renders]),
+        "slowest_self_ms": imports[-1]["slowest_self_ms"],
+        "exceptions": sorted({e for r in renders for e in r["exceptions"]}),
+    }
+
+    print(f"Median of {args.runs} cold runs")
+    print(f"{'interpreter + imports':<28}{summary['interpreter_wall_ms']:>10.1f} ms")
+    for module, ms in sorted(summary["app_modules_ms"].items(), key=lambda item: item[1], reverse=True):
+        print(f"  import {module:<21}{ms:>10.1f} ms")
+    print(f"{'login page, first render':<28}{summary['login_first_render_ms']:>10.1f} ms")
+    print(f"{'admin page, first render':<28}{summary['admin_first_render_ms']:>10.1f} ms")
+    print(f"{'admin page, rerun':<28}{summary['admin_rerun_ms']:>10.1f} ms")
+    print("Slowest modules by self time:")
+    for name, ms in summary["slowest_self_ms"]:
+        print(f"  {name:<40}{ms:>8.1f} ms")
+    if summary["exceptions"]:
+        print(f"App raised: {summary['exceptions']}")
+
+    if args.json:
+        with open(args.json, "a") as f:
+            f.write(json.dumps(summary) + "\n")
+
+
+if __name__ == "__main__":
+    main()
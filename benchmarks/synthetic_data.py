@@ -0,0 +1,133 @@
+"""
+Synthetic ``insurance_data`` for local benchmarks.
+
+Generates the warehouse table with every column the app queries, inside a
+local DuckDB file, at anything from a few thousand to tens of millions of
+rows (the table is built by one set-based ``CREATE TABLE AS`` over
+``range()``, roughly 4 s per million rows). ``connect_factory`` returns a
+DB-API factory that ``DatabricksDatabase(connect=...)`` can pool, with
+the file attached read-only as ``insurance_db``, so the app's
+``insurance_db.insurance_data`` queries run unchanged.
+
+Each employee has ``rows / employees`` claims spread over the ``days``
+days up to today. Values are derived from ``hash(i + seed)``, so the same
+arguments produce the same table on the same day. Requires
+``pip install duckdb``.
+
+    python benchmarks/synthetic_data.py --rows 10000000 --out /tmp/insurance_db.duckdb
+"""
+
+import argparse
+import random
+import time
+from datetime import date, timedelta
+from typing import Callable, List, Optional
+
+import duckdb
+
+COLUMNS = (
+    "EmployeeID", "FirstName", "LastName", "Email", "PolicyNumber", "PolicyStatus",
+    "CoverageAmountUSD", "ClaimID", "ClaimDate", "ClaimType", "ClaimStatus",
+    "LastClaimAmountUSD", "FraudRisk",
+)
+
+FIRST_NAMES = ("Dawn", "Liam", "Maya", "Omar", "Sofia", "Chen", "Ava", "Noah", "Priya", "Lucas")
+LAST_NAMES = ("Knight", "Garcia", "Patel", "Nguyen", "Smith", "Okafor", "Rossi", "Kim", "Silva", "Novak")
+CLAIM_TYPES = ("Health", "Dental", "Vision", "Hospitalization", "Accident")
+COVERAGE_TIERS = (25000, 50000, 100000, 250000, 500000)
+
+
+def _sql_array(values) -> str:
+    return "[" + ", ".join(f"'{v}'" for v in values) + "]"
+
+
+def employee_id(e: int) -> str:
+    return f"EMP{10001 + e}"
+
+
+def email(e: int) -> str:
+    first, last = FIRST_NAMES[e % len(FIRST_NAMES)], LAST_NAMES[(e // len(FIRST_NAMES)) % len(LAST_NAMES)]
+    return f"{first.lower()}.{last.lower()}{10001 + e}@example.com"
+
+
+def policy_number(e: int) -> str:
+    return f"POL{90000000 + e}"
+
+
+def generate(path: str, rows: int, employees: Optional[int] = None, seed: int = 7,
+             days: int = 2920, start_date: Optional[str] = None) -> dict:
+    """(Re)create ``insurance_data`` in the DuckDB file at ``path``"""
+    employees = max(1, int(employees or rows // 8 or 1))
+    start_date = start_date or (date.today() - timedelta(days=days - 1)).isoformat()
+    started = time.perf_counter()
+    conn = duckdb.connect(path)
+    try:
+        conn.execute("SET enable_progress_bar = false")
+        conn.execute(f"""
+        CREATE OR REPLACE TABLE insurance_data AS
+        WITH base AS (
+            SELECT i, i % {employees} AS e, hash(i + {int(seed)}) AS h FROM range({int(rows)}) r(i)
+        )
+        SELECT
+            'EMP' || (10001 + e) AS EmployeeID,
+            {_sql_array(FIRST_NAMES)}[1 + e % {len(FIRST_NAMES)}] AS FirstName,
+            {_sql_array(LAST_NAMES)}[1 + (e // {len(FIRST_NAMES)}) % {len(LAST_NAMES)}] AS LastName,
+            lower({_sql_array(FIRST_NAMES)}[1 + e % {len(FIRST_NAMES)}]) || '.' ||
+                lower({_sql_array(LAST_NAMES)}[1 + (e // {len(FIRST_NAMES)}) % {len(LAST_NAMES)}]) ||
+                (10001 + e) || '@example.com' AS Email,
+            'POL' || (90000000 + e) AS PolicyNumber,
+            CASE WHEN e % 20 = 0 THEN 'Lapsed' ELSE 'Active' END AS PolicyStatus,
+            CAST([{', '.join(str(c) for c in COVERAGE_TIERS)}][1 + e % {len(COVERAGE_TIERS)}]
+                 AS DECIMAL(12, 2)) AS CoverageAmountUSD,
+            'CLM' || lpad(CAST(i AS VARCHAR), 10, '0') AS ClaimID,
+            DATE '{start_date}' + CAST(h % {int(days)} AS INTEGER) AS ClaimDate,
+            {_sql_array(CLAIM_TYPES)}[1 + CAST((h >> 8) % {len(CLAIM_TYPES)} AS INTEGER)] AS ClaimType,
+            CASE CAST((h >> 16) % 10 AS INTEGER)
+                WHEN 0 THEN 'Pending' WHEN 1 THEN 'Pending' WHEN 2 THEN 'Pending'
+                WHEN 3 THEN 'Under Review' WHEN 4 THEN 'Approved' WHEN 5 THEN 'Approved'
+                WHEN 6 THEN 'Approved' WHEN 7 THEN 'Paid' WHEN 8 THEN 'Paid' ELSE 'Denied'
+            END AS ClaimStatus,
+            CAST(((h >> 24) % 100000) / 100000.0
+                 * 0.6 * [{', '.join(str(c) for c in COVERAGE_TIERS)}][1 + e % {len(COVERAGE_TIERS)}]
+                 AS DECIMAL(12, 2)) AS LastClaimAmountUSD,
+            CASE WHEN (h >> 40) % 100 < 4 THEN 'High'
+                 WHEN (h >> 40) % 100 < 15 THEN 'Medium'
+                 ELSE 'Low' END AS FraudRisk
+        FROM base
+        """)
+    finally:
+        conn.close()
+    return {"rows": int(rows), "employees": employees, "seed": seed,
+            "seconds": time.perf_counter() - started, "path": path}
+
+
+def connect_factory(path: str) -> Callable[[], "duckdb.DuckDBPyConnection"]:
+    """DB-API factory exposing the file as the ``insurance_db`` catalog"""
+    def connect():
+        conn = duckdb.connect()
+        conn.execute(f"ATTACH '{path}' AS insurance_db (READ_ONLY)")
+        return conn
+    return connect
+
+
+def sample_identifiers(employees: int, n: int, seed: int = 7, kinds=("employee_id", "email", "policy")) -> List[str]:
+    """Known login identifiers, drawn across the three shapes users type"""
+    rng = random.Random(seed)
+    makers = {"employee_id": employee_id, "email": email, "policy": policy_number}
+    return [makers[rng.choice(kinds)](rng.randrange(employees)) for _ in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--employees", type=int, default=None, help="default: rows / 8")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", required=True, help="DuckDB file to (re)create")
+    args = parser.parse_args()
+    info = generate(args.out, args.rows, args.employees, args.seed)
+    print(f"Wrote {info['rows']:,} rows for {info['employees']:,} employees "
+          f"to {info['path']} in {info['seconds']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
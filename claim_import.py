@@ -0,0 +1,255 @@
+import functools
+import hashlib
+import os
+import threading
+import time
+import uuid
+import logging
+from datetime import date
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+import pandas as pd
+
+from claim_pipeline import get_claim_pipeline
+from config import CLAIM_IMPORT_CHUNK_ROWS, CLAIM_IMPORT_DIR
+from database import get_policyholder_db
+from fraud_model import CLAIM_TYPES
+from instrumentation import metrics
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_COLUMNS = ("policy_number", "claim_type", "incident_date", "amount")
+OPTIONAL_COLUMNS = ("claim_ref", "provider", "location", "description")
+
+# Policies fetched once per import; cleared past this many to bound memory
+POLICY_CACHE_MAX_ENTRIES = 200000
+
+
+def _normalize(column: str) -> str:
+    """'Policy Number' / 'policy-number' / 'POLICY_NUMBER' -> 'policy_number'"""
+    return "_".join(str(column).strip().lower().replace("-", " ").split())
+
+
+def _file_kind(name: str) -> str:
+    extension = os.path.splitext(name.lower())[1]
+    if extension == ".csv":
+        return "csv"
+    if extension in (".parquet", ".pq"):
+        return "parquet"
+    raise ValueError(f"Unsupported file type {extension or name!r}; upload a .csv or .parquet file")
+
+
+class ClaimImporter:
+    """Streams a partner's CSV or Parquet claim file into the claim pipeline.
+
+    The file is read ``chunk_rows`` at a time, so memory is bounded by the
+    chunk size whatever the file size. Each chunk is validated with column
+    operations (claim type, incident date, amount, known and active policy,
+    amount within the policy's coverage); valid rows are queued with one
+    ``ClaimPipeline.enqueue_many`` transaction, which also reserves them on
+    the coverage ledger. Invalid rows, and rows that no longer fit the
+    policy's remaining coverage, go to a rejects CSV with their row number
+    and reason. Idempotency keys come from a ``claim_ref`` column, scoped
+    to the partner (or to the file when no partner is given), and from the
+    file digest and row number otherwise, so re-importing a file queues
+    nothing twice.
+    """
+
+    def __init__(self, pipeline, db, import_dir: str = CLAIM_IMPORT_DIR,
+                 chunk_rows: int = CLAIM_IMPORT_CHUNK_ROWS):
+        self.pipeline = pipeline
+        self.db = db
+        self.import_dir = import_dir
+        self.chunk_rows = chunk_rows
+        self._lock = threading.Lock()
+
+    def run(self, source, name: Optional[str] = None,
+            progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+            partner: Optional[str] = None) -> Dict[str, Any]:
+        """Import ``source`` (a path or a binary file object such as a
+        Streamlit upload) sent by ``partner``; ``progress`` is called after
+        every chunk"""
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("A claim import is already running")
+        try:
+            return self._run(source, name or getattr(source, "name", None) or str(source), progress,
+                             (partner or "").strip())
+        finally:
+            self._lock.release()
+
+    def _run(self, source, name: str, progress, partner: str) -> Dict[str, Any]:
+        kind = _file_kind(name)
+        import_id = uuid.uuid4().hex[:12]
+        os.makedirs(self.import_dir, exist_ok=True)
+        rejects_path = os.path.join(self.import_dir, f"{import_id}_rejects.csv")
+        digest = self._digest(source)
+        # claim_ref values are only unique within one partner's files
+        ref_scope = f"partner:{partner}" if partner else digest
+        started = time.perf_counter()
+        stats = {"import_id": import_id, "file": os.path.basename(name), "partner": partner, "rows": 0,
+                 "queued": 0, "rejected": 0, "duplicates": 0, "total_rows": None, "elapsed": 0.0,
+                 "rows_per_second": 0.0, "rejects_path": None}
+        policies: Dict[str, Dict[str, Any]] = {}
+
+        for chunk, total_rows in self._read_chunks(source, kind):
+            stats["total_rows"] = total_rows
+            first_row = stats["rows"] + 1
+            claims, keys, rows, rejects = self._validate(chunk, first_row, digest, ref_scope, import_id,
+                                                         policies)
+            if claims:
+                result = self.pipeline.enqueue_many(list(zip(keys, claims)))
+                stats["queued"] += len(result["queued"])
+                stats["duplicates"] += len(result["duplicate"])
+                if result["exceeded"]:
+                    over = [rows[i] for i, _ in result["exceeded"]]
+                    exceeded = chunk.loc[[row - first_row for row in over]].copy()
+                    exceeded.insert(0, "reason", [f"amount exceeds remaining coverage ${remaining:,.2f}"
+                                                  for _, remaining in result["exceeded"]])
+                    exceeded.insert(0, "row", over)
+                    rejects = pd.concat([rejects, exceeded], ignore_index=True)
+            if not rejects.empty:
+                rejects.to_csv(rejects_path, mode="a", header=stats["rejects_path"] is None, index=False)
+                stats["rejects_path"] = rejects_path
+                stats["rejected"] += len(rejects)
+
+            stats["rows"] += len(chunk)
+            stats["elapsed"] = time.perf_counter() - started
+            stats["rows_per_second"] = stats["rows"] / stats["elapsed"] if stats["elapsed"] else 0.0
+            if progress is not None:
+                progress(dict(stats))
+
+        for outcome in ("queued", "rejected", "duplicates"):
+            metrics.inc("claim_import_rows_total", stats[outcome], outcome=outcome)
+        logger.info(f"✅ Claim import {import_id} ({stats['file']}): {stats['rows']:,} rows, "
+                    f"{stats['queued']:,} queued, {stats['rejected']:,} rejected, "
+                    f"{stats['duplicates']:,} already queued, {stats['rows_per_second']:,.0f} rows/s")
+        return stats
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _digest(source) -> str:
+        """SHA-256 of the file contents, read in blocks"""
+        digest = hashlib.sha256()
+        handle = open(source, "rb") if isinstance(source, (str, os.PathLike)) else source
+        try:
+            for block in iter(functools.partial(handle.read, 1024 * 1024), b""):
+                digest.update(block)
+        finally:
+            if handle is source:
+                source.seek(0)
+            else:
+                handle.close()
+        return digest.hexdigest()[:16]
+
+    def _read_chunks(self, source, kind: str) -> Iterator[Tuple[pd.DataFrame, Optional[int]]]:
+        """Yield ``(chunk, total rows if known)``, all values as strings and
+        columns renamed to their normalized names"""
+        if kind == "csv":
+            reader = pd.read_csv(source, chunksize=self.chunk_rows, dtype=str,
+                                 keep_default_na=False, skipinitialspace=True)
+            for n, chunk in enumerate(reader):
+                yield self._prepare(chunk, n), None
+            return
+
+        import pyarrow.parquet as pq
+        parquet = pq.ParquetFile(source)
+        wanted = set(REQUIRED_COLUMNS + OPTIONAL_COLUMNS)
+        columns = [c for c in parquet.schema_arrow.names if _normalize(c) in wanted]
+        for n, batch in enumerate(parquet.iter_batches(batch_size=self.chunk_rows, columns=columns)):
+            chunk = batch.to_pandas().astype("string").fillna("").astype(object)
+            yield self._prepare(chunk, n), parquet.metadata.num_rows
+
+    @staticmethod
+    def _prepare(chunk: pd.DataFrame, n: int) -> pd.DataFrame:
+        chunk = chunk.rename(columns=_normalize)
+        if n == 0:
+            missing = [c for c in REQUIRED_COLUMNS if c not in chunk.columns]
+            if missing:
+                raise ValueError(f"Missing required columns: {', '.join(missing)}")
+        return chunk.reset_index(drop=True)
+
+    # ------------------------------------------------------------------
+    # Validation
+    # ------------------------------------------------------------------
+    def _lookup_policies(self, numbers, policies: Dict[str, Dict[str, Any]]) -> pd.DataFrame:
+        missing = [p for p in numbers if p not in policies]
+        if missing:
+            if len(policies) + len(missing) > POLICY_CACHE_MAX_ENTRIES:
+                # Evict only policies this chunk does not use; the rest are read below
+                wanted = set(numbers)
+                for number in [p for p in policies if p not in wanted]:
+                    del policies[number]
+            found = self.db.get_policies(missing)
+            for number in missing:
+                policies[number] = found.get(number)
+        known = {p: policies[p] for p in numbers if policies.get(p) is not None}
+        return pd.DataFrame.from_dict(known, orient="index",
+                                      columns=["employee_id", "name", "policy_status", "coverage"])
+
+    def _validate(self, chunk: pd.DataFrame, first_row: int, digest: str, ref_scope: str,
+                  import_id: str, policies: Dict[str, Dict[str, Any]]):
+        """``(claims, idempotency keys, file row numbers, rejects frame)`` for one chunk"""
+        reason = pd.Series("", index=chunk.index, dtype=object)
+
+        def reject(mask, text):
+            reason[mask & (reason == "")] = text
+
+        policy = chunk["policy_number"].str.strip()
+        reject(policy == "", "missing policy number")
+        claim_type = chunk["claim_type"].str.strip().str.title()
+        reject(~claim_type.isin(CLAIM_TYPES), "unknown claim type")
+        # Offsets (or a tz-aware Parquet column) are normalized to naive UTC
+        incident = pd.to_datetime(chunk["incident_date"].str.strip(), errors="coerce", format="mixed",
+                                  utc=True).dt.tz_localize(None)
+        reject(incident.isna(), "invalid incident date")
+        reject(incident > pd.Timestamp(date.today()), "incident date in the future")
+        amount = pd.to_numeric(chunk["amount"].str.replace(r"[$,\s]", "", regex=True), errors="coerce")
+        reject(amount.isna() | (amount <= 0), "amount must be a positive number")
+
+        known = self._lookup_policies(policy[reason == ""].unique().tolist(), policies)
+        reject(~policy.isin(known.index), "unknown policy number")
+        status = policy.map(known["policy_status"]).fillna("")
+        reject((status != "") & (status.str.lower() != "active"), "policy is not active")
+        coverage = policy.map(known["coverage"]).astype(float)
+        reject((coverage > 0) & (amount > coverage), "amount exceeds policy coverage")
+
+        bad = reason != ""
+        rejects = chunk.loc[bad].copy()
+        rejects.insert(0, "reason", reason[bad])
+        rejects.insert(0, "row", chunk.index[bad] + first_row)
+
+        valid = ~bad
+        rows = (chunk.index[valid] + first_row).tolist()
+        frame = pd.DataFrame({
+            "employee_id": policy[valid].map(known["employee_id"]).astype(str),
+            "policy_number": policy[valid],
+            "coverage": coverage[valid],
+            "claimant": policy[valid].map(known["name"]),
+            "claim_type": claim_type[valid],
+            "incident_date": incident[valid].dt.strftime("%Y-%m-%d"),
+            "amount": amount[valid].astype(float),
+        })
+        for column in ("provider", "location", "description"):
+            frame[column] = chunk.loc[valid, column] if column in chunk.columns else ""
+        frame["import_id"] = import_id
+
+        keys = [f"import:{digest}:{row}" for row in rows]
+        if "claim_ref" in chunk.columns:
+            refs = chunk.loc[valid, "claim_ref"].str.strip().tolist()
+            keys = [f"import:{ref_scope}:ref:{ref}" if ref else key for ref, key in zip(refs, keys)]
+        return frame.to_dict("records"), keys, rows, rejects
+
+
+@functools.lru_cache(maxsize=None)
+def get_claim_importer() -> ClaimImporter:
+    """Process-wide instance, created on first use"""
+    return ClaimImporter(get_claim_pipeline(), get_policyholder_db())
+
+
+def __getattr__(name):
+    # Keeps ``from claim_import import claim_importer`` working without import-time setup
+    if name == "claim_importer":
+        return get_claim_importer()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
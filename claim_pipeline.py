@@ -0,0 +1,591 @@
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from config import (
+    LOCAL_DATA_DIR,
+    PIPELINE_STAGE_CONCURRENCY,
+    PIPELINE_MAX_ATTEMPTS,
+    PIPELINE_LEASE_SECONDS,
+    PIPELINE_POLL_SECONDS,
+    AUTO_APPROVE_LIMIT_USD,
+    CLAIMS_CACHE_ENABLED,
+)
+from coverage_ledger import CoverageLedger, coverage_period
+from database import get_policyholder_db
+from fraud_serving import get_fraud_scorer
+from instrumentation import metrics
+from local_db import connect_sqlite
+from query_cache import get_claims_cache
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("policy_validation", "fraud_detection", "adjudication", "payment_processing")
+STAGE_LABELS = {
+    "policy_validation": "Policy Validation",
+    "fraud_detection": "Fraud Detection",
+    "adjudication": "Adjudication",
+    "payment_processing": "Payment Processing",
+    "completed": "Completed",
+}
+
+
+class ClaimRejected(Exception):
+    """Terminal: the claim fails a stage and leaves the pipeline"""
+
+
+class ClaimHeld(Exception):
+    """Terminal for the pipeline: the claim needs a human adjuster"""
+
+
+# ============================================
+# DEFAULT STAGE HANDLERS
+# ============================================
+# Each handler gets the claim dict (form fields plus earlier stage results)
+# and an idempotency key unique to (claim, stage). Handlers with external
+# side effects must pass that key on, since a stage can be retried.
+
+def validate_policy(claim: Dict[str, Any], idempotency_key: str) -> Dict[str, Any]:
+    amount = float(claim.get("amount") or 0)
+    coverage = float(claim.get("coverage") or 0)
+    if not claim.get("policy_number"):
+        raise ClaimRejected("No policy number on claim")
+    if amount <= 0:
+        raise ClaimRejected("Claim amount must be positive")
+    if coverage and amount > coverage:
+        raise ClaimRejected(f"Amount ${amount:,.2f} exceeds coverage ${coverage:,.2f}")
+    # Policy status, fraud risk and claim gap for the fraud model; the form
+    # only carries the claim itself
+    context = get_policyholder_db().get_claim_context(str(claim.get("employee_id", "")),
+                                                      claim.get("incident_date"))
+    return dict(context, coverage=coverage, amount=amount)
+
+
+def detect_fraud(claim: Dict[str, Any], idempotency_key: str) -> Dict[str, Any]:
+    # Scored alongside concurrent claims from other workers in one model batch
+    return get_fraud_scorer().score(dict(claim, **claim["results"].get("policy_validation", {})))
+
+
+def adjudicate(claim: Dict[str, Any], idempotency_key: str) -> Dict[str, Any]:
+    fraud = claim["results"].get("fraud_detection", {})
+    if fraud.get("flagged"):
+        raise ClaimHeld(f"Fraud score {fraud.get('score', 0):.2f}: {fraud.get('reasons')}")
+    if float(claim.get("amount") or 0) > AUTO_APPROVE_LIMIT_USD:
+        raise ClaimHeld(f"Amount above auto-approval limit ${AUTO_APPROVE_LIMIT_USD:,.0f}")
+    return {"decision": "approved", "decided_at": datetime.now().isoformat()}
+
+
+def process_payment(claim: Dict[str, Any], idempotency_key: str) -> Dict[str, Any]:
+    # The payout reference is derived from the idempotency key, so a retried
+    # stage schedules the same payment rather than a second one.
+    return {"payment_ref": f"PAY-{uuid.uuid5(uuid.NAMESPACE_URL, idempotency_key).hex[:12].upper()}",
+            "amount": float(claim.get("amount") or 0)}
+
+
+DEFAULT_HANDLERS = {
+    "policy_validation": validate_policy,
+    "fraud_detection": detect_fraud,
+    "adjudication": adjudicate,
+    "payment_processing": process_payment,
+}
+
+
+INSERT_CLAIM_SQL = '''
+INSERT INTO pipeline_claims (claim_id, idempotency_key, employee_id, payload, stage,
+                             status, next_attempt_at, created_at, stage_entered_at, updated_at)
+VALUES (?, ?, ?, ?, ?, 'queued', ?, ?, ?, ?)
+'''
+
+# A worker's write-back matches only the lease it took (claim_id, stage, lease_token)
+LEASE_HELD_SQL = "claim_id = ? AND stage = ? AND status = 'running' AND lease_token = ?"
+
+# Idempotency keys per IN (...) lookup in enqueue_many
+KEY_LOOKUP_BATCH = 500
+
+
+def _reservation(claim_id: str, claim: Dict[str, Any]) -> tuple:
+    return (claim_id, str(claim["policy_number"]), str(claim.get("employee_id", "")),
+            float(claim.get("amount") or 0), float(claim.get("coverage") or 0),
+            coverage_period(claim.get("incident_date")))
+
+
+# ============================================
+# PIPELINE
+# ============================================
+class ClaimPipeline:
+    """Durable, staged claim processing on a local SQLite WAL queue.
+
+    ``enqueue`` writes the claim and returns immediately. Worker threads,
+    with a separate concurrency limit per stage, lease claims one at a
+    time, run the stage handler and advance the claim. Failed stages are
+    retried with backoff. A claim whose worker dies is re-leased once its
+    lease expires. Each lease carries a fresh token, and a worker's result
+    is written only while its token still holds the claim, so a worker that
+    overran its lease cannot overwrite the claim's next attempt.
+
+    Each claim's amount is reserved on the policy's ``CoverageLedger`` when
+    it is queued and settled or released when it leaves the pipeline, in
+    the same transaction as the status change.
+
+    ``on_claim_written(employee_id)`` runs after a claim is queued or
+    reaches a terminal or review status, so caches of that employee's
+    claims can be invalidated.
+    """
+
+    def __init__(self, db_path: Optional[str] = None,
+                 handlers: Optional[Dict[str, Callable]] = None,
+                 concurrency: Optional[Dict[str, int]] = None,
+                 max_attempts: int = PIPELINE_MAX_ATTEMPTS,
+                 lease_seconds: float = PIPELINE_LEASE_SECONDS,
+                 poll_interval: float = PIPELINE_POLL_SECONDS,
+                 on_claim_written: Optional[Callable[[str], None]] = None):
+        self.db_path = db_path or os.path.join(LOCAL_DATA_DIR, "claim_pipeline.db")
+        self.handlers = dict(DEFAULT_HANDLERS, **(handlers or {}))
+        self.concurrency = dict(PIPELINE_STAGE_CONCURRENCY, **(concurrency or {}))
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.on_claim_written = on_claim_written
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._wake = {stage: threading.Event() for stage in STAGES}
+        self._start_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._conn = connect_sqlite(self.db_path)
+        self._init_schema()
+        self.ledger = CoverageLedger(self.db_path)
+
+    def _init_schema(self):
+        with self._conn:
+            self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS pipeline_claims (
+                claim_id TEXT PRIMARY KEY,
+                idempotency_key TEXT UNIQUE NOT NULL,
+                employee_id TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                lease_until REAL,
+                lease_token TEXT,
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                stage_entered_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            ''')
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(pipeline_claims)")]
+            if "lease_token" not in columns:
+                self._conn.execute("ALTER TABLE pipeline_claims ADD COLUMN lease_token TEXT")
+            self._conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_pipeline_ready
+            ON pipeline_claims (stage, status, next_attempt_at)
+            ''')
+            self._conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_pipeline_employee
+            ON pipeline_claims (employee_id, created_at DESC)
+            ''')
+            self._conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_pipeline_status_updated
+            ON pipeline_claims (status, updated_at)
+            ''')
+            self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS pipeline_stage_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                claim_id TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                attempt INTEGER NOT NULL,
+                outcome TEXT NOT NULL,
+                wait_ms REAL NOT NULL,
+                latency_ms REAL NOT NULL,
+                finished_at REAL NOT NULL
+            )
+            ''')
+            self._conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_stage_events_stage
+            ON pipeline_stage_events (stage, id DESC)
+            ''')
+
+    # ------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------
+    def enqueue(self, claim: Dict[str, Any], idempotency_key: str) -> str:
+        """Durably queue a claim; resubmitting the same key returns the same id.
+
+        Raises ``CoverageExceeded`` (and queues nothing) when the amount is
+        more than the policy's remaining coverage.
+        """
+        now = time.time()
+        claim_id = f"CLM-{uuid.uuid4().hex[:10].upper()}"
+        payload = dict(claim, claim_id=claim_id, results={})
+        with self._lock, self._conn:
+            inserted = self._conn.execute(
+                INSERT_CLAIM_SQL + "ON CONFLICT(idempotency_key) DO NOTHING",
+                (claim_id, idempotency_key, str(claim.get("employee_id", "")),
+                 json.dumps(payload, default=str), STAGES[0], now, now, now, now)
+            ).rowcount
+            if inserted and claim.get("policy_number"):
+                self.ledger.reserve(self._conn, *_reservation(claim_id, claim))
+            row = self._conn.execute(
+                "SELECT claim_id FROM pipeline_claims WHERE idempotency_key = ?", (idempotency_key,)
+            ).fetchone()
+        self._wake[STAGES[0]].set()
+        self._claim_written(str(claim.get("employee_id", "")))
+        return row[0]
+
+    def enqueue_many(self, claims: Sequence[Tuple[str, Dict[str, Any]]]) -> Dict[str, List[Tuple[int, Any]]]:
+        """Queue a batch of ``(idempotency_key, claim)`` in one transaction.
+
+        Returns ``{"queued": [(index, claim_id)], "duplicate": [(index,
+        existing claim_id)], "exceeded": [(index, remaining coverage)]}``.
+        Keys already queued are skipped, and claims that do not fit the
+        policy's remaining coverage are left out without failing the batch.
+        """
+        result: Dict[str, List[Tuple[int, Any]]] = {"queued": [], "duplicate": [], "exceeded": []}
+        now = time.time()
+        with self._lock, self._conn:
+            # Take the write lock up front: the duplicate and coverage checks
+            # below must still hold when the rows are inserted
+            self._conn.execute("BEGIN IMMEDIATE")
+            keys = list({key for key, _ in claims})
+            existing: Dict[str, str] = {}
+            for start in range(0, len(keys), KEY_LOOKUP_BATCH):
+                batch = keys[start:start + KEY_LOOKUP_BATCH]
+                existing.update(self._conn.execute(
+                    f"SELECT idempotency_key, claim_id FROM pipeline_claims "
+                    f"WHERE idempotency_key IN ({', '.join('?' * len(batch))})", batch
+                ).fetchall())
+
+            fresh = []
+            for i, (key, claim) in enumerate(claims):
+                if key in existing:
+                    result["duplicate"].append((i, existing[key]))
+                    continue
+                claim_id = f"CLM-{uuid.uuid4().hex[:10].upper()}"
+                existing[key] = claim_id
+                fresh.append((i, key, claim, claim_id))
+
+            covered = [n for n, (_, _, claim, _) in enumerate(fresh) if claim.get("policy_number")]
+            _, exceeded = self.ledger.reserve_many(
+                self._conn, [_reservation(fresh[n][3], fresh[n][2]) for n in covered]
+            )
+            skipped = set()
+            for n, remaining in exceeded:
+                skipped.add(covered[n])
+                result["exceeded"].append((fresh[covered[n]][0], remaining))
+
+            rows = []
+            for n, (i, key, claim, claim_id) in enumerate(fresh):
+                if n in skipped:
+                    continue
+                payload = dict(claim, claim_id=claim_id, results={})
+                rows.append((claim_id, key, str(claim.get("employee_id", "")),
+                             json.dumps(payload, default=str), STAGES[0], now, now, now, now))
+                result["queued"].append((i, claim_id))
+            self._conn.executemany(INSERT_CLAIM_SQL, rows)
+        if rows:
+            self._wake[STAGES[0]].set()
+        for employee_id in {row[2] for row in rows}:
+            self._claim_written(employee_id)
+        return result
+
+    def _claim_written(self, employee_id: str):
+        if self.on_claim_written is None or not employee_id:
+            return
+        try:
+            self.on_claim_written(employee_id)
+        except Exception as e:
+            logger.warning(f"⚠️ Claim write hook failed for {employee_id}: {e}")
+
+    # ------------------------------------------------------------------
+    # Status (cheap, indexed reads for dashboard polling)
+    # ------------------------------------------------------------------
+    def get_status(self, claim_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        ids = list(claim_ids)
+        if not ids:
+            return {}
+        marks = ", ".join("?" for _ in ids)
+        with self._lock:
+            rows = self._conn.execute(f'''
+            SELECT claim_id, stage, status, attempts, last_error, updated_at
+            FROM pipeline_claims WHERE claim_id IN ({marks})
+            ''', ids).fetchall()
+        return {r[0]: self._status_row(r) for r in rows}
+
+    def claims_for_employee(self, employee_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute('''
+            SELECT claim_id, stage, status, attempts, last_error, updated_at, payload
+            FROM pipeline_claims WHERE employee_id = ?
+            ORDER BY created_at DESC LIMIT ?
+            ''', (employee_id, limit)).fetchall()
+        claims = []
+        for r in rows:
+            item = self._status_row(r)
+            payload = json.loads(r[6])
+            item.update(claim_type=payload.get("claim_type"), amount=payload.get("amount"),
+                        incident_date=payload.get("incident_date"))
+            claims.append(item)
+        return claims
+
+    # ------------------------------------------------------------------
+    # Manual review hand-off
+    # ------------------------------------------------------------------
+    def held_claims(self, since: float = 0.0, limit: int = 1000) -> List[Dict[str, Any]]:
+        """Claims held for review whose hold happened at or after ``since``"""
+        with self._lock:
+            rows = self._conn.execute('''
+            SELECT claim_id, employee_id, payload, last_error, created_at, updated_at
+            FROM pipeline_claims WHERE status = 'review' AND updated_at >= ?
+            ORDER BY updated_at LIMIT ?
+            ''', (since, limit)).fetchall()
+        held = []
+        for claim_id, employee_id, payload_json, reason, created_at, updated_at in rows:
+            payload = json.loads(payload_json)
+            fraud = payload.get("results", {}).get("fraud_detection", {})
+            held.append({
+                "claim_id": claim_id,
+                "employee_id": employee_id,
+                "claim_type": payload.get("claim_type"),
+                "amount": float(payload.get("amount") or 0),
+                "fraud_score": float(fraud.get("score") or 0),
+                "reason": reason,
+                "submitted_at": created_at,
+                "held_at": updated_at,
+            })
+        return held
+
+    def resolve_review(self, claim_id: str, approved: bool, reviewer: str, note: str = "") -> bool:
+        """Release a held claim: approved claims continue to payment, others are rejected"""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT payload FROM pipeline_claims WHERE claim_id = ? AND status = 'review'", (claim_id,)
+            ).fetchone()
+            if row is None:
+                return False
+            claim = json.loads(row[0])
+            claim["results"]["adjudication"] = {
+                "decision": "approved" if approved else "rejected",
+                "decided_by": reviewer, "note": note, "decided_at": datetime.now().isoformat(),
+            }
+            if approved:
+                self._conn.execute('''
+                UPDATE pipeline_claims
+                SET stage = ?, status = 'queued', payload = ?, attempts = 0, last_error = NULL,
+                    next_attempt_at = ?, stage_entered_at = ?, updated_at = ?
+                WHERE claim_id = ?
+                ''', (STAGES[-1], json.dumps(claim, default=str), now, now, now, claim_id))
+            else:
+                self._conn.execute('''
+                UPDATE pipeline_claims SET status = 'rejected', payload = ?, last_error = ?, updated_at = ?
+                WHERE claim_id = ?
+                ''', (json.dumps(claim, default=str), note or f"Rejected by {reviewer}", now, claim_id))
+                self.ledger.release(self._conn, claim_id)
+        if approved:
+            self._wake[STAGES[-1]].set()
+        self._claim_written(str(claim.get("employee_id", "")))
+        return True
+
+    @staticmethod
+    def _status_row(r) -> Dict[str, Any]:
+        return {
+            "claim_id": r[0],
+            "stage": r[1],
+            "stage_label": STAGE_LABELS.get(r[1], r[1]),
+            "status": r[2],
+            "attempts": r[3],
+            "last_error": r[4],
+            "updated_at": datetime.fromtimestamp(r[5]),
+        }
+
+    def stats(self, window: int = 500) -> Dict[str, Any]:
+        """Queue depth per stage and latency percentiles over recent events"""
+        with self._lock:
+            depth_rows = self._conn.execute('''
+            SELECT stage, status, COUNT(*) FROM pipeline_claims
+            WHERE status IN ('queued', 'running')
+            GROUP BY stage, status
+            ''').fetchall()
+            latency = {}
+            for stage in STAGES:
+                samples = self._conn.execute('''
+                SELECT latency_ms, wait_ms FROM pipeline_stage_events
+                WHERE stage = ? ORDER BY id DESC LIMIT ?
+                ''', (stage, window)).fetchall()
+                if samples:
+                    frame = pd.DataFrame(samples, columns=["latency_ms", "wait_ms"])
+                    latency[stage] = {
+                        "samples": len(frame),
+                        "p50_ms": float(frame["latency_ms"].quantile(0.5)),
+                        "p95_ms": float(frame["latency_ms"].quantile(0.95)),
+                        "wait_p95_ms": float(frame["wait_ms"].quantile(0.95)),
+                    }
+        depth = {stage: {"queued": 0, "running": 0} for stage in STAGES}
+        for stage, status, count in depth_rows:
+            depth.setdefault(stage, {})[status] = count
+        return {"queue_depth": depth, "latency": latency,
+                "workers": {s: self.concurrency.get(s, 1) for s in STAGES}}
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+    def start(self):
+        """Start stage workers once per process; safe to call on every rerun"""
+        with self._start_lock:
+            if self._threads:
+                return
+            self._stop.clear()
+            for stage in STAGES:
+                for n in range(max(1, int(self.concurrency.get(stage, 1)))):
+                    thread = threading.Thread(target=self._worker, args=(stage,),
+                                              name=f"pipeline-{stage}-{n}", daemon=True)
+                    thread.start()
+                    self._threads.append(thread)
+            logger.info(f"✅ Claim pipeline started with {len(self._threads)} workers")
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        for event in self._wake.values():
+            event.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _worker(self, stage: str):
+        conn = connect_sqlite(self.db_path, check_same_thread=True)
+        try:
+            while not self._stop.is_set():
+                try:
+                    self._recover_expired(conn, stage)
+                    job = self._lease(conn, stage)
+                except Exception as e:
+                    logger.error(f"❌ Pipeline lease failed for {stage}: {e}")
+                    job = None
+                if job is None:
+                    self._wake[stage].wait(self.poll_interval)
+                    self._wake[stage].clear()
+                    continue
+                try:
+                    self._process(conn, stage, *job)
+                except Exception as e:
+                    # The claim stays leased; _recover_expired requeues it once the lease runs out
+                    logger.error(f"❌ Pipeline {stage} failed to process {job[0]}: {e}")
+        finally:
+            conn.close()
+
+    def _recover_expired(self, conn, stage: str):
+        with conn:
+            conn.execute('''
+            UPDATE pipeline_claims SET status = 'queued', lease_until = NULL, lease_token = NULL
+            WHERE stage = ? AND status = 'running' AND lease_until < ?
+            ''', (stage, time.time()))
+
+    def _lease(self, conn, stage: str):
+        now = time.time()
+        with conn:
+            row = conn.execute('''
+            UPDATE pipeline_claims
+            SET status = 'running', lease_until = ?, lease_token = ?, attempts = attempts + 1, updated_at = ?
+            WHERE claim_id = (
+                SELECT claim_id FROM pipeline_claims
+                WHERE stage = ? AND status = 'queued' AND next_attempt_at <= ?
+                ORDER BY next_attempt_at LIMIT 1
+            )
+            RETURNING claim_id, lease_token, payload, attempts, stage_entered_at
+            ''', (now + self.lease_seconds, uuid.uuid4().hex, now, stage, now)).fetchone()
+        return row
+
+    def _process(self, conn, stage: str, claim_id: str, lease_token: str, payload_json: str,
+                 attempt: int, entered_at: float):
+        claim = json.loads(payload_json)
+        started = time.time()
+        outcome, error, result = "advanced", None, None
+        try:
+            result = self.handlers[stage](claim, f"{claim_id}:{stage}")
+        except ClaimRejected as e:
+            outcome, error = "rejected", str(e)
+        except ClaimHeld as e:
+            outcome, error = "review", str(e)
+        except Exception as e:
+            outcome, error = ("retry" if attempt < self.max_attempts else "failed"), str(e)
+            logger.warning(f"⚠️ {claim_id} {stage} attempt {attempt} failed: {e}")
+        finished = time.time()
+
+        now = finished
+        # Every write is conditional on still holding this lease
+        leased = (claim_id, stage, lease_token)
+        with conn:
+            if outcome == "advanced":
+                claim["results"][stage] = result
+                index = STAGES.index(stage)
+                next_stage = STAGES[index + 1] if index + 1 < len(STAGES) else "completed"
+                updated = conn.execute(f'''
+                UPDATE pipeline_claims
+                SET stage = ?, status = ?, payload = ?, attempts = 0, lease_until = NULL, lease_token = NULL,
+                    last_error = NULL, next_attempt_at = ?, stage_entered_at = ?, updated_at = ?
+                WHERE {LEASE_HELD_SQL}
+                ''', (next_stage, "done" if next_stage == "completed" else "queued",
+                      json.dumps(claim, default=str), now, now, now) + leased).rowcount
+                if updated and next_stage == "completed":
+                    self.ledger.settle(conn, claim_id)
+            elif outcome == "retry":
+                backoff = min(60.0, 2.0 ** attempt)
+                updated = conn.execute(f'''
+                UPDATE pipeline_claims
+                SET status = 'queued', lease_until = NULL, lease_token = NULL, last_error = ?,
+                    next_attempt_at = ?, updated_at = ?
+                WHERE {LEASE_HELD_SQL}
+                ''', (error, now + backoff, now) + leased).rowcount
+            else:
+                updated = conn.execute(f'''
+                UPDATE pipeline_claims
+                SET status = ?, lease_until = NULL, lease_token = NULL, last_error = ?, updated_at = ?
+                WHERE {LEASE_HELD_SQL}
+                ''', (outcome, error, now) + leased).rowcount
+                if updated and outcome != "review":
+                    self.ledger.release(conn, claim_id)
+            if not updated:
+                # The lease expired and the claim was re-leased (or resolved)
+                # meanwhile; that attempt owns it now
+                outcome = "stale"
+                logger.warning(f"⚠️ {claim_id} {stage} attempt {attempt} lost its lease; result dropped")
+            conn.execute('''
+            INSERT INTO pipeline_stage_events
+                (claim_id, stage, attempt, outcome, wait_ms, latency_ms, finished_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (claim_id, stage, attempt, outcome, max(0.0, started - entered_at) * 1000,
+                  (finished - started) * 1000, finished))
+
+        if outcome == "stale":
+            return
+        if outcome == "advanced" and stage != STAGES[-1]:
+            self._wake[STAGES[STAGES.index(stage) + 1]].set()
+        elif outcome != "retry":
+            self._claim_written(str(claim.get("employee_id", "")))
+
+
+@functools.lru_cache(maxsize=None)
+def get_claim_pipeline() -> ClaimPipeline:
+    """Process-wide instance, created on first use"""
+    pipeline = ClaimPipeline(on_claim_written=get_claims_cache().invalidate_employee
+                             if CLAIMS_CACHE_ENABLED else None)
+    metrics.register_collector("coverage_ledger", pipeline.ledger.stats)
+    pipeline.ledger.start(get_policyholder_db)
+    return pipeline
+
+
+def __getattr__(name):
+    # Keeps ``from claim_pipeline import claim_pipeline`` working without import-time setup
+    if name == "claim_pipeline":
+        return get_claim_pipeline()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
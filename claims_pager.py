@@ -0,0 +1,95 @@
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, List, Optional, Tuple
+
+from config import CLAIMS_PREFETCH_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# Shared by every pager in the process; prefetches are short single queries
+_prefetch_pool = ThreadPoolExecutor(max_workers=CLAIMS_PREFETCH_WORKERS,
+                                    thread_name_prefix="claims-prefetch")
+
+
+class ClaimsPager:
+    """Keyset pager over a policyholder's claims with next-page prefetch.
+
+    Keep one instance per view in ``st.session_state``. While the current
+    page renders, the next page is already being fetched on a background
+    thread, so "Older" usually returns without waiting on the warehouse.
+    ``first_page`` skips the initial load when the caller already has it;
+    ``reset`` brings page one up to date.
+    """
+
+    def __init__(self, db, employee_id: str, page_size: int = 10, fetch: str = "dicts",
+                 first_page=None):
+        self.db = db
+        self.employee_id = employee_id
+        self.page_size = page_size
+        self.fetch = fetch
+        # Cursor that produced each page we have visited; None is page one
+        self._cursors: List[Optional[Tuple[Any, Any]]] = [None]
+        self._page = first_page if first_page is not None else self._load(None)
+        self._prefetch: Optional[Future] = None
+        self._schedule_prefetch()
+
+    @property
+    def page(self):
+        return self._page
+
+    @property
+    def page_number(self) -> int:
+        return len(self._cursors)
+
+    @property
+    def has_next(self) -> bool:
+        return self._page.has_more
+
+    @property
+    def has_previous(self) -> bool:
+        return len(self._cursors) > 1
+
+    def next(self):
+        if not self.has_next:
+            return self._page
+        cursor = self._page.next_cursor
+        future = self._prefetch
+        self._prefetch = None
+        page = None
+        if future is not None:
+            try:
+                page = future.result()
+            except Exception as e:
+                logger.warning(f"⚠️ Claims prefetch failed, loading directly: {e}")
+        if page is None:
+            page = self._load(cursor)
+        self._cursors.append(cursor)
+        self._page = page
+        self._schedule_prefetch()
+        return self._page
+
+    def previous(self):
+        if not self.has_previous:
+            return self._page
+        self._cursors.pop()
+        self._page = self._load(self._cursors[-1])
+        self._schedule_prefetch()
+        return self._page
+
+    def reset(self, first_page=None):
+        """Back to page one, reloaded (or ``first_page`` when the caller has it)"""
+        self._cursors = [None]
+        self._page = first_page if first_page is not None else self._load(None)
+        self._schedule_prefetch()
+        return self._page
+
+    def _load(self, cursor):
+        return self.db.get_policyholder_claims_page(
+            self.employee_id, after=cursor, page_size=self.page_size, fetch=self.fetch
+        )
+
+    def _schedule_prefetch(self):
+        if self._prefetch is not None:
+            self._prefetch.cancel()
+        self._prefetch = (_prefetch_pool.submit(self._load, self._page.next_cursor)
+                          if self._page.has_more else None)
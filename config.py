@@ -10,11 +10,166 @@ GOOGLE_DISCOVERY_URL = "https://accounts.google.com/.well-known/openid-configura
 # App Configuration
 APP_NAME = "SecureClaim AI Insurance Portal"
 APP_DESCRIPTION = "AI-Powered Insurance Claim Processing System"
-SECRET_KEY = os.environ.get("STREAMLIT_SECRET_KEY", "insurance-claim-auth-secret-key-2024")
+DEFAULT_SECRET_KEY = "insurance-claim-auth-secret-key-2024"
+SECRET_KEY = os.environ.get("STREAMLIT_SECRET_KEY", DEFAULT_SECRET_KEY)
 
 # Database
 DATABASE_URL = "sqlite:///users.db"
 
 # Session config
 SESSION_TIMEOUT_MINUTES = 30
+# Sliding expiry is written back at most this often per session
+SESSION_TOUCH_SECONDS = 60
+SESSION_SWEEP_SECONDS = 300
+# The token lives in an HttpOnly cookie set by session_routes.py (run the app
+# with ``streamlit run server.py``); the page hands it over with a one-time
+# code valid this long
+SESSION_COOKIE_NAME = "irmc_session"
+SESSION_HANDOFF_SECONDS = 30
 MAX_LOGIN_ATTEMPTS = 5
+
+# Databricks connection pool
+DB_POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", "5"))
+DB_POOL_IDLE_TIMEOUT_SECONDS = 300
+DB_POOL_CHECKOUT_TIMEOUT_SECONDS = 30
+
+# Policyholder profile cache
+PROFILE_CACHE_MAX_ENTRIES = 10000
+PROFILE_CACHE_TTL_SECONDS = 300
+
+# Warehouse column set on every insert and update (e.g. UpdatedAt), if the
+# table has one; local copies use it to pick up edits incrementally
+WAREHOUSE_CHANGE_COLUMN = os.environ.get("WAREHOUSE_CHANGE_COLUMN") or None
+
+# Local state (SQLite files for indexes, caches and queues)
+LOCAL_DATA_DIR = os.environ.get("IRMC_LOCAL_DATA_DIR", "local_data")
+
+# Local identifier -> EmployeeID index for policyholder login
+IDENTIFIER_INDEX_ENABLED = os.environ.get("IDENTIFIER_INDEX_ENABLED", "0") == "1"
+IDENTIFIER_INDEX_REFRESH_SECONDS = 300
+# Rebuild period when there is no WAREHOUSE_CHANGE_COLUMN (edits only show up then)
+IDENTIFIER_INDEX_FULL_REFRESH_SECONDS = 3600
+
+# Local mirror of the warehouse table; profile and claim reads use it while
+# it is no staler than MIRROR_MAX_STALENESS_SECONDS. Without a
+# WAREHOUSE_CHANGE_COLUMN only full resyncs count towards freshness, so they
+# run at least that often
+MIRROR_ENABLED = os.environ.get("MIRROR_ENABLED", "0") == "1"
+MIRROR_MAX_STALENESS_SECONDS = int(os.environ.get("MIRROR_MAX_STALENESS_SECONDS", "900"))
+MIRROR_SYNC_SECONDS = 300
+MIRROR_LOOKBACK_DAYS = 30
+MIRROR_FULL_RESYNC_HOURS = 24
+MIRROR_SYNC_BATCH_ROWS = 50000
+MIRROR_POOL_MAX_SIZE = 4
+
+# Claim query results: identical concurrent queries share one execution and
+# results are shared across local server processes until TTL or a claim write
+CLAIMS_CACHE_ENABLED = os.environ.get("CLAIMS_CACHE_ENABLED", "1") == "1"
+CLAIMS_CACHE_TTL_SECONDS = 60
+CLAIMS_CACHE_MAX_VALUE_BYTES = 1024 * 1024
+CLAIMS_CACHE_SWEEP_SECONDS = 300
+
+# Admin login admission control
+LOGIN_ATTEMPT_WINDOW_SECONDS = 300
+MAX_LOGIN_ATTEMPTS_PER_CLIENT = MAX_LOGIN_ATTEMPTS * 4
+BCRYPT_MAX_WORKERS = 2
+BCRYPT_MAX_QUEUE = 8
+BCRYPT_VERIFY_TIMEOUT_SECONDS = 10
+
+# Admin store background writer
+ADMIN_WRITE_FLUSH_SECONDS = 1.0
+ADMIN_WRITE_MAX_BATCH = 100
+
+# Admin dashboard KPIs
+KPI_CACHE_TTL_SECONDS = 60
+KPI_LOOKBACK_DAYS = 30
+KPI_FULL_REBUILD_HOURS = 24
+
+# Claims analytics rollups (daily/monthly per claim type)
+ROLLUP_CACHE_TTL_SECONDS = 300
+ROLLUP_LOOKBACK_DAYS = 30
+ROLLUP_MAX_POINTS = 400
+
+# Batch fraud scan
+FRAUD_SCAN_CHUNK_ROWS = 50000
+FRAUD_SCAN_MAX_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+
+# Fraud model serving
+FRAUD_MODEL_DIR = os.path.join(LOCAL_DATA_DIR, "models", "fraud")
+FRAUD_BATCH_MAX_SIZE = 64
+FRAUD_BATCH_MAX_WAIT_MS = 5
+FRAUD_SCORE_TIMEOUT_SECONDS = 5
+# Serving processes check the CURRENT pointer this often for a new version
+FRAUD_MODEL_RELOAD_SECONDS = 10
+
+# Fraud model retraining (streamed, chunked, bounded memory)
+FRAUD_TRAINING_CHUNK_ROWS = 100000
+FRAUD_TRAINING_MAX_WORKERS = FRAUD_SCAN_MAX_WORKERS
+FRAUD_TRAINING_EPOCHS = 1
+FRAUD_TRAINING_BATCH_ROWS = 2048
+FRAUD_TRAINING_LEARNING_RATE = 0.05
+FRAUD_TRAINING_L2 = 1e-4
+FRAUD_TRAINING_HOLDOUT_ROWS = 200000
+# New versions below this holdout AUC are saved but not served
+FRAUD_TRAINING_MIN_AUC = 0.6
+
+# Claim history paging
+CLAIMS_PAGE_SIZE = 10
+CLAIMS_PREFETCH_WORKERS = 4
+
+# Dashboard data loads: a page's independent queries run concurrently, each
+# with its own timeout; a query that misses it falls back to its last value
+DASHBOARD_LOAD_WORKERS = 8
+DASHBOARD_QUERY_TIMEOUT_SECONDS = 2.0
+DASHBOARD_QUERY_TIMEOUTS = {
+    # First KPI and rollup loads scan the warehouse; later ones refresh behind readers
+    "kpis": 5.0,
+    "trend": 5.0,
+}
+DASHBOARD_STALE_MAX_ENTRIES = 10000
+
+# Claim processing pipeline
+PIPELINE_STAGE_CONCURRENCY = {
+    "policy_validation": 2,
+    # Workers mostly wait on the fraud scorer, which batches their requests
+    "fraud_detection": 8,
+    "adjudication": 1,
+    "payment_processing": 1,
+}
+PIPELINE_MAX_ATTEMPTS = 3
+PIPELINE_LEASE_SECONDS = 120
+PIPELINE_POLL_SECONDS = 1.0
+AUTO_APPROVE_LIMIT_USD = 5000
+PIPELINE_STATUS_POLL_SECONDS = 3
+
+# Coverage ledger: running balance per policy and benefit year
+COVERAGE_RECONCILE_SECONDS = 3600
+COVERAGE_RECONCILE_BATCH_ROWS = 50000
+
+# Admin bulk claim import (CSV/Parquet, streamed in chunks)
+CLAIM_IMPORT_CHUNK_ROWS = 20000
+CLAIM_IMPORT_DIR = os.path.join(LOCAL_DATA_DIR, "imports")
+# Policy numbers per warehouse IN (...) lookup
+POLICY_LOOKUP_BATCH = 500
+
+# Supporting document storage
+DOCUMENT_STORE_DIR = os.path.join(LOCAL_DATA_DIR, "documents")
+MAX_CLAIM_UPLOAD_BYTES = 50 * 1024 * 1024
+MAX_SESSION_UPLOAD_BYTES = 200 * 1024 * 1024
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+DOCUMENT_ANALYSIS_MAX_WORKERS = max(1, min(2, (os.cpu_count() or 2) - 1))
+
+# Adjudication queue
+ADJUDICATION_LOCK_SECONDS = 15 * 60
+ADJUDICATION_WINDOW_ROWS = 50
+# Priority = amount weight * log10(amount) + fraud weight * score + age weight * days waiting
+ADJUDICATION_PRIORITY_WEIGHTS = {
+    "amount": 1.0,
+    "fraud": 4.0,
+    "age_per_day": 0.5,
+}
+
+# Metrics (Prometheus endpoint is off unless IRMC_METRICS_PORT is set)
+METRICS_PORT = int(os.environ["IRMC_METRICS_PORT"]) if os.environ.get("IRMC_METRICS_PORT") else None
+METRICS_HOST = "127.0.0.1"
+METRICS_SAMPLE_WINDOW = 2048
@@ -0,0 +1,415 @@
+import threading
+import time
+import logging
+from contextlib import closing
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from config import COVERAGE_RECONCILE_SECONDS, COVERAGE_RECONCILE_BATCH_ROWS
+from local_db import connect_sqlite
+
+logger = logging.getLogger(__name__)
+
+# Warehouse claim statuses whose amounts count against a policy's coverage
+PAID_STATUSES = ("Approved", "Paid")
+
+# Cents; amounts are stored as REAL
+EPSILON = 0.005
+
+# Policies per IN (...) lookup, well under SQLite's bound-parameter limit
+LOOKUP_BATCH = 500
+
+UPSERT_LEDGER_SQL = '''
+INSERT INTO coverage_ledger (policy_number, period, employee_id, coverage, updated_at)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (policy_number, period) DO UPDATE SET
+    coverage = CASE WHEN excluded.coverage > 0 THEN excluded.coverage ELSE coverage_ledger.coverage END,
+    employee_id = COALESCE(excluded.employee_id, coverage_ledger.employee_id)
+'''
+
+# What each pipeline claim should contribute, derived from its current status
+EXPECTED_ENTRIES_SQL = '''
+INSERT INTO temp.expected_entries
+SELECT claim_id,
+       json_extract(payload, '$.policy_number'),
+       substr(COALESCE(json_extract(payload, '$.incident_date'), date(created_at, 'unixepoch')), 1, 4),
+       employee_id,
+       COALESCE(CAST(json_extract(payload, '$.coverage') AS REAL), 0),
+       COALESCE(CAST(json_extract(payload, '$.amount') AS REAL), 0),
+       CASE WHEN status = 'done' THEN 'used'
+            WHEN status IN ('rejected', 'failed') THEN 'released'
+            ELSE 'reserved' END
+FROM pipeline_claims
+WHERE json_extract(payload, '$.policy_number') IS NOT NULL
+'''
+
+ENTRY_DRIFT = f'''
+c.claim_id IS NULL OR c.state != e.state OR ABS(c.amount - e.amount) > {EPSILON}
+OR c.policy_number != e.policy_number OR c.period != e.period
+'''
+
+
+class CoverageExceeded(Exception):
+    """The claim amount is more than the policy's remaining coverage"""
+
+    def __init__(self, amount: float, remaining: float):
+        super().__init__(f"Amount ${amount:,.2f} exceeds remaining coverage ${remaining:,.2f}")
+        self.amount = amount
+        self.remaining = remaining
+
+
+def coverage_period(day: Any = None) -> str:
+    """Benefit period a claim counts against: the calendar year of ``day``"""
+    if day is None:
+        return str(date.today().year)
+    return str(day)[:4]
+
+
+class CoverageLedger:
+    """Running coverage balance per policy and benefit period.
+
+    Each ledger row holds the policy's coverage, what the warehouse already
+    shows as paid this period, what pipeline claims have used, and what
+    in-flight claims have reserved, so the remaining balance is one
+    primary-key read. A claim moves its amount reserved -> used when paid,
+    or reserved -> released when rejected or failed; ``coverage_entries``
+    records each claim's state so every transition applies exactly once.
+
+    The tables live in the claim pipeline's SQLite file and the write
+    methods take the pipeline's connection, so a ledger change commits in
+    the same transaction as the claim state change that caused it.
+    ``reconcile`` recomputes every balance from the raw claims in bulk and
+    repairs whatever drifted.
+    """
+
+    def __init__(self, db_path: str, reconcile_interval: float = COVERAGE_RECONCILE_SECONDS,
+                 batch_rows: int = COVERAGE_RECONCILE_BATCH_ROWS):
+        self.db_path = db_path
+        self.reconcile_interval = reconcile_interval
+        self.batch_rows = batch_rows
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {"reserved": 0, "exceeded": 0, "settled": 0, "released": 0, "reconciles": 0,
+                       "entries_repaired": 0, "balances_repaired": 0, "warehouse_repaired": 0}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._conn = connect_sqlite(db_path)
+        with self._conn:
+            self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS coverage_ledger (
+                policy_number TEXT NOT NULL,
+                period TEXT NOT NULL,
+                employee_id TEXT,
+                coverage REAL NOT NULL DEFAULT 0,
+                warehouse_used REAL NOT NULL DEFAULT 0,
+                used REAL NOT NULL DEFAULT 0,
+                reserved REAL NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (policy_number, period)
+            ) WITHOUT ROWID
+            ''')
+            self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS coverage_entries (
+                claim_id TEXT PRIMARY KEY,
+                policy_number TEXT NOT NULL,
+                period TEXT NOT NULL,
+                amount REAL NOT NULL,
+                state TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            ''')
+            self._conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_coverage_entries_policy
+            ON coverage_entries (policy_number, period)
+            ''')
+
+    def _count(self, name: str, amount: int = 1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    # ------------------------------------------------------------------
+    # Transitions (run inside the caller's transaction on ``conn``)
+    # ------------------------------------------------------------------
+    def reserve(self, conn, claim_id: str, policy_number: str, employee_id: str,
+                amount: float, coverage: float, period: str) -> float:
+        """Hold ``amount`` against the policy; returns the remaining balance.
+
+        Raises ``CoverageExceeded`` (rolling back the caller's transaction)
+        when the policy has a known coverage and not enough of it is left.
+        """
+        accepted, exceeded = self.reserve_many(
+            conn, [(claim_id, policy_number, employee_id, amount, coverage, period)]
+        )
+        if exceeded:
+            raise CoverageExceeded(amount, exceeded[0][1])
+        return accepted[0][1]
+
+    def reserve_many(self, conn, entries: Sequence[Tuple[str, str, str, float, float, str]]
+                     ) -> Tuple[List[Tuple[int, float]], List[Tuple[int, float]]]:
+        """Reserve a batch of ``(claim_id, policy_number, employee_id, amount,
+        coverage, period)`` entries in input order.
+
+        Returns ``(accepted, exceeded)`` as lists of (entry index, remaining
+        balance); an entry that does not fit is skipped and later entries for
+        the same policy are still tried. The caller must hold the write lock
+        (``BEGIN IMMEDIATE``), so no other reservation can interleave.
+        """
+        now = time.time()
+        # Last coverage seen per policy wins, as it would for one-by-one reservations
+        policies = {(e[1], e[5]): (e[1], e[5], e[2] or None, e[4], now) for e in entries}
+        conn.executemany(UPSERT_LEDGER_SQL, list(policies.values()))
+        balances: Dict[Tuple[str, str], List[float]] = {}
+        numbers = sorted({policy for policy, _ in policies})
+        for start in range(0, len(numbers), LOOKUP_BATCH):
+            batch = numbers[start:start + LOOKUP_BATCH]
+            for policy, period, limit, committed in conn.execute(f'''
+            SELECT policy_number, period, coverage, warehouse_used + used + reserved FROM coverage_ledger
+            WHERE policy_number IN ({", ".join("?" * len(batch))})
+            ''', batch):
+                balances[(policy, period)] = [limit, committed]
+
+        accepted, exceeded, records = [], [], []
+        reserved: Dict[Tuple[str, str], float] = {}
+        for i, (claim_id, policy, _, amount, _, period) in enumerate(entries):
+            balance = balances[(policy, period)]
+            remaining = balance[0] - balance[1]
+            if balance[0] and amount > remaining + EPSILON:
+                exceeded.append((i, max(0.0, remaining)))
+                continue
+            balance[1] += amount
+            reserved[(policy, period)] = reserved.get((policy, period), 0.0) + amount
+            accepted.append((i, remaining - amount))
+            records.append((claim_id, policy, period, amount, now))
+        conn.executemany("INSERT INTO coverage_entries VALUES (?, ?, ?, ?, 'reserved', ?)", records)
+        conn.executemany('''
+        UPDATE coverage_ledger SET reserved = reserved + ?, updated_at = ?
+        WHERE policy_number = ? AND period = ?
+        ''', [(amount, now, policy, period) for (policy, period), amount in reserved.items()])
+        self._count("reserved", len(accepted))
+        self._count("exceeded", len(exceeded))
+        return accepted, exceeded
+
+    def settle(self, conn, claim_id: str) -> bool:
+        """The claim was paid: its reservation becomes used coverage"""
+        return self._transition(conn, claim_id, "used")
+
+    def release(self, conn, claim_id: str) -> bool:
+        """The claim will not be paid: its reservation is returned"""
+        return self._transition(conn, claim_id, "released")
+
+    def _transition(self, conn, claim_id: str, state: str) -> bool:
+        row = conn.execute(
+            "SELECT policy_number, period, amount FROM coverage_entries WHERE claim_id = ? AND state = 'reserved'",
+            (claim_id,)
+        ).fetchone()
+        if row is None:
+            return False
+        policy_number, period, amount = row
+        now = time.time()
+        conn.execute("UPDATE coverage_entries SET state = ?, updated_at = ? WHERE claim_id = ?",
+                     (state, now, claim_id))
+        conn.execute('''
+        UPDATE coverage_ledger SET reserved = reserved - ?, used = used + ?, updated_at = ?
+        WHERE policy_number = ? AND period = ?
+        ''', (amount, amount if state == "used" else 0.0, now, policy_number, period))
+        self._count("settled" if state == "used" else "released")
+        return True
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def balance(self, policy_number: str, period: Optional[str] = None) -> Optional[Dict[str, float]]:
+        """Coverage, usage and remaining balance for one policy (one key lookup)"""
+        with self._lock:
+            row = self._conn.execute('''
+            SELECT coverage, warehouse_used, used, reserved FROM coverage_ledger
+            WHERE policy_number = ? AND period = ?
+            ''', (policy_number, period or coverage_period())).fetchone()
+        if row is None:
+            return None
+        coverage, warehouse_used, used, reserved = row
+        return {"coverage": coverage, "warehouse_used": warehouse_used, "used": used, "reserved": reserved,
+                "remaining": max(0.0, coverage - warehouse_used - used - reserved)}
+
+    def remaining(self, policy_number: str, coverage: float, period: Optional[str] = None) -> float:
+        """Remaining balance, or ``coverage`` for a policy the ledger has not seen"""
+        balance = self.balance(policy_number, period)
+        if balance is None:
+            return coverage
+        if not balance["coverage"]:
+            return max(0.0, coverage - balance["warehouse_used"] - balance["used"] - balance["reserved"])
+        return balance["remaining"]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return dict(self._stats)
+
+    # ------------------------------------------------------------------
+    # Reconciliation
+    # ------------------------------------------------------------------
+    def reconcile(self, db=None) -> Dict[str, Any]:
+        """Recompute balances from the raw claims and repair drift.
+
+        Claim entries and used/reserved totals are rebuilt from
+        ``pipeline_claims``. With ``db``, the current period's paid amounts
+        and coverage are re-aggregated from the warehouse, streamed in
+        batches. Returns the number of rows repaired at each level.
+        """
+        started = time.perf_counter()
+        period = coverage_period()
+        result = {"entries_repaired": 0, "balances_repaired": 0, "warehouse_repaired": 0,
+                  "warehouse_policies": 0, "warehouse_error": None}
+        # A private connection, so balance reads are not blocked while the warehouse streams
+        with closing(connect_sqlite(self.db_path)) as conn:
+            conn.execute('''
+            CREATE TEMP TABLE IF NOT EXISTS warehouse_usage (
+                policy_number TEXT PRIMARY KEY,
+                employee_id TEXT,
+                coverage REAL NOT NULL,
+                paid REAL NOT NULL
+            )
+            ''')
+            conn.execute('''
+            CREATE TEMP TABLE IF NOT EXISTS expected_entries (
+                claim_id TEXT PRIMARY KEY,
+                policy_number TEXT NOT NULL,
+                period TEXT NOT NULL,
+                employee_id TEXT,
+                coverage REAL NOT NULL,
+                amount REAL NOT NULL,
+                state TEXT NOT NULL
+            )
+            ''')
+            conn.commit()
+            if db is not None:
+                try:
+                    result["warehouse_policies"] = self._load_warehouse_usage(conn, db, period)
+                except Exception as e:
+                    conn.rollback()
+                    result["warehouse_error"] = str(e)
+                    logger.warning(f"⚠️ Coverage reconciliation skipped the warehouse: {e}")
+
+            # Pipeline writers wait while the local tables are repaired (no warehouse I/O inside)
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                warehouse = db is not None and result["warehouse_error"] is None
+                result.update(self._repair(conn, period, warehouse=warehouse))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        result["seconds"] = time.perf_counter() - started
+        self._count("reconciles")
+        for key in ("entries_repaired", "balances_repaired", "warehouse_repaired"):
+            self._count(key, result[key])
+        drift = result["entries_repaired"] + result["balances_repaired"] + result["warehouse_repaired"]
+        if drift:
+            logger.warning(f"⚠️ Coverage ledger drift repaired: {result}")
+        else:
+            logger.info(f"✅ Coverage ledger reconciled in {result['seconds']:.2f}s, no drift")
+        return result
+
+    def _load_warehouse_usage(self, conn, db, period: str) -> int:
+        statuses = ", ".join("?" * len(PAID_STATUSES))
+        query = f"""
+        SELECT PolicyNumber, MAX(EmployeeID), MAX(CoverageAmountUSD),
+               COALESCE(SUM(CASE WHEN ClaimStatus IN ({statuses}) THEN LastClaimAmountUSD ELSE 0 END), 0)
+        FROM {db.database}.{db.table}
+        WHERE ClaimDate >= ? AND ClaimDate < ? AND PolicyNumber IS NOT NULL
+        GROUP BY PolicyNumber
+        """
+        params = PAID_STATUSES + (f"{period}-01-01", f"{int(period) + 1}-01-01")
+        loaded = 0
+        conn.execute("DELETE FROM temp.warehouse_usage")
+        with db.connection() as remote, closing(remote.cursor()) as cursor:
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(self.batch_rows)
+                if not rows:
+                    break
+                conn.executemany("INSERT OR REPLACE INTO temp.warehouse_usage VALUES (?, ?, ?, ?)",
+                                 [(str(r[0]), r[1], float(r[2] or 0), float(r[3] or 0)) for r in rows])
+                loaded += len(rows)
+        conn.commit()
+        return loaded
+
+    def _repair(self, conn, period: str, warehouse: bool) -> Dict[str, int]:
+        now = time.time()
+        conn.execute("DELETE FROM temp.expected_entries")
+        conn.execute(EXPECTED_ENTRIES_SQL)
+
+        # Claim entries: missing or wrong ones rewritten, orphans dropped
+        entries = conn.execute(f'''
+        INSERT OR REPLACE INTO coverage_entries
+        SELECT e.claim_id, e.policy_number, e.period, e.amount, e.state, ?
+        FROM temp.expected_entries e LEFT JOIN coverage_entries c ON c.claim_id = e.claim_id
+        WHERE {ENTRY_DRIFT}
+        ''', (now,)).rowcount
+        entries += conn.execute('''
+        DELETE FROM coverage_entries WHERE claim_id NOT IN (SELECT claim_id FROM temp.expected_entries)
+        ''').rowcount
+
+        # Every policy with a claim has a ledger row
+        conn.execute('''
+        INSERT OR IGNORE INTO coverage_ledger (policy_number, period, employee_id, coverage, updated_at)
+        SELECT policy_number, period, MAX(employee_id), MAX(coverage), ?
+        FROM temp.expected_entries GROUP BY policy_number, period
+        ''', (now,))
+
+        warehouse_repaired = 0
+        if warehouse:
+            # Policies seen for the first time start from the warehouse figures
+            conn.execute('''
+            INSERT OR IGNORE INTO coverage_ledger
+                (policy_number, period, employee_id, coverage, warehouse_used, updated_at)
+            SELECT policy_number, ?, employee_id, coverage, paid, ? FROM temp.warehouse_usage
+            ''', (period, now))
+            warehouse_repaired = conn.execute(f'''
+            UPDATE coverage_ledger
+            SET warehouse_used = COALESCE(w.paid, 0),
+                coverage = CASE WHEN w.coverage > 0 THEN w.coverage ELSE coverage_ledger.coverage END,
+                updated_at = ?
+            FROM coverage_ledger l LEFT JOIN temp.warehouse_usage w ON w.policy_number = l.policy_number
+            WHERE coverage_ledger.policy_number = l.policy_number AND coverage_ledger.period = l.period
+              AND l.period = ?
+              AND (ABS(l.warehouse_used - COALESCE(w.paid, 0)) > {EPSILON}
+                   OR (w.coverage > 0 AND ABS(l.coverage - w.coverage) > {EPSILON}))
+            ''', (now, period)).rowcount
+
+        # Running totals recomputed from the entries
+        balances = conn.execute(f'''
+        UPDATE coverage_ledger
+        SET used = s.used, reserved = s.reserved, updated_at = ?
+        FROM (
+            SELECT l.policy_number, l.period,
+                   COALESCE(SUM(CASE WHEN c.state = 'used' THEN c.amount END), 0) AS used,
+                   COALESCE(SUM(CASE WHEN c.state = 'reserved' THEN c.amount END), 0) AS reserved
+            FROM coverage_ledger l
+            LEFT JOIN coverage_entries c ON c.policy_number = l.policy_number AND c.period = l.period
+            GROUP BY l.policy_number, l.period
+        ) s
+        WHERE coverage_ledger.policy_number = s.policy_number AND coverage_ledger.period = s.period
+          AND (ABS(coverage_ledger.used - s.used) > {EPSILON} OR ABS(coverage_ledger.reserved - s.reserved) > {EPSILON})
+        ''', (now,)).rowcount
+        return {"entries_repaired": entries, "balances_repaired": balances, "warehouse_repaired": warehouse_repaired}
+
+    def start(self, get_db: Optional[Callable[[], Any]] = None):
+        """Reconcile now and then every ``reconcile_interval`` seconds on a daemon thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._reconcile_loop, args=(get_db,),
+                                            name="coverage-reconcile", daemon=True)
+            self._thread.start()
+
+    def _reconcile_loop(self, get_db: Optional[Callable[[], Any]]):
+        while True:
+            try:
+                self.reconcile(get_db() if get_db is not None else None)
+            except Exception as e:
+                logger.error(f"❌ Coverage ledger reconciliation failed: {e}")
+            if self._stop.wait(self.reconcile_interval):
+                return
+
+    def close(self):
+        self._stop.set()
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,187 @@
+import asyncio
+import functools
+import threading
+import time
+import logging
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from config import (
+    CLAIMS_PAGE_SIZE,
+    DASHBOARD_LOAD_WORKERS,
+    DASHBOARD_QUERY_TIMEOUT_SECONDS,
+    DASHBOARD_QUERY_TIMEOUTS,
+    DASHBOARD_STALE_MAX_ENTRIES,
+)
+from adjudication_queue import get_adjudication_queue
+from dashboard_metrics import get_claim_rollups, get_kpi_service
+from database import get_policyholder_db
+from instrumentation import metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DashboardQuery:
+    """One independent read for a page: ``fn(*args)`` on a worker thread"""
+    fn: Callable[..., Any]
+    args: Tuple[Any, ...] = ()
+    key: Tuple[Any, ...] = ()
+    timeout: Optional[float] = None
+    default: Any = None
+
+
+@dataclass
+class Loaded:
+    """Result of one query: ``source`` is 'fresh', 'stale' (last good value
+    after a timeout or error) or 'default' (nothing to fall back on)"""
+    value: Any
+    source: str
+    seconds: float
+    error: Optional[str] = field(default=None)
+
+    @property
+    def fresh(self) -> bool:
+        return self.source == "fresh"
+
+
+class DashboardData:
+    """Async fan-out of a dashboard page's independent data loads.
+
+    Each query runs on a worker thread (the warehouse connector and SQLite
+    are blocking) behind ``asyncio.wait_for`` with its own timeout, and the
+    page awaits them together, so it waits about as long as its slowest
+    query rather than their sum. A query that times out is cancelled if it
+    has not started; one already running cannot be interrupted through
+    DB-API, so its result is kept for the next render when it arrives.
+    Either way, or on error, the page gets the query's last good value.
+    """
+
+    def __init__(self, db, max_workers: int = DASHBOARD_LOAD_WORKERS,
+                 timeout: float = DASHBOARD_QUERY_TIMEOUT_SECONDS,
+                 timeouts: Optional[Dict[str, float]] = None,
+                 max_stale_entries: int = DASHBOARD_STALE_MAX_ENTRIES):
+        self.db = db
+        self.timeout = timeout
+        self.timeouts = dict(DASHBOARD_QUERY_TIMEOUTS, **(timeouts or {}))
+        self.max_stale_entries = max_stale_entries
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dashboard-load")
+        self._lock = threading.Lock()
+        # (query name, *key) -> last good value
+        self._last_good: "OrderedDict[Tuple[Any, ...], Any]" = OrderedDict()
+        self._stats = {"fresh": 0, "stale": 0, "default": 0, "timeouts": 0, "errors": 0, "late_results": 0}
+
+    # ------------------------------------------------------------------
+    # Fan-out
+    # ------------------------------------------------------------------
+    async def fetch(self, name: str, query: DashboardQuery) -> Loaded:
+        """Run one query with its timeout, falling back to its last good value"""
+        cache_key = (name,) + tuple(query.key)
+        timeout = query.timeout or self.timeouts.get(name, self.timeout)
+        started = time.perf_counter()
+        future = self._executor.submit(query.fn, *query.args)
+        try:
+            value = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            future.add_done_callback(functools.partial(self._late_result, cache_key))
+            outcome, error = "timeouts", f"timed out after {timeout:g}s"
+        except Exception as e:
+            outcome, error = "errors", str(e)
+        else:
+            elapsed = time.perf_counter() - started
+            self._remember(cache_key, value)
+            self._count("fresh")
+            metrics.observe("dashboard_query_seconds", elapsed, query=name)
+            return Loaded(value, "fresh", elapsed)
+
+        elapsed = time.perf_counter() - started
+        logger.warning(f"⚠️ Dashboard query {name} {error}; serving last known value")
+        self._count(outcome)
+        metrics.inc("dashboard_query_fallbacks_total", query=name, reason=outcome)
+        with self._lock:
+            found = cache_key in self._last_good
+            value = self._last_good.get(cache_key, query.default)
+        self._count("stale" if found else "default")
+        return Loaded(value, "stale" if found else "default", elapsed, error)
+
+    async def gather(self, queries: Dict[str, DashboardQuery]) -> Dict[str, Loaded]:
+        results = await asyncio.gather(*(self.fetch(name, q) for name, q in queries.items()))
+        return dict(zip(queries, results))
+
+    def load(self, page: str, queries: Dict[str, DashboardQuery]) -> Dict[str, Loaded]:
+        """Run ``queries`` concurrently from synchronous code (the Streamlit script thread)"""
+        with metrics.timer("dashboard_load_seconds", page=page):
+            return asyncio.run(self.gather(queries))
+
+    # ------------------------------------------------------------------
+    # Pages
+    # ------------------------------------------------------------------
+    def policyholder_page(self, user: Dict[str, Any], claims: bool = True) -> Dict[str, Loaded]:
+        """Fresh profile and, unless the caller already has it, the first claims page"""
+        employee_id = user.get('employee_id', '')
+        queries = {
+            "profile": DashboardQuery(self._profile, (user,), key=(employee_id,), default=user),
+        }
+        if claims:
+            queries["claims"] = DashboardQuery(
+                functools.partial(self.db.get_policyholder_claims_page, employee_id,
+                                  page_size=CLAIMS_PAGE_SIZE),
+                key=(employee_id,),
+            )
+        return self.load("policyholder_dashboard", queries)
+
+    def _profile(self, user: Dict[str, Any]) -> Dict[str, Any]:
+        """``user`` with policy and coverage as currently held in the warehouse"""
+        profile = self.db.authenticate_policyholder(user.get('employee_id', ''))
+        if profile is None:
+            return user
+        return dict(user, policy=profile['policy_number'], coverage=profile['coverage_amount'])
+
+    def admin_page(self) -> Dict[str, Loaded]:
+        """KPIs, newly held claims pulled into the queue, and fresh trend rollups"""
+        return self.load("admin_dashboard", {
+            "kpis": DashboardQuery(get_kpi_service().get),
+            "queue": DashboardQuery(get_adjudication_queue().sync, default=0),
+            "trend": DashboardQuery(get_claim_rollups().ensure_fresh),
+        })
+
+    # ------------------------------------------------------------------
+    # Last good values
+    # ------------------------------------------------------------------
+    def _remember(self, cache_key: Tuple[Any, ...], value: Any):
+        with self._lock:
+            self._last_good[cache_key] = value
+            self._last_good.move_to_end(cache_key)
+            while len(self._last_good) > self.max_stale_entries:
+                self._last_good.popitem(last=False)
+
+    def _late_result(self, cache_key: Tuple[Any, ...], future: Future):
+        if future.cancelled() or future.exception() is not None:
+            return
+        self._remember(cache_key, future.result())
+        self._count("late_results")
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats, last_good_entries=len(self._last_good))
+
+
+@functools.lru_cache(maxsize=None)
+def get_dashboard_data() -> DashboardData:
+    """Process-wide instance, created on first use"""
+    data = DashboardData(get_policyholder_db())
+    metrics.register_collector("dashboard_data", data.stats)
+    return data
+
+
+def __getattr__(name):
+    # Keeps ``from dashboard_data import dashboard_data`` working without import-time setup
+    if name == "dashboard_data":
+        return get_dashboard_data()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
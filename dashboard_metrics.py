@@ -0,0 +1,464 @@
+import functools
+import os
+import threading
+import time
+import logging
+from contextlib import closing
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from config import (
+    LOCAL_DATA_DIR,
+    KPI_CACHE_TTL_SECONDS,
+    KPI_LOOKBACK_DAYS,
+    KPI_FULL_REBUILD_HOURS,
+    ROLLUP_CACHE_TTL_SECONDS,
+    ROLLUP_LOOKBACK_DAYS,
+    ROLLUP_MAX_POINTS,
+)
+from database import get_policyholder_db
+from local_db import connect_sqlite
+
+logger = logging.getLogger(__name__)
+
+PENDING_STATUSES = ("Pending", "Under Review")
+FLAGGED_RISKS = ("HIGH", "MEDIUM")
+HIGH_RISKS = ("HIGH",)
+APPROVED_STATUSES = ("Approved", "Paid")
+
+
+def _in_list(values) -> str:
+    return ", ".join(f"'{v}'" for v in values)
+
+
+# One pass over the rows changed since the watermark, bucketed per claim day.
+# insurance_data holds one row per claim, so claim counts add up exactly
+# across buckets; distinct policies do not, see POLICY_KPI_SQL.
+DAILY_KPI_SQL = f"""
+SELECT
+    CAST(ClaimDate AS DATE) AS claim_day,
+    SUM(CASE WHEN ClaimStatus IN ({_in_list(PENDING_STATUSES)}) THEN 1 ELSE 0 END) AS pending_claims,
+    SUM(CASE WHEN UPPER(FraudRisk) IN ({_in_list(FLAGGED_RISKS)}) THEN 1 ELSE 0 END) AS fraud_flags,
+    SUM(CASE WHEN UPPER(FraudRisk) IN ({_in_list(HIGH_RISKS)}) THEN 1 ELSE 0 END) AS high_risk_flags
+FROM {{source}}
+WHERE ClaimDate >= ?
+GROUP BY CAST(ClaimDate AS DATE)
+"""
+
+# Policies with claims since the watermark and whether they are active; kept
+# per policy so a policy with claims on many days is counted once
+POLICY_KPI_SQL = """
+SELECT
+    PolicyNumber,
+    MAX(CASE WHEN PolicyStatus = 'Active' THEN 1 ELSE 0 END) AS active
+FROM {source}
+WHERE ClaimDate >= ? AND PolicyNumber IS NOT NULL
+GROUP BY PolicyNumber
+"""
+
+
+# Same watermark pass as DAILY_KPI_SQL, additionally split by claim type
+DAILY_ROLLUP_SQL = f"""
+SELECT
+    CAST(ClaimDate AS DATE) AS claim_day,
+    COALESCE(ClaimType, 'Other') AS claim_type,
+    COUNT(*) AS claims,
+    SUM(CASE WHEN ClaimStatus IN ({_in_list(APPROVED_STATUSES)}) THEN 1 ELSE 0 END) AS approved_claims,
+    COALESCE(SUM(LastClaimAmountUSD), 0) AS claim_amount,
+    SUM(CASE WHEN UPPER(FraudRisk) IN ({_in_list(FLAGGED_RISKS)}) THEN 1 ELSE 0 END) AS fraud_flags
+FROM {{source}}
+WHERE ClaimDate >= ?
+GROUP BY CAST(ClaimDate AS DATE), COALESCE(ClaimType, 'Other')
+"""
+
+ROLLUP_METRICS = ("claims", "approved_claims", "claim_amount", "fraud_flags")
+
+# Chart grains, finest first: (name, rollup table, bucket expression, days per bucket)
+ROLLUP_GRAINS = (
+    ("day", "rollup_daily", "claim_day", 1),
+    ("week", "rollup_daily", "date(claim_day, 'weekday 0', '-6 days')", 7),
+    ("month", "rollup_monthly", "month || '-01'", 31),
+    ("year", "rollup_monthly", "substr(month, 1, 4) || '-01-01'", 366),
+)
+
+
+def _get_state(conn, table: str, key: str) -> Optional[str]:
+    row = conn.execute(f"SELECT value FROM {table} WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def _set_state(conn, table: str, key: str, value: str):
+    conn.execute(f"INSERT OR REPLACE INTO {table} (key, value) VALUES (?, ?)", (key, value))
+
+
+def _day(value) -> str:
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)[:10]
+
+
+class KpiService:
+    """Admin dashboard KPIs served from a locally maintained summary table.
+
+    The warehouse is only asked for claim days at or after the watermark
+    (minus a lookback window, since recent claims still change status), and
+    the results are upserted into a per-day SQLite summary of claim counts
+    and a per-policy table for the active-policy count. Totals are derived
+    from those and held in a TTL cache shared by every admin
+    session, so opening the dashboard is a dictionary read.
+    """
+
+    def __init__(self, db, summary_path: Optional[str] = None,
+                 ttl_seconds: float = KPI_CACHE_TTL_SECONDS,
+                 lookback_days: int = KPI_LOOKBACK_DAYS,
+                 full_rebuild_hours: float = KPI_FULL_REBUILD_HOURS):
+        self.db = db
+        self.summary_path = summary_path or os.path.join(LOCAL_DATA_DIR, "dashboard_summary.db")
+        self.ttl_seconds = ttl_seconds
+        self.lookback_days = lookback_days
+        self.full_rebuild_seconds = full_rebuild_hours * 3600
+        self._conn = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._cached: Optional[Dict[str, Any]] = None
+        self._cached_at = 0.0
+
+    def _summary(self):
+        if self._conn is None:
+            self._conn = connect_sqlite(self.summary_path)
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(kpi_daily)")]
+            if "active_policies" in columns:
+                # Summaries from before kpi_policies summed per-day policy
+                # counts; drop them so the next refresh rebuilds everything
+                self._conn.execute("DROP TABLE kpi_daily")
+                self._conn.execute("DROP TABLE IF EXISTS kpi_state")
+            self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS kpi_daily (
+                claim_day TEXT PRIMARY KEY,
+                pending_claims INTEGER NOT NULL,
+                fraud_flags INTEGER NOT NULL,
+                high_risk_flags INTEGER NOT NULL
+            )
+            ''')
+            self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS kpi_policies (
+                policy_number TEXT PRIMARY KEY,
+                active INTEGER NOT NULL
+            ) WITHOUT ROWID
+            ''')
+            self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS kpi_state (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+            ''')
+            self._conn.commit()
+        return self._conn
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def get(self) -> Optional[Dict[str, Any]]:
+        """Current KPIs; refreshes at most once per TTL across all sessions"""
+        cached = self._cached
+        if cached is not None and time.monotonic() - self._cached_at < self.ttl_seconds:
+            return cached
+        # One session refreshes; the others keep serving the previous value
+        if not self._refresh_lock.acquire(blocking=cached is None):
+            return cached
+        try:
+            if self._cached is not None and time.monotonic() - self._cached_at < self.ttl_seconds:
+                return self._cached
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"❌ KPI refresh failed: {e}")
+            try:
+                self._cached = self._totals()
+                self._cached_at = time.monotonic()
+            except Exception as e:
+                logger.error(f"❌ KPI summary read failed: {e}")
+            return self._cached
+        finally:
+            self._refresh_lock.release()
+
+    def invalidate(self):
+        self._cached_at = 0.0
+
+    def _totals(self) -> Dict[str, Any]:
+        with self._lock:
+            conn = self._summary()
+            row = conn.execute('''
+            SELECT
+                (SELECT COUNT(*) FROM kpi_policies WHERE active = 1),
+                COALESCE(SUM(pending_claims), 0),
+                COALESCE(SUM(fraud_flags), 0),
+                COALESCE(SUM(high_risk_flags), 0),
+                COALESCE(SUM(pending_claims * julianday(claim_day)), 0),
+                COALESCE(SUM(CASE WHEN claim_day >= ? THEN pending_claims ELSE 0 END), 0)
+            FROM kpi_daily
+            ''', ((date.today() - timedelta(days=7)).isoformat(),)).fetchone()
+            watermark = _get_state(conn, "kpi_state", "watermark")
+            today = conn.execute("SELECT julianday(?)", (date.today().isoformat(),)).fetchone()[0]
+        active, pending, flags, high, pending_day_sum, pending_recent = row
+        return {
+            "active_policies": int(active),
+            "pending_claims": int(pending),
+            "pending_last_7_days": int(pending_recent),
+            "fraud_flags": int(flags),
+            "high_risk_flags": int(high),
+            "avg_pending_age_days": (today - pending_day_sum / pending) if pending else 0.0,
+            "watermark": watermark,
+            "refreshed_at": datetime.now(),
+        }
+
+    # ------------------------------------------------------------------
+    # Incremental refresh
+    # ------------------------------------------------------------------
+    def refresh(self) -> int:
+        """Re-aggregate claim days from the watermark; returns days updated"""
+        with self._lock:
+            conn = self._summary()
+            watermark = _get_state(conn, "kpi_state", "watermark")
+            rebuilt_at = float(_get_state(conn, "kpi_state", "full_rebuild_at") or 0)
+        # Periodic full rebuild catches status changes older than the lookback
+        full = watermark is None or time.time() - rebuilt_at > self.full_rebuild_seconds
+        if full:
+            since = "1900-01-01"
+        else:
+            since = (date.fromisoformat(watermark) - timedelta(days=self.lookback_days)).isoformat()
+
+        source = f"{self.db.database}.{self.db.table}"
+        with self.db.connection() as remote, closing(remote.cursor()) as cursor:
+            cursor.execute(DAILY_KPI_SQL.format(source=source), (since,))
+            rows = [(_day(r[0]),) + tuple(int(v or 0) for v in r[1:]) for r in cursor.fetchall()]
+            cursor.execute(POLICY_KPI_SQL.format(source=source), (since,))
+            policies = [(str(r[0]), int(r[1] or 0)) for r in cursor.fetchall()]
+
+        with self._lock:
+            conn = self._summary()
+            with conn:
+                if full:
+                    conn.execute("DELETE FROM kpi_daily")
+                    conn.execute("DELETE FROM kpi_policies")
+                else:
+                    # Days inside the window that no longer have rows drop out
+                    conn.execute("DELETE FROM kpi_daily WHERE claim_day >= ?", (since,))
+                conn.executemany(
+                    "INSERT OR REPLACE INTO kpi_daily VALUES (?, ?, ?, ?)", rows
+                )
+                # Policies only seen before the window keep their last status
+                conn.executemany("INSERT OR REPLACE INTO kpi_policies VALUES (?, ?)", policies)
+                if rows:
+                    newest = max(r[0] for r in rows)
+                    if watermark is None or full or newest > watermark:
+                        _set_state(conn, "kpi_state", "watermark", newest)
+                if full:
+                    _set_state(conn, "kpi_state", "full_rebuild_at", str(time.time()))
+        logger.info(f"✅ KPI summary refreshed from {since}: {len(rows)} days")
+        return len(rows)
+
+
+class ClaimRollups:
+    """Per-claim-type daily and monthly series for the analytics charts.
+
+    ``rollup_daily`` holds claims, approved claims, claimed amount and fraud
+    flags per (claim day, claim type); ``rollup_monthly`` is derived from it.
+    Both are maintained like ``KpiService``'s summary: the warehouse is only
+    asked for claim days from the ClaimDate watermark minus a lookback
+    window, with a periodic full rebuild. ``series`` picks the coarsest
+    grain that keeps a range under ``max_points`` buckets and reads it with
+    a primary-key range scan, so a chart costs the same for one year of
+    history as for twenty.
+    """
+
+    def __init__(self, db, summary_path: Optional[str] = None,
+                 ttl_seconds: float = ROLLUP_CACHE_TTL_SECONDS,
+                 lookback_days: int = ROLLUP_LOOKBACK_DAYS,
+                 full_rebuild_hours: float = KPI_FULL_REBUILD_HOURS,
+                 max_points: int = ROLLUP_MAX_POINTS):
+        self.db = db
+        self.summary_path = summary_path or os.path.join(LOCAL_DATA_DIR, "dashboard_summary.db")
+        self.ttl_seconds = ttl_seconds
+        self.lookback_days = lookback_days
+        self.full_rebuild_seconds = full_rebuild_hours * 3600
+        self.max_points = max_points
+        self._conn = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._refreshed_at: Optional[float] = None
+
+    def _summary(self):
+        if self._conn is None:
+            self._conn = connect_sqlite(self.summary_path)
+            for table, key in (("rollup_daily", "claim_day"), ("rollup_monthly", "month")):
+                self._conn.execute(f'''
+                CREATE TABLE IF NOT EXISTS {table} (
+                    {key} TEXT NOT NULL,
+                    claim_type TEXT NOT NULL,
+                    claims INTEGER NOT NULL,
+                    approved_claims INTEGER NOT NULL,
+                    claim_amount REAL NOT NULL,
+                    fraud_flags INTEGER NOT NULL,
+                    PRIMARY KEY ({key}, claim_type)
+                ) WITHOUT ROWID
+                ''')
+            self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS rollup_state (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+            ''')
+            self._conn.commit()
+        return self._conn
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def ensure_fresh(self):
+        """Refresh at most once per TTL; other sessions keep reading the current rollups"""
+        if self._refreshed_at is not None and time.monotonic() - self._refreshed_at < self.ttl_seconds:
+            return
+        # Only the very first load waits; later refreshes happen behind the readers
+        if not self._refresh_lock.acquire(blocking=self._refreshed_at is None):
+            return
+        try:
+            if self._refreshed_at is not None and time.monotonic() - self._refreshed_at < self.ttl_seconds:
+                return
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"❌ Claim rollup refresh failed: {e}")
+            self._refreshed_at = time.monotonic()
+        finally:
+            self._refresh_lock.release()
+
+    def grain_for(self, start: date, end: date) -> str:
+        """Finest grain that keeps ``start``..``end`` within ``max_points`` buckets"""
+        days = (end - start).days + 1
+        for name, _, _, span in ROLLUP_GRAINS:
+            if days / span <= self.max_points:
+                return name
+        return ROLLUP_GRAINS[-1][0]
+
+    def series(self, metric: str, start: date, end: date,
+               claim_types: Optional[Sequence[str]] = None, grain: Optional[str] = None) -> pd.DataFrame:
+        """``metric`` per bucket between ``start`` and ``end``, one column per claim type"""
+        if metric not in ROLLUP_METRICS:
+            raise ValueError(f"Unknown rollup metric: {metric}")
+        grain = grain or self.grain_for(start, end)
+        _, table, bucket, _ = next(g for g in ROLLUP_GRAINS if g[0] == grain)
+        if table == "rollup_daily":
+            key, low, high = "claim_day", start.isoformat(), end.isoformat()
+        else:
+            key, low, high = "month", start.isoformat()[:7], end.isoformat()[:7]
+        sql = (f"SELECT {bucket} AS bucket, claim_type, SUM({metric}) FROM {table} "
+               f"WHERE {key} BETWEEN ? AND ?")
+        params: List[Any] = [low, high]
+        if claim_types:
+            sql += f" AND claim_type IN ({', '.join('?' * len(claim_types))})"
+            params.extend(claim_types)
+        sql += " GROUP BY bucket, claim_type"
+        with self._lock:
+            rows = self._summary().execute(sql, params).fetchall()
+        if not rows:
+            return pd.DataFrame()
+        frame = pd.DataFrame(rows, columns=["bucket", "claim_type", metric])
+        frame = frame.pivot(index="bucket", columns="claim_type", values=metric).fillna(0).sort_index()
+        frame.index = pd.to_datetime(frame.index)
+        frame.index.name = None
+        frame.columns.name = None
+        return frame
+
+    def claim_types(self) -> List[str]:
+        with self._lock:
+            rows = self._summary().execute(
+                "SELECT DISTINCT claim_type FROM rollup_monthly ORDER BY claim_type"
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def history_range(self) -> Optional[tuple]:
+        """First and last claim day held in the rollups (two index seeks)"""
+        with self._lock:
+            row = self._summary().execute(
+                "SELECT MIN(claim_day), MAX(claim_day) FROM rollup_daily"
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return date.fromisoformat(row[0]), date.fromisoformat(row[1])
+
+    # ------------------------------------------------------------------
+    # Incremental refresh
+    # ------------------------------------------------------------------
+    def refresh(self) -> int:
+        """Re-aggregate claim days from the watermark; returns (day, type) rows updated"""
+        with self._lock:
+            conn = self._summary()
+            watermark = _get_state(conn, "rollup_state", "watermark")
+            rebuilt_at = float(_get_state(conn, "rollup_state", "full_rebuild_at") or 0)
+        full = watermark is None or time.time() - rebuilt_at > self.full_rebuild_seconds
+        if full:
+            since = "1900-01-01"
+        else:
+            since = (date.fromisoformat(watermark) - timedelta(days=self.lookback_days)).isoformat()
+
+        source = f"{self.db.database}.{self.db.table}"
+        with self.db.connection() as remote, closing(remote.cursor()) as cursor:
+            cursor.execute(DAILY_ROLLUP_SQL.format(source=source), (since,))
+            rows = [(_day(r[0]), str(r[1]), int(r[2] or 0), int(r[3] or 0), float(r[4] or 0), int(r[5] or 0))
+                    for r in cursor.fetchall()]
+
+        # Months overlapping the window are rebuilt whole from the daily rows
+        month_start = since[:7] + "-01"
+        with self._lock:
+            conn = self._summary()
+            with conn:
+                if full:
+                    conn.execute("DELETE FROM rollup_daily")
+                    conn.execute("DELETE FROM rollup_monthly")
+                else:
+                    conn.execute("DELETE FROM rollup_daily WHERE claim_day >= ?", (since,))
+                    conn.execute("DELETE FROM rollup_monthly WHERE month >= ?", (since[:7],))
+                conn.executemany("INSERT OR REPLACE INTO rollup_daily VALUES (?, ?, ?, ?, ?, ?)", rows)
+                conn.execute('''
+                INSERT INTO rollup_monthly
+                SELECT substr(claim_day, 1, 7), claim_type, SUM(claims), SUM(approved_claims),
+                       SUM(claim_amount), SUM(fraud_flags)
+                FROM rollup_daily
+                WHERE claim_day >= ?
+                GROUP BY substr(claim_day, 1, 7), claim_type
+                ''', (month_start,))
+                if rows:
+                    newest = max(r[0] for r in rows)
+                    if watermark is None or full or newest > watermark:
+                        _set_state(conn, "rollup_state", "watermark", newest)
+                if full:
+                    _set_state(conn, "rollup_state", "full_rebuild_at", str(time.time()))
+        logger.info(f"✅ Claim rollups refreshed from {since}: {len(rows)} day/type rows")
+        return len(rows)
+
+
+# Shared by every admin session in this process
+@functools.lru_cache(maxsize=None)
+def get_kpi_service() -> KpiService:
+    """Process-wide instance, created on first use"""
+    return KpiService(get_policyholder_db())
+
+
+@functools.lru_cache(maxsize=None)
+def get_claim_rollups() -> ClaimRollups:
+    """Process-wide instance, created on first use"""
+    return ClaimRollups(get_policyholder_db())
+
+
+def __getattr__(name):
+    # Keeps ``from dashboard_metrics import kpi_service`` working without import-time setup
+    if name == "kpi_service":
+        return get_kpi_service()
+    if name == "claim_rollups":
+        return get_claim_rollups()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
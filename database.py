@@ -1,46 +1,189 @@
 import streamlit as st
-from databricks import sql
-from typing import Optional, Dict, Any
+from contextlib import closing, contextmanager
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional, Dict, Any, Callable, Tuple
+import functools
 import logging
+import os
+
+from config import (
+    DB_POOL_MAX_SIZE,
+    DB_POOL_IDLE_TIMEOUT_SECONDS,
+    DB_POOL_CHECKOUT_TIMEOUT_SECONDS,
+    LOCAL_DATA_DIR,
+    IDENTIFIER_INDEX_ENABLED,
+    IDENTIFIER_INDEX_REFRESH_SECONDS,
+    IDENTIFIER_INDEX_FULL_REFRESH_SECONDS,
+    MIRROR_ENABLED,
+    CLAIMS_CACHE_ENABLED,
+    POLICY_LOOKUP_BATCH,
+    WAREHOUSE_CHANGE_COLUMN,
+)
+from db_pool import ConnectionPool
+from instrumentation import metrics
+from local_mirror import LocalMirror
+from identifiers import EMPLOYEE_ID, IdentifierIndex, classify_identifier
+from profile_cache import ProfileCache, profile_cache
+from query_cache import SharedQueryCache, get_claims_cache
+from result_fetchers import get_fetcher
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Keys of each claim returned by get_policyholder_claims
+CLAIM_FIELDS = ("date", "status", "amount", "fraud_risk")
+CLAIM_PAGE_FIELDS = ("claim_id",) + CLAIM_FIELDS
+
+@dataclass
+class ClaimsPage:
+    """One page of claims plus the keyset cursor for the next page"""
+    claims: Any
+    next_cursor: Optional[Tuple[Any, Any]]
+
+    @property
+    def has_more(self) -> bool:
+        return self.next_cursor is not None
+
 class DatabricksDatabase:
-    def __init__(self):
-        try:
-            self.host = st.secrets["DATABRICKS_HOST"]
-            self.http_path = st.secrets["DATABRICKS_HTTP_PATH"]
-            self.token = st.secrets["DATABRICKS_TOKEN"]
-            self.database = st.secrets.get("DATABASE_NAME", "insurance_db")
-            self.table = st.secrets.get("TABLE_NAME", "insurance_data")
-            logger.info(f"✅ Policyholder DB config: {self.database}.{self.table}")
-        except Exception as e:
-            logger.error(f"❌ Failed to load Databricks secrets: {e}")
-    
-    def get_connection(self):
-        """Create Databricks SQL connection"""
+    def __init__(self, connect: Optional[Callable[[], Any]] = None,
+                 database: Optional[str] = None, table: Optional[str] = None,
+                 cache: Optional[ProfileCache] = None,
+                 identifier_index: Optional[IdentifierIndex] = None,
+                 claim_id_column: Optional[str] = None,
+                 mirror: Optional[LocalMirror] = None,
+                 claims_cache: Optional[SharedQueryCache] = None):
+        """``connect`` overrides the Databricks connector with any DB-API
+        factory (e.g. SQLite or DuckDB) for local testing. ``mirror`` serves
+        profile and claim reads locally while it is fresh enough.
+        ``claims_cache`` coalesces and shares claim query results."""
+        self.profile_cache = cache if cache is not None else profile_cache
+        self.claims_cache = claims_cache
+        self.identifier_index = identifier_index
+        self.database = database or "insurance_db"
+        self.table = table or "insurance_data"
+        self.claim_id_column = claim_id_column or "ClaimID"
+        if connect is None:
+            try:
+                self.host = st.secrets["DATABRICKS_HOST"]
+                self.http_path = st.secrets["DATABRICKS_HTTP_PATH"]
+                self.token = st.secrets["DATABRICKS_TOKEN"]
+                self.database = database or st.secrets.get("DATABASE_NAME", "insurance_db")
+                self.table = table or st.secrets.get("TABLE_NAME", "insurance_data")
+                self.claim_id_column = claim_id_column or st.secrets.get("CLAIM_ID_COLUMN", "ClaimID")
+                logger.info(f"✅ Policyholder DB config: {self.database}.{self.table}")
+            except Exception as e:
+                logger.error(f"❌ Failed to load Databricks secrets: {e}")
+            connect = self._connect_databricks
+
+        self.pool = ConnectionPool(
+            connect,
+            max_size=DB_POOL_MAX_SIZE,
+            idle_timeout=DB_POOL_IDLE_TIMEOUT_SECONDS,
+            checkout_timeout=DB_POOL_CHECKOUT_TIMEOUT_SECONDS,
+        )
+
+        if self.identifier_index is None and IDENTIFIER_INDEX_ENABLED:
+            self.identifier_index = IdentifierIndex(
+                os.path.join(LOCAL_DATA_DIR, "identifier_index.db"),
+                change_column=WAREHOUSE_CHANGE_COLUMN,
+                refresh_interval=IDENTIFIER_INDEX_REFRESH_SECONDS,
+                full_refresh_interval=IDENTIFIER_INDEX_FULL_REFRESH_SECONDS,
+            )
+
+        self.mirror = mirror
+        if self.mirror is None and MIRROR_ENABLED:
+            self.mirror = LocalMirror(self, os.path.join(LOCAL_DATA_DIR, "warehouse_mirror.db"))
+
+    def _connect_databricks(self):
+        """Create Databricks SQL connection (pool factory)"""
+        # Imported here so loading this module stays cheap when no
+        # Databricks connection is ever opened (local factories, tests)
+        from databricks import sql
         try:
-            conn = sql.connect(
+            return sql.connect(
                 server_hostname=self.host,
                 http_path=self.http_path,
                 access_token=self.token
             )
-            return conn
         except Exception as e:
             logger.error(f"❌ Databricks connection failed: {e}")
-            return None
-    
+            raise
+
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled connection; it is returned to the pool on exit"""
+        with self.pool.connection() as conn:
+            yield conn
+
+    @contextmanager
+    def read_connection(self, max_staleness: Optional[float] = None):
+        """Connection for profile and claim reads: the local mirror while it
+        is within ``max_staleness`` seconds (default: the mirror's bound),
+        otherwise the warehouse"""
+        mirror = self.mirror
+        if mirror is not None and mirror.is_fresh(max_staleness):
+            metrics.inc("db_reads_total", source="mirror")
+            with mirror.connection() as conn:
+                yield conn
+            return
+        metrics.inc("db_reads_total", source="warehouse")
+        with self.pool.connection() as conn:
+            yield conn
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Pool occupancy and checkout wait time"""
+        return self.pool.stats()
+
+    def invalidate_profile(self, identifier: str) -> bool:
+        """Evict a cached profile by EmployeeID, Email or PolicyNumber"""
+        return self.profile_cache.invalidate(identifier)
+
+    def refresh_identifier_index(self) -> int:
+        """Pull new identifiers into the local index now; returns rows loaded.
+        The index's own thread does this in the app (``IdentifierIndex.start``)."""
+        if self.identifier_index is None:
+            return 0
+        try:
+            with self.connection() as conn:
+                return self.identifier_index.refresh(conn, f"{self.database}.{self.table}")
+        except Exception as e:
+            logger.error(f"Identifier index refresh failed: {e}")
+            return 0
+
+    @metrics.timed("db_call_seconds", method="authenticate_policyholder")
     def authenticate_policyholder(self, identifier: str) -> Optional[Dict[str, Any]]:
         """Authenticate policyholder using REAL Databricks data"""
-        try:
-            conn = self.get_connection()
-            if not conn:
+        cached = self.profile_cache.get(identifier)
+        if cached is not None:
+            return cached
+
+        lookup_value = identifier.strip()
+        column = classify_identifier(lookup_value)
+
+        index = self.identifier_index
+        if index is not None:
+            # Refreshed in the background (get_policyholder_db); a login never waits on it
+            employee_id = index.lookup(lookup_value)
+            if employee_id is not None:
+                lookup_value, column = employee_id, EMPLOYEE_ID
+            elif index.is_complete():
+                # Unknown to a complete, fresh index: no need to ask the warehouse
+                index.record_reject()
                 return None
-            
-            with conn.cursor() as cursor:
+
+        if column is None:
+            where = "EmployeeID = ? OR Email = ? OR PolicyNumber = ?"
+            params = (lookup_value, lookup_value, lookup_value)
+        else:
+            # Single-column predicate so the warehouse can skip files
+            where = f"{column} = ?"
+            params = (lookup_value,)
+
+        try:
+            with self.read_connection() as conn, closing(conn.cursor()) as cursor:
                 query = f"""
-                SELECT 
+                SELECT
                     EmployeeID,
                     FirstName,
                     LastName,
@@ -49,15 +192,13 @@ class DatabricksDatabase:
                     PolicyStatus,
                     CoverageAmountUSD
                 FROM {self.database}.{self.table}
-                WHERE EmployeeID = ?
-                   OR Email = ? 
-                   OR PolicyNumber = ?
+                WHERE {where}
                 LIMIT 1
                 """
-                
-                cursor.execute(query, (identifier, identifier, identifier))
+
+                cursor.execute(query, params)
                 result = cursor.fetchone()
-                
+
                 if result:
                     user_data = {
                         "employee_id": result[0],
@@ -70,23 +211,109 @@ class DatabricksDatabase:
                         "role": "policyholder",
                         "is_admin": False
                     }
+                    self.profile_cache.put(user_data, identifiers=(identifier,))
                     return user_data
                 return None
-                
+
         except Exception as e:
             logger.error(f"Policyholder auth error: {e}")
             return None
-        finally:
-            if 'conn' in locals():
-                conn.close()
-    
-    def get_policyholder_claims(self, employee_id: str) -> list:
-        """Get claims for policyholder"""
-        try:
-            conn = self.get_connection()
-            with conn.cursor() as cursor:
+
+    @metrics.timed("db_call_seconds", method="get_policies")
+    def get_policies(self, policy_numbers, batch_size: int = POLICY_LOOKUP_BATCH) -> Dict[str, Dict[str, Any]]:
+        """Holder and coverage for each known policy number, a batch per query.
+
+        Unknown numbers are simply absent. Unlike the per-user reads this
+        raises on warehouse errors, so a bulk caller cannot mistake an outage
+        for a file full of unknown policies.
+        """
+        numbers = sorted({str(p) for p in policy_numbers if p})
+        policies: Dict[str, Dict[str, Any]] = {}
+        with self.read_connection() as conn, closing(conn.cursor()) as cursor:
+            for start in range(0, len(numbers), batch_size):
+                batch = numbers[start:start + batch_size]
+                cursor.execute(f"""
+                SELECT
+                    PolicyNumber,
+                    MAX(EmployeeID),
+                    MAX(FirstName),
+                    MAX(LastName),
+                    MAX(PolicyStatus),
+                    MAX(CoverageAmountUSD)
+                FROM {self.database}.{self.table}
+                WHERE PolicyNumber IN ({", ".join("?" * len(batch))})
+                GROUP BY PolicyNumber
+                """, batch)
+                for number, employee_id, first, last, status, coverage in cursor.fetchall():
+                    policies[str(number)] = {
+                        "employee_id": employee_id,
+                        "name": f"{first or ''} {last or ''}".strip(),
+                        "policy_status": status,
+                        "coverage": float(coverage) if coverage else 0.0,
+                    }
+        return policies
+
+    @metrics.timed("db_call_seconds", method="get_claim_context")
+    def get_claim_context(self, employee_id: str, incident_date: Optional[str] = None) -> Dict[str, Any]:
+        """Holder fields a new claim is scored on: policy status and fraud
+        risk from the latest warehouse row, and days since the last claim on
+        or before ``incident_date`` (None when there is none).
+
+        Raises on warehouse errors, so a pipeline stage retries instead of
+        scoring the claim without them.
+        """
+        incident_date = str(incident_date or date.today().isoformat())[:10]
+        source = f"{self.database}.{self.table}"
+        with self.read_connection() as conn, closing(conn.cursor()) as cursor:
+            cursor.execute(f"""
+            SELECT PolicyStatus, FraudRisk
+            FROM {source}
+            WHERE EmployeeID = ?
+            ORDER BY ClaimDate DESC
+            LIMIT 1
+            """, (employee_id,))
+            latest = cursor.fetchone()
+            cursor.execute(f"""
+            SELECT MAX(ClaimDate)
+            FROM {source}
+            WHERE EmployeeID = ? AND ClaimDate <= ?
+            """, (employee_id, incident_date))
+            previous = cursor.fetchone()
+        if latest is None:
+            return {}
+        previous = previous[0] if previous else None
+        gap = None
+        if previous is not None:
+            gap = (date.fromisoformat(incident_date) - date.fromisoformat(str(previous)[:10])).days
+        return {
+            "policy_status": latest[0] or "",
+            "fraud_risk": latest[1] or "",
+            "days_since_prev_claim": gap,
+        }
+
+    def _cached(self, query_key: Tuple[Any, ...], employee_id: str, load: Callable[[], Any]):
+        """``load()`` through the claims cache, when one is configured.
+        ``load`` raises on failure so error results are never cached."""
+        if self.claims_cache is None:
+            return load()
+        key = repr((self.database, self.table) + query_key)
+        return self.claims_cache.get_or_load(key, employee_id, load)
+
+    @metrics.timed("db_call_seconds", method="get_policyholder_claims")
+    def get_policyholder_claims(self, employee_id: str, limit: int = 10,
+                                fetch: str = "dicts"):
+        """Get claims for policyholder.
+
+        ``fetch`` picks the result shape: 'dicts' (list of dicts, the default),
+        'arrow' (pyarrow.Table) or 'pandas' (DataFrame). The Arrow-based modes
+        never build per-row Python objects.
+        """
+        fetcher = get_fetcher(fetch, CLAIM_FIELDS, floats=("amount",))
+
+        def load():
+            with self.read_connection() as conn, closing(conn.cursor()) as cursor:
                 query = f"""
-                SELECT 
+                SELECT
                     ClaimDate,
                     ClaimStatus,
                     LastClaimAmountUSD,
@@ -94,23 +321,84 @@ class DatabricksDatabase:
                 FROM {self.database}.{self.table}
                 WHERE EmployeeID = ?
                 ORDER BY ClaimDate DESC
-                LIMIT 10
+                LIMIT {int(limit)}
                 """
                 cursor.execute(query, (employee_id,))
-                results = cursor.fetchall()
-                
-                claims = []
-                for row in results:
-                    claims.append({
-                        "date": row[0],
-                        "status": row[1],
-                        "amount": float(row[2]) if row[2] else 0,
-                        "fraud_risk": row[3]
-                    })
-                return claims
+                return fetcher.fetch(cursor)
+
+        try:
+            return self._cached(("claims", employee_id, int(limit), fetch), employee_id, load)
         except Exception as e:
             logger.error(f"Error getting claims: {e}")
-            return []
+            return fetcher.empty()
+
+    @metrics.timed("db_call_seconds", method="get_policyholder_claims_page")
+    def get_policyholder_claims_page(self, employee_id: str,
+                                     after: Optional[Tuple[Any, Any]] = None,
+                                     page_size: int = 10,
+                                     fetch: str = "dicts") -> ClaimsPage:
+        """Get one page of claims, newest first, keyset-paginated.
+
+        ``after`` is the ``next_cursor`` of the previous page: a
+        (ClaimDate, claim id) pair. Seeking past it instead of using OFFSET
+        keeps every page the same cost however deep the user pages.
+        """
+        fetcher = get_fetcher(fetch, CLAIM_PAGE_FIELDS, floats=("amount",))
+        claim_id = self.claim_id_column
+        if after is None:
+            seek = ""
+            params = (employee_id,)
+        else:
+            seek = f"AND (ClaimDate < ? OR (ClaimDate = ? AND {claim_id} < ?))"
+            params = (employee_id, after[0], after[0], after[1])
+
+        def load():
+            with self.read_connection() as conn, closing(conn.cursor()) as cursor:
+                query = f"""
+                SELECT
+                    {claim_id},
+                    ClaimDate,
+                    ClaimStatus,
+                    LastClaimAmountUSD,
+                    FraudRisk
+                FROM {self.database}.{self.table}
+                WHERE EmployeeID = ?
+                {seek}
+                ORDER BY ClaimDate DESC, {claim_id} DESC
+                LIMIT {int(page_size) + 1}
+                """
+                cursor.execute(query, params)
+                return fetcher.fetch(cursor)
+
+        try:
+            rows = self._cached(("claims_page", employee_id, after, int(page_size), fetch), employee_id, load)
+        except Exception as e:
+            logger.error(f"Error getting claims page: {e}")
+            return ClaimsPage(fetcher.empty(), None)
+
+        # One extra row tells us whether another page exists
+        if len(rows) <= page_size:
+            return ClaimsPage(rows, None)
+        page = fetcher.head(rows, page_size)
+        return ClaimsPage(page, fetcher.last(page, ("date", "claim_id")))
+
+# Created lazily: reading secrets and opening the identifier index waits
+# until the first request that needs the warehouse.
+@functools.lru_cache(maxsize=None)
+def get_policyholder_db() -> DatabricksDatabase:
+    """Process-wide instance, created on first use"""
+    db = DatabricksDatabase(claims_cache=get_claims_cache() if CLAIMS_CACHE_ENABLED else None)
+    metrics.register_collector("db_pool", db.pool_stats)
+    if db.mirror is not None:
+        metrics.register_collector("mirror", db.mirror.stats)
+        db.mirror.start()
+    if db.identifier_index is not None:
+        db.identifier_index.start(db.connection, f"{db.database}.{db.table}")
+    return db
+
 
-# Create instance - THIS IS IMPORTANT!
-policyholder_db = DatabricksDatabase()
+def __getattr__(name):
+    # Keeps ``from database import policyholder_db`` working without import-time setup
+    if name == "policyholder_db":
+        return get_policyholder_db()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
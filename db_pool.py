@@ -0,0 +1,225 @@
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes available within the checkout timeout"""
+
+
+class _PooledConnection:
+    """A raw DB-API connection plus the bookkeeping the pool needs"""
+    __slots__ = ("raw", "created_at", "last_used")
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of DB-API connections.
+
+    ``connect`` is any zero-argument factory returning a DB-API connection, so
+    the same pool works for ``databricks.sql.connect`` and for local stand-ins
+    such as ``sqlite3.connect`` or ``duckdb.connect``.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        max_size: int = 5,
+        idle_timeout: float = 300.0,
+        max_lifetime: float = 3600.0,
+        checkout_timeout: float = 30.0,
+        ping_query: str = "SELECT 1",
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self._connect = connect
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.checkout_timeout = checkout_timeout
+        self.ping_query = ping_query
+
+        self._idle: List[_PooledConnection] = []
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self._closed = False
+
+        # Stats
+        self._checkouts = 0
+        self._created = 0
+        self._evicted = 0
+        self._failed_pings = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    @contextmanager
+    def connection(self):
+        """Check out a live connection for the duration of the ``with`` block.
+
+        The connection goes back to the pool on normal exit. If the block
+        raises, the connection is discarded since its state is unknown.
+        """
+        entry = self._checkout()
+        try:
+            yield entry.raw
+        except BaseException:
+            self._discard(entry)
+            raise
+        else:
+            self._checkin(entry)
+
+    def close(self):
+        """Close every idle connection and refuse further checkouts"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for entry in idle:
+            self._close_raw(entry)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of pool occupancy and checkout wait times"""
+        with self._cond:
+            checkouts = self._checkouts
+            return {
+                "max_size": self.max_size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "occupancy": self._in_use / self.max_size,
+                "checkouts": checkouts,
+                "created": self._created,
+                "evicted": self._evicted,
+                "failed_pings": self._failed_pings,
+                "timeouts": self._timeouts,
+                "avg_wait_ms": (self._wait_total / checkouts * 1000) if checkouts else 0.0,
+                "max_wait_ms": self._wait_max * 1000,
+            }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+    def _checkout(self) -> _PooledConnection:
+        started = time.monotonic()
+        deadline = started + self.checkout_timeout
+        while True:
+            stale = []
+            entry = None
+            create = False
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Connection pool is closed")
+                    stale.extend(self._evict_expired_locked())
+                    if self._idle:
+                        # LIFO keeps the warmest connection in use and lets
+                        # the coldest ones age out through idle eviction.
+                        entry = self._idle.pop()
+                        break
+                    if self._in_use < self.max_size:
+                        create = True
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeout(
+                            f"No connection available after {self.checkout_timeout:.1f}s "
+                            f"({self._in_use}/{self.max_size} in use)"
+                        )
+                    self._cond.wait(remaining)
+                self._in_use += 1
+
+            for old in stale:
+                self._close_raw(old)
+
+            if create:
+                try:
+                    entry = _PooledConnection(self._connect())
+                except BaseException:
+                    self._release_slot()
+                    raise
+                with self._cond:
+                    self._created += 1
+            elif not self._is_alive(entry):
+                with self._cond:
+                    self._failed_pings += 1
+                self._discard(entry)
+                continue
+
+            waited = time.monotonic() - started
+            with self._cond:
+                self._checkouts += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+            return entry
+
+    def _checkin(self, entry: _PooledConnection):
+        entry.last_used = time.monotonic()
+        with self._cond:
+            self._in_use -= 1
+            if self._closed:
+                keep = False
+            else:
+                keep = True
+                self._idle.append(entry)
+            self._cond.notify()
+        if not keep:
+            self._close_raw(entry)
+
+    def _discard(self, entry: _PooledConnection):
+        self._release_slot()
+        self._close_raw(entry)
+
+    def _release_slot(self):
+        with self._cond:
+            self._in_use -= 1
+            self._cond.notify()
+
+    def _evict_expired_locked(self) -> List[_PooledConnection]:
+        now = time.monotonic()
+        keep, stale = [], []
+        for entry in self._idle:
+            if (now - entry.last_used > self.idle_timeout
+                    or now - entry.created_at > self.max_lifetime):
+                stale.append(entry)
+            else:
+                keep.append(entry)
+        if stale:
+            self._idle = keep
+            self._evicted += len(stale)
+        return stale
+
+    def _is_alive(self, entry: _PooledConnection) -> bool:
+        cursor = None
+        try:
+            cursor = entry.raw.cursor()
+            cursor.execute(self.ping_query)
+            cursor.fetchall()
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ Pooled connection failed liveness check: {e}")
+            return False
+        finally:
+            if cursor is not None:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+
+    @staticmethod
+    def _close_raw(entry: _PooledConnection):
+        try:
+            entry.raw.close()
+        except Exception as e:
+            logger.debug(f"Error closing pooled connection: {e}")
@@ -0,0 +1,167 @@
+import functools
+import json
+import multiprocessing
+import os
+import threading
+import time
+import logging
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional
+
+from config import LOCAL_DATA_DIR, DOCUMENT_ANALYSIS_MAX_WORKERS
+from document_extract import extract_metadata
+from document_store import get_document_store
+from local_db import connect_sqlite
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentAnalyzer:
+    """Extracts document metadata on a process pool, cached by content hash.
+
+    ``submit`` returns immediately: a cached result comes back as a finished
+    future, and a hash already being analysed shares the in-flight future,
+    so re-uploads of the same file never reach the pool. Workers are spawned
+    lazily and only import ``document_extract``.
+    """
+
+    def __init__(self, store, db_path: Optional[str] = None,
+                 max_workers: int = DOCUMENT_ANALYSIS_MAX_WORKERS):
+        self.store = store
+        self.db_path = db_path or os.path.join(LOCAL_DATA_DIR, "document_analysis.db")
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._in_flight: Dict[str, Future] = {}
+        self._cache_hits = 0
+        self._conn = connect_sqlite(self.db_path)
+        with self._conn:
+            self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS document_analysis (
+                sha256 TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                metadata TEXT NOT NULL,
+                error TEXT,
+                size INTEGER,
+                elapsed_ms REAL NOT NULL,
+                queued_ms REAL,
+                analyzed_at REAL NOT NULL
+            )
+            ''')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_document_analysis_kind ON document_analysis (kind)')
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.max_workers,
+                                             mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def submit(self, sha256: str) -> Future:
+        """Analyse a stored document in the background; returns a future of ``get``'s shape"""
+        cached = self.get(sha256)
+        with self._lock:
+            if cached is not None:
+                self._cache_hits += 1
+                done: Future = Future()
+                done.set_result(cached)
+                return done
+            if sha256 in self._in_flight:
+                return self._in_flight[sha256]
+            path = self.store.path_for(sha256)
+            queued_at = time.perf_counter()
+            future = self._executor().submit(extract_metadata, path)
+            result: Future = Future()
+            self._in_flight[sha256] = result
+
+        def _store(f: Future):
+            try:
+                outcome = f.result()
+                outcome["queued_ms"] = max((time.perf_counter() - queued_at) * 1000 - outcome["elapsed_ms"], 0.0)
+                outcome["size"] = os.path.getsize(path)
+                self._save(sha256, outcome)
+                result.set_result(self.get(sha256))
+            except Exception as e:
+                logger.error(f"❌ Document analysis failed for {sha256[:12]}: {e}")
+                result.set_exception(e)
+            finally:
+                with self._lock:
+                    self._in_flight.pop(sha256, None)
+                    # A crashed worker poisons the pool; start fresh on the next submit
+                    if isinstance(f.exception(), BrokenProcessPool) and self._pool is not None:
+                        self._pool.shutdown(wait=False, cancel_futures=True)
+                        self._pool = None
+
+        future.add_done_callback(_store)
+        return result
+
+    def analyze_claim(self, claim_id: str) -> List[Future]:
+        return [self.submit(doc["sha256"]) for doc in self.store.documents_for_claim(claim_id)]
+
+    def _save(self, sha256: str, outcome: Dict[str, Any]):
+        with self._lock, self._conn:
+            self._conn.execute('''
+            INSERT OR REPLACE INTO document_analysis
+                (sha256, kind, metadata, error, size, elapsed_ms, queued_ms, analyzed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (sha256, outcome["kind"], json.dumps(outcome["metadata"], default=str),
+                  outcome["error"], outcome["size"], outcome["elapsed_ms"],
+                  outcome["queued_ms"], time.time()))
+
+    def get(self, sha256: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute('''
+            SELECT sha256, kind, metadata, error, size, elapsed_ms, queued_ms, analyzed_at
+            FROM document_analysis WHERE sha256 = ?
+            ''', (sha256,)).fetchone()
+        if row is None:
+            return None
+        return {"sha256": row[0], "kind": row[1], "metadata": json.loads(row[2]), "error": row[3],
+                "size": row[4], "elapsed_ms": row[5], "queued_ms": row[6], "analyzed_at": row[7]}
+
+    def timing_by_kind(self) -> List[Dict[str, Any]]:
+        """Per file type: documents, total and p95 extraction time, throughput"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT kind, elapsed_ms, size FROM document_analysis ORDER BY kind, elapsed_ms"
+            ).fetchall()
+        by_kind: Dict[str, List[tuple]] = {}
+        for kind, elapsed, size in rows:
+            by_kind.setdefault(kind, []).append((elapsed, size or 0))
+        summary = []
+        for kind, items in by_kind.items():
+            times = [t for t, _ in items]
+            total_ms = sum(times)
+            summary.append({
+                "kind": kind,
+                "documents": len(items),
+                "total_ms": round(total_ms, 1),
+                "avg_ms": round(total_ms / len(items), 1),
+                "p95_ms": round(times[min(len(times) - 1, int(len(times) * 0.95))], 1),
+                "mb_per_second": round(sum(s for _, s in items) / 1e6 / (total_ms / 1000), 2) if total_ms else None,
+            })
+        return sorted(summary, key=lambda r: r["total_ms"], reverse=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            analysed = self._conn.execute("SELECT COUNT(*) FROM document_analysis").fetchone()[0]
+            return {"analyzed": analysed, "in_flight": len(self._in_flight),
+                    "cache_hits": self._cache_hits}
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+@functools.lru_cache(maxsize=None)
+def get_document_analyzer() -> DocumentAnalyzer:
+    """Process-wide instance, created on first use"""
+    return DocumentAnalyzer(get_document_store())
+
+
+def __getattr__(name):
+    # Keeps ``from document_analysis import document_analyzer`` working without import-time setup
+    if name == "document_analyzer":
+        return get_document_analyzer()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,114 @@
+"""
+Metadata extraction for stored claim documents.
+
+Runs inside document analysis worker processes, so it imports only the
+local parsing libraries. pypdf and Pillow are optional: without pypdf the
+page count is estimated from the raw PDF objects and no text is returned;
+without Pillow images are only identified, not measured.
+"""
+
+import re
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+MAX_TEXT_CHARS = 20000
+
+EXIF_IFD = 0x8769
+EXIF_DATETIME = 306
+EXIF_DATETIME_ORIGINAL = 36867
+EXIF_DATETIME_DIGITIZED = 36868
+
+_PDF_PAGE = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+
+
+def sniff_kind(head: bytes) -> str:
+    """Classify a file by its magic bytes rather than the uploaded name"""
+    if head.startswith(b"%PDF"):
+        return "pdf"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    return "unknown"
+
+
+def _exif_date(value) -> Optional[str]:
+    if not value:
+        return None
+    try:
+        return datetime.strptime(str(value).strip("\x00 "), "%Y:%m:%d %H:%M:%S").isoformat()
+    except ValueError:
+        return None
+
+
+def _extract_pdf(path: str) -> Dict[str, Any]:
+    if PdfReader is None:
+        with open(path, "rb") as f:
+            return {"page_count": len(_PDF_PAGE.findall(f.read())), "text": None,
+                    "note": "pypdf not installed; page count estimated"}
+    reader = PdfReader(path)
+    parts, length = [], 0
+    for page in reader.pages:
+        if length >= MAX_TEXT_CHARS:
+            break
+        text = page.extract_text() or ""
+        parts.append(text)
+        length += len(text)
+    info = reader.metadata or {}
+    return {
+        "page_count": len(reader.pages),
+        "text": "\n".join(parts)[:MAX_TEXT_CHARS],
+        "producer": info.get("/Producer"),
+        "created": str(info.get("/CreationDate")) if info.get("/CreationDate") else None,
+    }
+
+
+def _extract_image(path: str) -> Dict[str, Any]:
+    if Image is None:
+        return {"note": "Pillow not installed; image not measured"}
+    with Image.open(path) as img:
+        exif = img.getexif()
+        sub = exif.get_ifd(EXIF_IFD)
+        return {
+            "width": img.width,
+            "height": img.height,
+            "mode": img.mode,
+            "exif_taken_at": _exif_date(sub.get(EXIF_DATETIME_ORIGINAL) or sub.get(EXIF_DATETIME_DIGITIZED)),
+            "exif_modified_at": _exif_date(exif.get(EXIF_DATETIME)),
+            "camera": " ".join(str(exif[t]).strip("\x00 ") for t in (271, 272) if exif.get(t)) or None,
+        }
+
+
+def extract_metadata(path: str) -> Dict[str, Any]:
+    """Extract metadata from one document; never raises, errors are reported"""
+    started = time.perf_counter()
+    kind = "unknown"
+    try:
+        with open(path, "rb") as f:
+            kind = sniff_kind(f.read(8))
+        if kind == "pdf":
+            metadata = _extract_pdf(path)
+        elif kind in ("jpeg", "png"):
+            metadata = _extract_image(path)
+        else:
+            metadata = {}
+        error = None
+    except Exception as e:
+        metadata, error = {}, f"{type(e).__name__}: {e}"
+    return {
+        "kind": kind,
+        "metadata": metadata,
+        "error": error,
+        "elapsed_ms": (time.perf_counter() - started) * 1000,
+    }
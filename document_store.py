@@ -0,0 +1,197 @@
+import functools
+import hashlib
+import os
+import tempfile
+import threading
+import time
+import logging
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Dict, List, Optional
+
+from config import (
+    DOCUMENT_STORE_DIR,
+    MAX_CLAIM_UPLOAD_BYTES,
+    MAX_SESSION_UPLOAD_BYTES,
+    UPLOAD_CHUNK_BYTES,
+)
+from local_db import connect_sqlite
+
+logger = logging.getLogger(__name__)
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload would exceed the per-claim or per-session cap"""
+
+
+@dataclass
+class StoredDocument:
+    sha256: str
+    size: int
+    filename: str
+    content_type: Optional[str]
+    deduplicated: bool
+
+
+class DocumentStore:
+    """Content-addressed on-disk store for claim supporting documents.
+
+    Uploads are streamed in fixed-size chunks into a temp file while being
+    hashed, then renamed to ``objects/<aa>/<bb>/<sha256>``. Identical
+    content is kept once and linked to any number of claims. Size caps are
+    checked chunk by chunk, so an oversized upload is abandoned without ever
+    being buffered whole.
+    """
+
+    def __init__(self, root: str = DOCUMENT_STORE_DIR,
+                 max_claim_bytes: int = MAX_CLAIM_UPLOAD_BYTES,
+                 max_session_bytes: int = MAX_SESSION_UPLOAD_BYTES,
+                 chunk_size: int = UPLOAD_CHUNK_BYTES):
+        self.root = root
+        self.max_claim_bytes = max_claim_bytes
+        self.max_session_bytes = max_session_bytes
+        self.chunk_size = chunk_size
+        self._objects = os.path.join(root, "objects")
+        self._tmp = os.path.join(root, "tmp")
+        os.makedirs(self._objects, exist_ok=True)
+        os.makedirs(self._tmp, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = connect_sqlite(os.path.join(root, "documents.db"))
+        with self._conn:
+            self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS documents (
+                sha256 TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                content_type TEXT,
+                created_at REAL NOT NULL
+            )
+            ''')
+            self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS claim_documents (
+                claim_id TEXT NOT NULL,
+                sha256 TEXT NOT NULL REFERENCES documents (sha256),
+                filename TEXT NOT NULL,
+                session_id TEXT,
+                size INTEGER NOT NULL,
+                linked_at REAL NOT NULL,
+                PRIMARY KEY (claim_id, sha256)
+            )
+            ''')
+            self._conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_claim_documents_session
+            ON claim_documents (session_id)
+            ''')
+            self._conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_claim_documents_sha
+            ON claim_documents (sha256)
+            ''')
+
+    def path_for(self, sha256: str) -> str:
+        return os.path.join(self._objects, sha256[:2], sha256[2:4], sha256)
+
+    # ------------------------------------------------------------------
+    # Ingestion
+    # ------------------------------------------------------------------
+    def _used_bytes(self, column: str, value: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT COALESCE(SUM(size), 0) FROM claim_documents WHERE {column} = ?", (value,)
+            ).fetchone()
+        return int(row[0])
+
+    def ingest(self, stream: BinaryIO, filename: str, claim_id: str,
+               session_id: Optional[str] = None,
+               content_type: Optional[str] = None) -> StoredDocument:
+        """Stream ``stream`` into the store and link it to ``claim_id``"""
+        budget = self.max_claim_bytes - self._used_bytes("claim_id", claim_id)
+        scope = "claim"
+        if session_id:
+            session_left = self.max_session_bytes - self._used_bytes("session_id", session_id)
+            if session_left < budget:
+                budget, scope = session_left, "session"
+
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self._tmp, prefix="upload-")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while True:
+                    chunk = stream.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > budget:
+                        raise UploadTooLarge(
+                            f"{filename} exceeds the {scope} upload limit of "
+                            f"{(self.max_claim_bytes if scope == 'claim' else self.max_session_bytes) / 1e6:.0f} MB"
+                        )
+                    digest.update(chunk)
+                    out.write(chunk)
+            sha256 = digest.hexdigest()
+            final_path = self.path_for(sha256)
+            deduplicated = os.path.exists(final_path)
+            if deduplicated:
+                os.unlink(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                os.replace(tmp_path, final_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute('''
+            INSERT OR IGNORE INTO documents (sha256, size, content_type, created_at)
+            VALUES (?, ?, ?, ?)
+            ''', (sha256, size, content_type, now))
+            self._conn.execute('''
+            INSERT OR IGNORE INTO claim_documents
+                (claim_id, sha256, filename, session_id, size, linked_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ''', (claim_id, sha256, filename, session_id, size, now))
+        if deduplicated:
+            logger.info(f"♻️ {filename} already stored as {sha256[:12]}, linked to {claim_id}")
+        return StoredDocument(sha256, size, filename, content_type, deduplicated)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def documents_for_claim(self, claim_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute('''
+            SELECT cd.sha256, cd.filename, cd.size, d.content_type,
+                   (SELECT COUNT(*) FROM claim_documents o WHERE o.sha256 = cd.sha256) AS claims
+            FROM claim_documents cd JOIN documents d ON d.sha256 = cd.sha256
+            WHERE cd.claim_id = ?
+            ORDER BY cd.linked_at
+            ''', (claim_id,)).fetchall()
+        return [{"sha256": r[0], "filename": r[1], "size": r[2], "content_type": r[3],
+                 "linked_claims": r[4]} for r in rows]
+
+    def open(self, sha256: str) -> BinaryIO:
+        return open(self.path_for(sha256), "rb")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            unique, stored = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM documents"
+            ).fetchone()
+            links, linked = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM claim_documents"
+            ).fetchone()
+        return {"documents": unique, "stored_bytes": stored, "links": links,
+                "bytes_saved_by_dedup": linked - stored}
+
+
+@functools.lru_cache(maxsize=None)
+def get_document_store() -> DocumentStore:
+    """Process-wide instance, created on first use"""
+    return DocumentStore()
+
+
+def __getattr__(name):
+    # Keeps ``from document_store import document_store`` working without import-time setup
+    if name == "document_store":
+        return get_document_store()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,297 @@
+"""
+Fraud model: vectorized claim features and a versioned logistic model.
+
+Kept free of Streamlit and database imports, like fraud_rules, so worker
+processes can import it cheaply. A model is a JSON artifact holding the
+feature list, standardization, weights and decision threshold; the
+``CURRENT`` file in the model directory names the version to serve.
+Until a trained version exists, ``load_current`` publishes a baseline
+whose weights reproduce the fraud_rules scores on the logit scale;
+fraud_training.py produces trained versions.
+"""
+
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from fraud_rules import ELEVATED_AMOUNT_RATIO, FREQUENT_CLAIM_DAYS, HIGH_AMOUNT_RATIO, RISK_WEIGHTS
+
+CLAIM_TYPES = ("Health", "Dental", "Vision", "Hospitalization", "Accident")
+
+FEATURE_NAMES = (
+    "log_amount",
+    "amount_ratio",
+    "high_amount_ratio",
+    "elevated_amount_ratio",
+    "repeat_claim",
+    "days_since_prev_claim",
+    "risk_high",
+    "risk_medium",
+    "policy_lapsed",
+) + tuple(f"type_{t.lower()}" for t in CLAIM_TYPES)
+
+# How a feature reads in a claim's fraud reasons
+FEATURE_LABELS = {
+    "log_amount": "large claim amount",
+    "amount_ratio": "amount high relative to coverage",
+    "high_amount_ratio": f"amount>={HIGH_AMOUNT_RATIO:.0%} of coverage",
+    "elevated_amount_ratio": f"amount>={ELEVATED_AMOUNT_RATIO:.0%} of coverage",
+    "repeat_claim": f"repeat claim within {FREQUENT_CLAIM_DAYS}d",
+    "days_since_prev_claim": "long gap since previous claim",
+    "risk_high": "FraudRisk High",
+    "risk_medium": "FraudRisk Medium",
+    "policy_lapsed": "policy not active",
+}
+
+# Training: warehouse columns streamed per chunk, and the outcome used as the
+# label; features are taken as of submission (``as_submitted``), so a model
+# is trained and evaluated on what serving can provide
+TRAINING_COLUMNS = ["EmployeeID", "ClaimDate", "ClaimType", "ClaimStatus", "PolicyStatus",
+                    "LastClaimAmountUSD", "CoverageAmountUSD", "FraudRisk"]
+FRAUD_LABEL_STATUSES = ("Denied",)
+# One employee in this many is held out for evaluation
+HOLDOUT_MODULUS = 10
+
+# Claims with no earlier claim on record count as this many days apart
+MAX_GAP_DAYS = 365
+
+CURRENT_POINTER = "CURRENT"
+
+
+def _numeric(df: pd.DataFrame, column: str) -> np.ndarray:
+    if column not in df:
+        return np.zeros(len(df))
+    return pd.to_numeric(df[column], errors="coerce").fillna(0.0).to_numpy(dtype=float)
+
+
+def _text(df: pd.DataFrame, column: str) -> pd.Series:
+    if column not in df:
+        return pd.Series([""] * len(df), index=df.index)
+    return df[column].fillna("").astype(str).str.strip()
+
+
+def build_features(df: pd.DataFrame) -> np.ndarray:
+    """Feature matrix (rows x FEATURE_NAMES) from warehouse-style claim columns.
+
+    Uses LastClaimAmountUSD, CoverageAmountUSD, FraudRisk, PolicyStatus,
+    ClaimType and DaysSincePrevClaim when present; missing columns count as
+    zero, empty or "no earlier claim".
+    """
+    amount = _numeric(df, "LastClaimAmountUSD")
+    coverage = _numeric(df, "CoverageAmountUSD")
+    ratio = np.clip(np.divide(amount, coverage, out=np.zeros_like(amount), where=coverage > 0), 0.0, 2.0)
+    high_ratio = ratio >= HIGH_AMOUNT_RATIO
+    elevated_ratio = (ratio >= ELEVATED_AMOUNT_RATIO) & ~high_ratio
+
+    if "DaysSincePrevClaim" in df:
+        gap = pd.to_numeric(df["DaysSincePrevClaim"], errors="coerce").to_numpy(dtype=float)
+        gap = np.clip(np.nan_to_num(gap, nan=MAX_GAP_DAYS), 0, MAX_GAP_DAYS)
+    else:
+        gap = np.full(len(df), float(MAX_GAP_DAYS))
+
+    risk = _text(df, "FraudRisk").str.upper().to_numpy()
+    status = _text(df, "PolicyStatus").str.title().to_numpy()
+    claim_type = _text(df, "ClaimType").str.title().to_numpy()
+
+    columns = [
+        np.log1p(np.maximum(amount, 0.0)),
+        ratio,
+        high_ratio,
+        elevated_ratio,
+        gap <= FREQUENT_CLAIM_DAYS,
+        gap / MAX_GAP_DAYS,
+        risk == "HIGH",
+        risk == "MEDIUM",
+        (status != "") & (status != "Active"),
+    ] + [claim_type == t for t in CLAIM_TYPES]
+    return np.column_stack(columns).astype(np.float64) if len(df) else np.zeros((0, len(FEATURE_NAMES)))
+
+
+def as_submitted(df: pd.DataFrame) -> pd.DataFrame:
+    """Warehouse rows (ordered by EmployeeID, ClaimDate) as they looked when
+    each claim was filed, matching what ``claim_record`` gets at serving:
+    DaysSincePrevClaim from the previous claim, and FraudRisk from the
+    previous claim's row (blank for a holder's first claim) rather than the
+    risk recorded alongside the claim's own outcome"""
+    employees = df["EmployeeID"].to_numpy()
+    claim_date = pd.to_datetime(df["ClaimDate"], errors="coerce")
+    gaps = claim_date.groupby(employees).diff().dt.days
+    prior_risk = _text(df, "FraudRisk").groupby(employees).shift(1).fillna("")
+    return df.assign(DaysSincePrevClaim=gaps.to_numpy(), FraudRisk=prior_risk.to_numpy())
+
+
+def training_batch(df: pd.DataFrame):
+    """(features, labels, holdout mask) for a chunk of whole employees.
+
+    Runs in training worker processes. Employees are assigned to the
+    holdout set by a stable hash, so the split is the same on every run.
+    """
+    df = as_submitted(df)
+    X = build_features(df)
+    y = _text(df, "ClaimStatus").str.title().isin(FRAUD_LABEL_STATUSES).to_numpy(dtype=np.float64)
+    holdout = pd.util.hash_array(df["EmployeeID"].astype(str).to_numpy()) % HOLDOUT_MODULUS == 0
+    return X, y, holdout
+
+
+def claim_record(claim: Dict[str, Any]) -> Dict[str, Any]:
+    """Warehouse-style feature columns for a claim submitted through the app:
+    form fields plus the holder's policy status, fraud risk and days since
+    the previous claim (``DatabricksDatabase.get_claim_context``)"""
+    return {
+        "LastClaimAmountUSD": claim.get("amount"),
+        "CoverageAmountUSD": claim.get("coverage"),
+        "FraudRisk": claim.get("fraud_risk", ""),
+        "PolicyStatus": claim.get("policy_status", ""),
+        "ClaimType": claim.get("claim_type", ""),
+        "DaysSincePrevClaim": claim.get("days_since_prev_claim"),
+    }
+
+
+class FraudModel:
+    """Standardized logistic regression over FEATURE_NAMES"""
+
+    def __init__(self, version: str, weights, bias: float, mean=None, scale=None,
+                 threshold: float = 0.5, metrics: Optional[Dict[str, Any]] = None,
+                 trained_at: Optional[float] = None, info: Optional[Dict[str, Any]] = None):
+        n = len(FEATURE_NAMES)
+        self.version = version
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.bias = float(bias)
+        self.mean = np.zeros(n) if mean is None else np.asarray(mean, dtype=np.float64)
+        self.scale = np.ones(n) if scale is None else np.asarray(scale, dtype=np.float64)
+        self.threshold = float(threshold)
+        self.metrics = dict(metrics or {})
+        self.trained_at = trained_at or time.time()
+        self.info = dict(info or {})
+        if self.weights.shape != (n,):
+            raise ValueError(f"Model {version} has {self.weights.size} weights, expected {n}")
+
+    def logits(self, X: np.ndarray) -> np.ndarray:
+        return ((X - self.mean) / self.scale) @ self.weights + self.bias
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        return 1.0 / (1.0 + np.exp(-np.clip(self.logits(X), -50, 50)))
+
+    def reasons(self, X: np.ndarray, top: int = 2) -> List[str]:
+        """The strongest positive contributions to each row's score"""
+        contributions = ((X - self.mean) / self.scale) * self.weights
+        order = np.argsort(-contributions, axis=1)[:, :top]
+        out = []
+        for row, idx in zip(contributions, order):
+            labels = [FEATURE_LABELS.get(FEATURE_NAMES[i], FEATURE_NAMES[i]) for i in idx if row[i] > 0.5]
+            out.append("; ".join(labels))
+        return out
+
+    # ------------------------------------------------------------------
+    # Artifacts
+    # ------------------------------------------------------------------
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "kind": "logistic",
+            "features": list(FEATURE_NAMES),
+            "weights": self.weights.tolist(),
+            "bias": self.bias,
+            "mean": self.mean.tolist(),
+            "scale": self.scale.tolist(),
+            "threshold": self.threshold,
+            "metrics": self.metrics,
+            "trained_at": self.trained_at,
+            "info": self.info,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FraudModel":
+        if list(data.get("features", [])) != list(FEATURE_NAMES):
+            raise ValueError(f"Model {data.get('version')} was trained on a different feature set")
+        return cls(data["version"], data["weights"], data["bias"], data.get("mean"), data.get("scale"),
+                   data.get("threshold", 0.5), data.get("metrics"), data.get("trained_at"), data.get("info"))
+
+
+def baseline_model() -> FraudModel:
+    """Rule weights on the logit scale: logit = 6 * (rule score - FLAG_THRESHOLD)"""
+    weights = dict.fromkeys(FEATURE_NAMES, 0.0)
+    weights.update({
+        "high_amount_ratio": 6 * 0.35,
+        "elevated_amount_ratio": 6 * 0.2,
+        "repeat_claim": 6 * 0.25,
+        "risk_high": 6 * RISK_WEIGHTS["HIGH"],
+        "risk_medium": 6 * RISK_WEIGHTS["MEDIUM"],
+    })
+    return FraudModel("baseline", [weights[f] for f in FEATURE_NAMES], bias=-3.0,
+                      info={"source": "fraud_rules"})
+
+
+def artifact_path(model_dir: str, version: str) -> str:
+    return os.path.join(model_dir, f"fraud-{version}.json")
+
+
+def save_artifact(model: FraudModel, model_dir: str) -> str:
+    """Write ``model`` as a new artifact (never overwrites a version)"""
+    os.makedirs(model_dir, exist_ok=True)
+    path = artifact_path(model_dir, model.version)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(model.to_dict(), f, indent=1)
+    os.link(tmp, path)  # fails if the version already exists
+    os.remove(tmp)
+    return path
+
+
+def load_artifact(model_dir: str, version: str) -> FraudModel:
+    with open(artifact_path(model_dir, version)) as f:
+        return FraudModel.from_dict(json.load(f))
+
+
+def current_version(model_dir: str) -> Optional[str]:
+    try:
+        with open(os.path.join(model_dir, CURRENT_POINTER)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def set_current(model_dir: str, version: str):
+    """Point CURRENT at ``version``; readers see the old or new name, never a partial write"""
+    if not os.path.exists(artifact_path(model_dir, version)):
+        raise FileNotFoundError(f"No fraud model artifact for version {version}")
+    tmp = os.path.join(model_dir, f"{CURRENT_POINTER}.{os.getpid()}.tmp")
+    with open(tmp, "w") as f:
+        f.write(version)
+    os.replace(tmp, os.path.join(model_dir, CURRENT_POINTER))
+
+
+def list_versions(model_dir: str) -> List[Dict[str, Any]]:
+    """Every published artifact's version, metrics and training info, newest first"""
+    versions = []
+    if not os.path.isdir(model_dir):
+        return versions
+    for name in os.listdir(model_dir):
+        if not (name.startswith("fraud-") and name.endswith(".json")):
+            continue
+        try:
+            with open(os.path.join(model_dir, name)) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        versions.append({key: data.get(key) for key in ("version", "trained_at", "threshold", "metrics", "info")})
+    return sorted(versions, key=lambda v: v["trained_at"] or 0, reverse=True)
+
+
+def load_current(model_dir: str) -> FraudModel:
+    """The served model; publishes the rule baseline on first use"""
+    version = current_version(model_dir)
+    if version is None:
+        model = baseline_model()
+        if not os.path.exists(artifact_path(model_dir, model.version)):
+            try:
+                save_artifact(model, model_dir)
+            except FileExistsError:
+                pass  # another process published it first
+        set_current(model_dir, model.version)
+        return model
+    return load_artifact(model_dir, version)
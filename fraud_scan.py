@@ -0,0 +1,231 @@
+import functools
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import pandas as pd
+
+from config import (
+    LOCAL_DATA_DIR,
+    FRAUD_SCAN_CHUNK_ROWS,
+    FRAUD_SCAN_MAX_WORKERS,
+)
+from database import get_policyholder_db
+from fraud_rules import SCAN_COLUMNS, score_claims
+from local_db import connect_sqlite
+
+logger = logging.getLogger(__name__)
+
+
+def _fetch_chunks(cursor, chunk_size: int, columns=SCAN_COLUMNS) -> Iterator[pd.DataFrame]:
+    """Yield DataFrames of ``chunk_size`` rows, via Arrow when the driver can"""
+    if hasattr(cursor, "fetchmany_arrow"):
+        while True:
+            batch = cursor.fetchmany_arrow(chunk_size)
+            if batch.num_rows == 0:
+                return
+            yield batch.to_pandas()
+    else:
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield pd.DataFrame.from_records(rows, columns=columns)
+
+
+def _whole_employees(chunks: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    """Re-cut chunks so no employee's claims are split across two chunks.
+
+    Rows arrive ordered by EmployeeID, so only the last employee of a chunk
+    can continue into the next one; those rows are held back and prepended.
+    """
+    carry = None
+    for chunk in chunks:
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+        last = chunk["EmployeeID"].iloc[-1]
+        tail = chunk["EmployeeID"].to_numpy() == last
+        if tail.all():
+            carry = chunk
+            continue
+        carry = chunk.loc[tail].reset_index(drop=True)
+        yield chunk.loc[~tail].reset_index(drop=True)
+    if carry is not None and not carry.empty:
+        yield carry
+
+
+class FraudScanEngine:
+    """Streams insurance_data in chunks and scores them on a process pool.
+
+    At most ``2 * max_workers`` chunks are in flight at once, so memory use
+    is bounded by chunk size rather than table size. Flagged claims are
+    written to a local results table, one row per claim, tagged by scan id.
+    """
+
+    def __init__(self, db, results_path: Optional[str] = None,
+                 chunk_size: int = FRAUD_SCAN_CHUNK_ROWS,
+                 max_workers: int = FRAUD_SCAN_MAX_WORKERS):
+        self.db = db
+        self.results_path = results_path or os.path.join(LOCAL_DATA_DIR, "fraud_scan.db")
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._init_results()
+
+    def _init_results(self):
+        conn = connect_sqlite(self.results_path)
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS fraud_scans (
+            scan_id TEXT PRIMARY KEY,
+            started_at TIMESTAMP NOT NULL,
+            finished_at TIMESTAMP,
+            rows_scanned INTEGER DEFAULT 0,
+            flagged INTEGER DEFAULT 0,
+            rows_per_second REAL,
+            status TEXT NOT NULL
+        )
+        ''')
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS fraud_scan_results (
+            scan_id TEXT NOT NULL,
+            employee_id TEXT NOT NULL,
+            policy_number TEXT,
+            claim_date TEXT,
+            claim_status TEXT,
+            amount REAL,
+            coverage REAL,
+            fraud_risk TEXT,
+            score REAL NOT NULL,
+            reasons TEXT
+        )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_scan_results_scan ON fraud_scan_results (scan_id, score DESC)')
+        conn.commit()
+        conn.close()
+
+    def run(self, progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Scan the whole table; ``progress`` is called after every chunk"""
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("A fraud scan is already running")
+        try:
+            return self._run(progress)
+        finally:
+            self._lock.release()
+
+    def _run(self, progress) -> Dict[str, Any]:
+        scan_id = uuid.uuid4().hex[:12]
+        started = time.perf_counter()
+        source = f"{self.db.database}.{self.db.table}"
+        stats = {"scan_id": scan_id, "rows_scanned": 0, "flagged": 0,
+                 "total_rows": None, "elapsed": 0.0, "rows_per_second": 0.0}
+
+        results = connect_sqlite(self.results_path)
+        with results:
+            results.execute(
+                "INSERT INTO fraud_scans (scan_id, started_at, status) VALUES (?, ?, 'running')",
+                (scan_id, datetime.now())
+            )
+
+        # Spawned workers only import fraud_rules, never Streamlit
+        context = multiprocessing.get_context("spawn")
+        status = "failed"
+        try:
+            with self.db.connection() as conn, closing(conn.cursor()) as cursor, \
+                    ProcessPoolExecutor(self.max_workers, mp_context=context) as pool:
+                cursor.execute(f"SELECT COUNT(*) FROM {source}")
+                stats["total_rows"] = int(cursor.fetchone()[0])
+
+                cursor.execute(
+                    f"SELECT {', '.join(SCAN_COLUMNS)} FROM {source} "
+                    f"ORDER BY EmployeeID, ClaimDate"
+                )
+                in_flight = deque()
+                for chunk in _whole_employees(_fetch_chunks(cursor, self.chunk_size)):
+                    in_flight.append((len(chunk), pool.submit(score_claims, chunk)))
+                    del chunk
+                    if len(in_flight) >= 2 * self.max_workers:
+                        self._collect(in_flight.popleft(), scan_id, results, stats, started, progress)
+                while in_flight:
+                    self._collect(in_flight.popleft(), scan_id, results, stats, started, progress)
+            status = "completed"
+        finally:
+            with results:
+                results.execute('''
+                UPDATE fraud_scans
+                SET finished_at = ?, rows_scanned = ?, flagged = ?, rows_per_second = ?, status = ?
+                WHERE scan_id = ?
+                ''', (datetime.now(), stats["rows_scanned"], stats["flagged"],
+                      stats["rows_per_second"], status, scan_id))
+            results.close()
+
+        logger.info(f"✅ Fraud scan {scan_id}: {stats['rows_scanned']:,} rows, "
+                    f"{stats['flagged']:,} flagged, {stats['rows_per_second']:,.0f} rows/s")
+        return stats
+
+    @staticmethod
+    def _collect(item, scan_id, results, stats, started, progress):
+        rows, future = item
+        flagged = future.result()
+        if not flagged.empty:
+            records = zip(
+                [scan_id] * len(flagged),
+                flagged["EmployeeID"].astype(str),
+                flagged["PolicyNumber"].astype(str),
+                flagged["ClaimDate"].astype(str),
+                flagged["ClaimStatus"].astype(str),
+                pd.to_numeric(flagged["LastClaimAmountUSD"], errors="coerce").astype(float),
+                pd.to_numeric(flagged["CoverageAmountUSD"], errors="coerce").astype(float),
+                flagged["FraudRisk"].astype(str),
+                flagged["score"].astype(float),
+                flagged["reasons"].astype(str),
+            )
+            with results:
+                results.executemany(
+                    "INSERT INTO fraud_scan_results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    records
+                )
+        stats["rows_scanned"] += rows
+        stats["flagged"] += len(flagged)
+        stats["elapsed"] = time.perf_counter() - started
+        stats["rows_per_second"] = stats["rows_scanned"] / stats["elapsed"] if stats["elapsed"] else 0.0
+        if progress is not None:
+            progress(dict(stats))
+
+    def latest_results(self, limit: int = 100) -> pd.DataFrame:
+        """Flagged claims of the most recent completed scan, highest score first"""
+        conn = connect_sqlite(self.results_path)
+        try:
+            return pd.read_sql_query('''
+            SELECT employee_id, policy_number, claim_date, claim_status, amount,
+                   coverage, fraud_risk, score, reasons
+            FROM fraud_scan_results
+            WHERE scan_id = (
+                SELECT scan_id FROM fraud_scans WHERE status = 'completed'
+                ORDER BY started_at DESC LIMIT 1
+            )
+            ORDER BY score DESC
+            LIMIT ?
+            ''', conn, params=(limit,))
+        finally:
+            conn.close()
+
+
+@functools.lru_cache(maxsize=None)
+def get_fraud_scan_engine() -> FraudScanEngine:
+    """Process-wide instance, created on first use"""
+    return FraudScanEngine(get_policyholder_db())
+
+
+def __getattr__(name):
+    # Keeps ``from fraud_scan import fraud_scan_engine`` working without import-time setup
+    if name == "fraud_scan_engine":
+        return get_fraud_scan_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
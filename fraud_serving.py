@@ -0,0 +1,164 @@
+import functools
+import queue
+import threading
+import time
+import logging
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from config import (
+    FRAUD_MODEL_DIR,
+    FRAUD_BATCH_MAX_SIZE,
+    FRAUD_BATCH_MAX_WAIT_MS,
+    FRAUD_SCORE_TIMEOUT_SECONDS,
+    FRAUD_MODEL_RELOAD_SECONDS,
+)
+from fraud_model import FraudModel, build_features, claim_record, current_version, load_artifact, load_current
+from instrumentation import metrics
+
+logger = logging.getLogger(__name__)
+
+# Batch sizes, not seconds
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class FraudScorer:
+    """Scores claims with the current fraud model, coalescing concurrent requests.
+
+    The model is loaded once per process. ``score`` queues the claim and
+    waits on a future; one scoring thread takes the first waiting request,
+    keeps collecting until ``max_batch`` requests are queued or ``max_wait``
+    has passed since the first arrived, then builds the whole batch's
+    features in one vectorized pass and predicts them together. Under light
+    load a request waits at most ``max_wait``; under heavy load batches fill
+    before the deadline. Batch size, queue wait and inference time are
+    recorded in ``metrics``.
+
+    A watcher thread follows the model directory's ``CURRENT`` pointer and
+    swaps in a newly published version. The artifact is loaded off the
+    scoring thread and replaces ``self.model`` in one assignment, so no
+    request waits on the load and every batch uses a single version.
+    """
+
+    def __init__(self, model: Optional[FraudModel] = None, model_dir: str = FRAUD_MODEL_DIR,
+                 max_batch: int = FRAUD_BATCH_MAX_SIZE,
+                 max_wait_ms: float = FRAUD_BATCH_MAX_WAIT_MS,
+                 reload_interval: float = FRAUD_MODEL_RELOAD_SECONDS):
+        self.model_dir = model_dir
+        self.model = model or load_current(model_dir)
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue[Tuple[Dict[str, Any], float, Future]]" = queue.Queue()
+        self.reload_interval = reload_interval
+        self._stats = {"requests": 0, "batches": 0, "errors": 0, "largest_batch": 0, "swaps": 0}
+        self._reload_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="fraud-scorer", daemon=True)
+        self._thread.start()
+        if reload_interval:
+            threading.Thread(target=self._watch, name="fraud-model-watch", daemon=True).start()
+        logger.info(f"✅ Fraud model {self.model.version} loaded")
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def submit(self, claim: Dict[str, Any]) -> Future:
+        """Queue one claim (form fields, see ``claim_record``); returns a Future"""
+        future: Future = Future()
+        self._queue.put((claim_record(claim), time.perf_counter(), future))
+        return future
+
+    def score(self, claim: Dict[str, Any], timeout: float = FRAUD_SCORE_TIMEOUT_SECONDS) -> Dict[str, Any]:
+        """``{"score", "flagged", "reasons", "model_version"}`` for one claim"""
+        return self.submit(claim).result(timeout)
+
+    def reload(self) -> bool:
+        """Swap to the version CURRENT names, if it changed; True when swapped"""
+        with self._reload_lock:
+            version = current_version(self.model_dir)
+            if version is None or version == self.model.version:
+                return False
+            model = load_artifact(self.model_dir, version)
+            previous, self.model = self.model.version, model
+            with self._stats_lock:
+                self._stats["swaps"] += 1
+        metrics.inc("fraud_model_swaps_total")
+        logger.info(f"✅ Fraud model swapped {previous} -> {model.version}")
+        return True
+
+    def _watch(self):
+        while True:
+            time.sleep(self.reload_interval)
+            try:
+                self.reload()
+            except Exception as e:
+                logger.error(f"❌ Fraud model reload failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        requests, batches = stats["requests"], stats["batches"]
+        stats.update(queue_depth=self._queue.qsize(), model_version=self.model.version,
+                     mean_batch=requests / batches if batches else 0.0)
+        return stats
+
+    # ------------------------------------------------------------------
+    # Batching
+    # ------------------------------------------------------------------
+    def _collect(self) -> List[Tuple[Dict[str, Any], float, Future]]:
+        batch = [self._queue.get()]
+        deadline = batch[0][1] + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            for _, queued_at, _ in batch:
+                metrics.observe("fraud_queue_wait_seconds", started - queued_at)
+            model = self.model  # one version per batch, even across a swap
+            try:
+                frame = pd.DataFrame.from_records([record for record, _, _ in batch])
+                X = build_features(frame)
+                probability = model.predict_proba(X)
+                reasons = model.reasons(X)
+            except Exception as e:
+                logger.error(f"❌ Fraud scoring batch failed: {e}")
+                with self._stats_lock:
+                    self._stats["errors"] += 1
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            metrics.observe("fraud_inference_seconds", time.perf_counter() - started)
+            metrics.histogram("fraud_batch_size", buckets=BATCH_SIZE_BUCKETS).observe(len(batch))
+            metrics.inc("fraud_scored_total", len(batch), model=model.version)
+            with self._stats_lock:
+                self._stats["requests"] += len(batch)
+                self._stats["batches"] += 1
+                self._stats["largest_batch"] = max(self._stats["largest_batch"], len(batch))
+            for (_, _, future), p, why in zip(batch, probability, reasons):
+                future.set_result({"score": round(float(p), 3), "flagged": bool(p >= model.threshold),
+                                   "reasons": why, "model_version": model.version})
+
+
+@functools.lru_cache(maxsize=None)
+def get_fraud_scorer() -> FraudScorer:
+    """Process-wide instance, created on first use"""
+    scorer = FraudScorer()
+    metrics.register_collector("fraud_scorer", scorer.stats)
+    return scorer
+
+
+def __getattr__(name):
+    # Keeps ``from fraud_serving import fraud_scorer`` working without import-time setup
+    if name == "fraud_scorer":
+        return get_fraud_scorer()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
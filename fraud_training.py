@@ -0,0 +1,313 @@
+import functools
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+from config import (
+    FRAUD_MODEL_DIR,
+    FRAUD_TRAINING_CHUNK_ROWS,
+    FRAUD_TRAINING_MAX_WORKERS,
+    FRAUD_TRAINING_EPOCHS,
+    FRAUD_TRAINING_BATCH_ROWS,
+    FRAUD_TRAINING_LEARNING_RATE,
+    FRAUD_TRAINING_L2,
+    FRAUD_TRAINING_HOLDOUT_ROWS,
+    FRAUD_TRAINING_MIN_AUC,
+)
+from database import get_policyholder_db
+from fraud_model import (
+    FEATURE_NAMES,
+    TRAINING_COLUMNS,
+    FraudModel,
+    current_version,
+    list_versions,
+    save_artifact,
+    set_current,
+    training_batch,
+)
+from fraud_scan import _fetch_chunks, _whole_employees
+
+logger = logging.getLogger(__name__)
+
+
+def _rss_mb() -> float:
+    """Resident set size of this process in MB (0 where /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+def _auc(scores: np.ndarray, labels: np.ndarray) -> Optional[float]:
+    positives = int(labels.sum())
+    negatives = len(labels) - positives
+    if not positives or not negatives:
+        return None
+    order = np.argsort(scores, kind="mergesort")
+    ranks = np.empty(len(scores))
+    ranks[order] = np.arange(1, len(scores) + 1)
+    return float((ranks[labels == 1].sum() - positives * (positives + 1) / 2) / (positives * negatives))
+
+
+def evaluate(model: FraudModel, X: np.ndarray, y: np.ndarray) -> Dict[str, Any]:
+    """AUC, log loss and precision/recall at the model's threshold"""
+    if not len(y):
+        return {"holdout_rows": 0}
+    p = model.predict_proba(X)
+    eps = 1e-12
+    flagged = p >= model.threshold
+    true_positives = float((flagged & (y == 1)).sum())
+    return {
+        "holdout_rows": int(len(y)),
+        "positive_rate": float(y.mean()),
+        "auc": _auc(p, y),
+        "log_loss": float(-np.mean(y * np.log(p + eps) + (1 - y) * np.log(1 - p + eps))),
+        "precision": true_positives / float(flagged.sum()) if flagged.any() else 0.0,
+        "recall": true_positives / float(y.sum()) if y.any() else 0.0,
+        "flag_rate": float(flagged.mean()),
+    }
+
+
+def _best_threshold(model: FraudModel, X: np.ndarray, y: np.ndarray) -> float:
+    """Threshold with the best F1 on the tuning half of the holdout sample"""
+    if not len(y) or not y.any():
+        return 0.5
+    p = model.predict_proba(X)
+    order = np.argsort(-p)
+    hits = np.cumsum(y[order])
+    precision = hits / np.arange(1, len(y) + 1)
+    recall = hits / y.sum()
+    f1 = np.divide(2 * precision * recall, precision + recall,
+                   out=np.zeros_like(precision), where=precision + recall > 0)
+    return float(p[order][int(np.argmax(f1))])
+
+
+def _split_holdout(X: np.ndarray, y: np.ndarray, seed: int = 7):
+    """Random halves of the holdout sample: ``(X_tune, y_tune), (X_eval, y_eval)``.
+
+    The threshold is tuned on one half and metrics come from the other, so
+    the reported precision and recall are not fitted to the rows they are
+    measured on.
+    """
+    order = np.random.default_rng(seed).permutation(len(y))
+    tune, held = order[:len(y) // 2], order[len(y) // 2:]
+    return (X[tune], y[tune]), (X[held], y[held])
+
+
+class _Holdout:
+    """Fixed-size uniform sample of holdout rows (reservoir sampling)"""
+
+    def __init__(self, capacity: int, seed: int = 7):
+        self.X = np.zeros((capacity, len(FEATURE_NAMES)))
+        self.y = np.zeros(capacity)
+        self.capacity = capacity
+        self.filled = 0
+        self.seen = 0
+        self._rng = np.random.default_rng(seed)
+
+    def add(self, X: np.ndarray, y: np.ndarray):
+        take = min(self.capacity - self.filled, len(y))
+        self.X[self.filled:self.filled + take] = X[:take]
+        self.y[self.filled:self.filled + take] = y[:take]
+        self.filled += take
+        rest = len(y) - take
+        if rest:
+            seen = self.seen + take + np.arange(1, rest + 1)
+            slots = self._rng.integers(0, seen)
+            keep = slots < self.capacity
+            self.X[slots[keep]] = X[take:][keep]
+            self.y[slots[keep]] = y[take:][keep]
+        self.seen += len(y)
+
+    def sample(self):
+        return self.X[:self.filled], self.y[:self.filled]
+
+
+class FraudModelTrainer:
+    """Trains fraud model versions out of core from insurance_data.
+
+    The table is streamed in chunks of whole employees, like the fraud
+    scan. Worker processes build each chunk's features and labels; the
+    main process fits a standardized logistic regression with mini-batch
+    Adam as chunks arrive, so memory is bounded by the chunks in flight
+    plus a fixed-size holdout sample, never by the table. Standardization
+    comes from the first chunk. One employee in ten is held out; the
+    decision threshold is the best-F1 point on a random half of the holdout
+    sample and the metrics are measured on the other half.
+
+    Each run writes a new artifact with its metrics and training info
+    (rows, wall time, peak RSS). If its holdout AUC reaches ``min_auc`` the
+    ``CURRENT`` pointer moves to it, which serving processes pick up without
+    a restart (see ``FraudScorer.reload``); otherwise it is kept for review
+    and can be activated by hand.
+    """
+
+    def __init__(self, db, model_dir: str = FRAUD_MODEL_DIR,
+                 chunk_size: int = FRAUD_TRAINING_CHUNK_ROWS,
+                 max_workers: int = FRAUD_TRAINING_MAX_WORKERS,
+                 epochs: int = FRAUD_TRAINING_EPOCHS,
+                 batch_rows: int = FRAUD_TRAINING_BATCH_ROWS,
+                 learning_rate: float = FRAUD_TRAINING_LEARNING_RATE,
+                 l2: float = FRAUD_TRAINING_L2,
+                 holdout_rows: int = FRAUD_TRAINING_HOLDOUT_ROWS,
+                 min_auc: float = FRAUD_TRAINING_MIN_AUC):
+        self.db = db
+        self.model_dir = model_dir
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.epochs = epochs
+        self.batch_rows = batch_rows
+        self.learning_rate = learning_rate
+        self.l2 = l2
+        self.holdout_rows = holdout_rows
+        self.min_auc = min_auc
+        self._lock = threading.Lock()
+
+    def run(self, progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+            publish: bool = True) -> FraudModel:
+        """Train and save a new version, publishing it if it evaluates well enough;
+        ``progress`` gets stats after every chunk"""
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("Fraud model training is already running")
+        try:
+            model = self._train(progress)
+            auc = model.metrics.get("auc")
+            model.info["published"] = bool(publish and auc is not None and auc >= self.min_auc)
+            save_artifact(model, self.model_dir)
+            logger.info(f"✅ Fraud model {model.version} trained on {model.info['train_rows']:,} rows "
+                        f"in {model.info['wall_seconds']:.1f}s (AUC {auc})")
+            if model.info["published"]:
+                self.activate(model.version)
+            elif publish:
+                logger.warning(f"⚠️ Fraud model {model.version} not published: "
+                               f"holdout AUC {auc} is below {self.min_auc}")
+            return model
+        finally:
+            self._lock.release()
+
+    # ------------------------------------------------------------------
+    # Training
+    # ------------------------------------------------------------------
+    def _train(self, progress) -> FraudModel:
+        n = len(FEATURE_NAMES)
+        state = {
+            "w": np.zeros(n), "b": 0.0, "mean": None, "scale": None, "step": 0,
+            "m": np.zeros(n + 1), "v": np.zeros(n + 1),
+        }
+        holdout = _Holdout(self.holdout_rows)
+        started = time.perf_counter()
+        stats = {"epoch": 0, "epochs": self.epochs, "rows": 0, "train_rows": 0, "total_rows": None,
+                 "elapsed": 0.0, "rows_per_second": 0.0, "rss_mb": _rss_mb(), "peak_rss_mb": _rss_mb()}
+        source = f"{self.db.database}.{self.db.table}"
+        context = multiprocessing.get_context("spawn")
+
+        with ProcessPoolExecutor(self.max_workers, mp_context=context) as pool:
+            for epoch in range(self.epochs):
+                stats["epoch"] = epoch + 1
+                with self.db.connection() as conn, closing(conn.cursor()) as cursor:
+                    if stats["total_rows"] is None:
+                        cursor.execute(f"SELECT COUNT(*) FROM {source}")
+                        stats["total_rows"] = int(cursor.fetchone()[0]) * self.epochs
+                    cursor.execute(f"SELECT {', '.join(TRAINING_COLUMNS)} FROM {source} "
+                                   f"ORDER BY EmployeeID, ClaimDate")
+                    chunks = _whole_employees(_fetch_chunks(cursor, self.chunk_size, TRAINING_COLUMNS))
+                    in_flight = deque()
+                    for chunk in chunks:
+                        in_flight.append(pool.submit(training_batch, chunk))
+                        del chunk
+                        if len(in_flight) >= 2 * self.max_workers:
+                            self._consume(in_flight.popleft(), state, holdout, epoch, stats, started, progress)
+                    while in_flight:
+                        self._consume(in_flight.popleft(), state, holdout, epoch, stats, started, progress)
+
+        if state["mean"] is None:
+            raise RuntimeError(f"No training rows in {source}")
+        (X_tune, y_tune), (X_eval, y_eval) = _split_holdout(*holdout.sample())
+        # Suffixed so two runs finishing in the same second get distinct artifacts
+        version = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        model = FraudModel(version, state["w"], state["b"], state["mean"], state["scale"])
+        model.threshold = _best_threshold(model, X_tune, y_tune)
+        model.metrics = dict(evaluate(model, X_eval, y_eval), threshold_rows=int(len(y_tune)))
+        model.info = {
+            "source": source,
+            "train_rows": stats["train_rows"],
+            "rows_read": stats["rows"],
+            "epochs": self.epochs,
+            "wall_seconds": time.perf_counter() - started,
+            "peak_rss_mb": stats["peak_rss_mb"],
+            "previous_version": current_version(self.model_dir),
+        }
+        return model
+
+    def _consume(self, future, state, holdout, epoch, stats, started, progress):
+        X, y, is_holdout = future.result()
+        if state["mean"] is None:
+            train = X[~is_holdout] if (~is_holdout).any() else X
+            state["mean"] = train.mean(axis=0)
+            scale = train.std(axis=0)
+            state["scale"] = np.where(scale > 0, scale, 1.0)
+        if epoch == 0:
+            holdout.add(X[is_holdout], y[is_holdout])
+        X_train = (X[~is_holdout] - state["mean"]) / state["scale"]
+        self._fit(state, X_train, y[~is_holdout])
+
+        stats["rows"] += len(y)
+        stats["train_rows"] += len(X_train)
+        stats["elapsed"] = time.perf_counter() - started
+        stats["rows_per_second"] = stats["rows"] / stats["elapsed"] if stats["elapsed"] else 0.0
+        stats["rss_mb"] = _rss_mb()
+        stats["peak_rss_mb"] = max(stats["peak_rss_mb"], stats["rss_mb"])
+        if progress is not None:
+            progress(dict(stats))
+
+    def _fit(self, state, X: np.ndarray, y: np.ndarray, beta1: float = 0.9, beta2: float = 0.999):
+        """Mini-batch Adam steps over one standardized chunk"""
+        for start in range(0, len(y), self.batch_rows):
+            xb, yb = X[start:start + self.batch_rows], y[start:start + self.batch_rows]
+            error = 1.0 / (1.0 + np.exp(-np.clip(xb @ state["w"] + state["b"], -50, 50))) - yb
+            grad = np.append(xb.T @ error / len(yb) + self.l2 * state["w"], error.mean())
+            state["step"] += 1
+            state["m"] = beta1 * state["m"] + (1 - beta1) * grad
+            state["v"] = beta2 * state["v"] + (1 - beta2) * grad ** 2
+            m_hat = state["m"] / (1 - beta1 ** state["step"])
+            v_hat = state["v"] / (1 - beta2 ** state["step"])
+            update = self.learning_rate * m_hat / (np.sqrt(v_hat) + 1e-8)
+            state["w"] = state["w"] - update[:-1]
+            state["b"] = state["b"] - update[-1]
+
+    # ------------------------------------------------------------------
+    # Versions
+    # ------------------------------------------------------------------
+    def versions(self):
+        return list_versions(self.model_dir)
+
+    def current_version(self) -> Optional[str]:
+        return current_version(self.model_dir)
+
+    def activate(self, version: str):
+        """Point serving at an existing version (rollback or roll forward)"""
+        set_current(self.model_dir, version)
+        logger.info(f"✅ Fraud model {version} activated")
+
+
+@functools.lru_cache(maxsize=None)
+def get_fraud_model_trainer() -> FraudModelTrainer:
+    """Process-wide instance, created on first use"""
+    return FraudModelTrainer(get_policyholder_db())
+
+
+def __getattr__(name):
+    # Keeps ``from fraud_training import fraud_model_trainer`` working without import-time setup
+    if name == "fraud_model_trainer":
+        return get_fraud_model_trainer()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
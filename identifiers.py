@@ -0,0 +1,286 @@
+import re
+import threading
+import time
+import logging
+from contextlib import closing
+from typing import Any, Callable, ContextManager, Dict, Iterable, Optional, Tuple
+
+from local_db import connect_sqlite
+
+logger = logging.getLogger(__name__)
+
+EMPLOYEE_ID = "EmployeeID"
+EMAIL = "Email"
+POLICY_NUMBER = "PolicyNumber"
+
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+
+def classify_identifier(identifier: str) -> Optional[str]:
+    """Return the column a login identifier belongs to, or None if unknown.
+
+    Anything shaped like an email address is an Email (checked first, so
+    "emp.smith@corp.com" is not taken for an EmployeeID), then EMP… is an
+    EmployeeID and POL… a PolicyNumber. Callers fall back to the
+    three-column OR lookup for None so unusual identifiers still work.
+    """
+    if not identifier:
+        return None
+    value = identifier.strip()
+    if _EMAIL_RE.match(value):
+        return EMAIL
+    upper = value.upper()
+    if upper.startswith("EMP"):
+        return EMPLOYEE_ID
+    if upper.startswith("POL"):
+        return POLICY_NUMBER
+    return None
+
+
+# Numeric part of EmployeeID; IDs are not zero-padded, so they only sort
+# in assignment order as numbers ('EMP135001' < 'EMP99999' as text)
+EMPLOYEE_KEY_SQL = "CAST(SUBSTR(EmployeeID, 4) AS BIGINT)"
+
+
+class IdentifierIndex:
+    """Locally materialized identifier -> EmployeeID index.
+
+    Backed by a small SQLite file and refreshed incrementally from the
+    warehouse. With a ``change_column`` (a timestamp the warehouse sets on
+    every insert and update) each refresh pulls every changed row, so edited
+    emails and policy numbers replace the old ones and the index stays
+    complete. Without one, refreshes pull new employees by the numeric
+    EmployeeID key and only a full rebuild, every ``full_refresh_interval``
+    seconds, picks up edits. A miss may be rejected without a remote query
+    only while the index is complete (``is_complete``); otherwise callers
+    must ask the warehouse. ``start`` keeps it refreshed on a daemon thread,
+    so logins only ever read it.
+    """
+
+    def __init__(self, db_path: str, change_column: Optional[str] = None,
+                 refresh_interval: float = 300.0, full_refresh_interval: float = 3600.0,
+                 batch_size: int = 50000):
+        self.db_path = db_path
+        self.change_column = change_column
+        self.refresh_interval = refresh_interval
+        self.full_refresh_interval = full_refresh_interval
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_refresh = 0.0
+        self.local_hits = 0
+        self.local_rejects = 0
+
+        self._conn = connect_sqlite(db_path)
+        with self._conn:
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(identifiers)")]
+            if columns and "generation" not in columns:
+                # Index files from before full rebuilds: just a cache, so start over
+                self._conn.execute("DROP TABLE identifiers")
+                self._conn.execute("DROP TABLE IF EXISTS index_state")
+            self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS identifiers (
+                identifier TEXT PRIMARY KEY,
+                employee_id TEXT NOT NULL,
+                generation INTEGER NOT NULL
+            ) WITHOUT ROWID
+            ''')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_identifiers_employee ON identifiers (employee_id)')
+            self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS index_state (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+            ''')
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+    def _get_state(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM index_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    @property
+    def watermark(self) -> Optional[str]:
+        return self._get_state("watermark")
+
+    @property
+    def is_loaded(self) -> bool:
+        """True once a full rebuild has completed"""
+        return self._get_state("full_refresh_at") is not None
+
+    def is_stale(self) -> bool:
+        return time.monotonic() - self._last_refresh > self.refresh_interval
+
+    def is_complete(self) -> bool:
+        """True while every current identifier is known to be in the index,
+        so a miss means the identifier does not exist"""
+        if self.change_column:
+            return self.is_loaded and not self.is_stale()
+        full_refresh_at = self._get_state("full_refresh_at")
+        return full_refresh_at is not None and time.time() - float(full_refresh_at) <= self.refresh_interval
+
+    def lookup(self, identifier: str) -> Optional[str]:
+        """Resolve any login identifier to its EmployeeID locally"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT employee_id FROM identifiers WHERE identifier = ?",
+                (identifier.strip(),)
+            ).fetchone()
+        if row:
+            self.local_hits += 1
+            return row[0]
+        return None
+
+    def record_reject(self):
+        self.local_rejects += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM identifiers").fetchone()[0]
+        return {
+            "identifiers": size,
+            "watermark": self.watermark,
+            "complete": self.is_complete(),
+            "local_hits": self.local_hits,
+            "local_rejects": self.local_rejects,
+            "seconds_since_refresh": time.monotonic() - self._last_refresh
+                                     if self._last_refresh else None,
+        }
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+    def apply(self, rows: Iterable[Tuple[str, str, str]], watermark: Optional[Any] = None,
+              generation: int = 0, replace: bool = False):
+        """Upsert (EmployeeID, Email, PolicyNumber) rows and advance the watermark.
+
+        With ``replace`` the employees' previous identifiers are dropped
+        first, so an edited email or policy number stops resolving.
+        """
+        rows = [(str(r[0]).strip(), r[1], r[2]) for r in rows if r[0]]
+        entries = []
+        for employee_id, email, policy_number in rows:
+            for identifier in (employee_id, email, policy_number):
+                if identifier:
+                    entries.append((str(identifier).strip(), employee_id, generation))
+        with self._lock:
+            with self._conn:
+                if replace:
+                    self._conn.executemany("DELETE FROM identifiers WHERE employee_id = ?",
+                                           {(r[0],) for r in rows})
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO identifiers (identifier, employee_id, generation) VALUES (?, ?, ?)",
+                    entries
+                )
+                if watermark is not None:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO index_state (key, value) VALUES ('watermark', ?)",
+                        (str(watermark),)
+                    )
+
+    def refresh(self, conn, source: str, full: Optional[bool] = None) -> int:
+        """Pull new and, with a change column, changed rows from ``source``
+        over a DB-API connection; rebuild everything when ``full`` (default:
+        never loaded, or no change column and the full refresh is due).
+
+        Only one refresh runs at a time; concurrent callers return 0 right
+        away and keep using the current index contents.
+        """
+        if not self._refresh_lock.acquire(blocking=False):
+            return 0
+        try:
+            if full is None:
+                full_refresh_at = self._get_state("full_refresh_at")
+                full = full_refresh_at is None or (
+                    not self.change_column
+                    and time.time() - float(full_refresh_at) > self.full_refresh_interval
+                )
+            loaded = self._rebuild(conn, source) if full else self._incremental(conn, source)
+            self._last_refresh = time.monotonic()
+            if loaded:
+                logger.info(f"✅ Identifier index {'rebuilt' if full else 'refreshed'}: +{loaded} rows")
+            return loaded
+        finally:
+            self._refresh_lock.release()
+
+    def _watermark_sql(self) -> str:
+        return self.change_column or EMPLOYEE_KEY_SQL
+
+    def _rebuild(self, conn, source: str) -> int:
+        """Reload every row under a new generation, then drop the rest
+        (identifiers edited or deleted upstream)"""
+        started = time.time()
+        generation = int(self._get_state("generation") or 0) + 1
+        mark = self._watermark_sql()
+        loaded, watermark = 0, None
+        with closing(conn.cursor()) as cursor:
+            cursor.execute(f"SELECT EmployeeID, Email, PolicyNumber, MAX({mark}) FROM {source} "
+                           f"GROUP BY EmployeeID, Email, PolicyNumber")
+            while True:
+                batch = cursor.fetchmany(self.batch_size)
+                if not batch:
+                    break
+                newest = max((r[3] for r in batch if r[3] is not None), default=None)
+                if newest is not None and (watermark is None or newest > watermark):
+                    watermark = newest
+                self.apply(((r[0], r[1], r[2]) for r in batch), generation=generation)
+                loaded += len(batch)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM identifiers WHERE generation < ?", (generation,))
+            self._conn.executemany("INSERT OR REPLACE INTO index_state (key, value) VALUES (?, ?)", [
+                ("generation", str(generation)),
+                ("full_refresh_at", str(started)),
+                ("watermark", "" if watermark is None else str(watermark)),
+            ])
+        return loaded
+
+    def _incremental(self, conn, source: str) -> int:
+        watermark = self.watermark
+        if not watermark:
+            return self._rebuild(conn, source)
+        mark = self._watermark_sql()
+        bound = watermark if self.change_column else int(watermark)
+        generation = int(self._get_state("generation") or 0)
+        loaded = 0
+        with closing(conn.cursor()) as cursor:
+            cursor.execute(
+                f"SELECT EmployeeID, Email, PolicyNumber, MAX({mark}) AS mark FROM {source} WHERE {mark} > ? "
+                f"GROUP BY EmployeeID, Email, PolicyNumber ORDER BY mark",
+                (bound,)
+            )
+            while True:
+                batch = cursor.fetchmany(self.batch_size)
+                if not batch:
+                    break
+                self.apply(((r[0], r[1], r[2]) for r in batch), watermark=batch[-1][3],
+                           generation=generation, replace=bool(self.change_column))
+                loaded += len(batch)
+        return loaded
+
+    def start(self, connection: Callable[[], ContextManager], source: str):
+        """Refresh now and then twice per ``refresh_interval`` on a daemon
+        thread (so the index never goes stale between runs), borrowing a
+        warehouse connection from ``connection()`` each time"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._refresh_loop, args=(connection, source),
+                                            name="identifier-index", daemon=True)
+            self._thread.start()
+
+    def _refresh_loop(self, connection: Callable[[], ContextManager], source: str):
+        while True:
+            try:
+                with connection() as conn:
+                    self.refresh(conn, source)
+            except Exception as e:
+                logger.error(f"❌ Identifier index refresh failed: {e}")
+            if self._stop.wait(self.refresh_interval / 2):
+                return
+
+    def close(self):
+        self._stop.set()
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,286 @@
+"""
+In-process metrics: counters, latency histograms and pull-style gauges.
+
+Everything is aggregated in memory per server process. Histograms keep
+cumulative Prometheus buckets plus a bounded ring of recent samples, which
+is what the p50/p95/p99 figures and the System Analytics charts are
+computed from. Recording a sample is a perf_counter call and a locked
+append, cheap enough for every rerun.
+
+    from instrumentation import metrics
+
+    @metrics.timed("db_query_seconds", method="get_claims")
+    def get_claims(...): ...
+
+    with metrics.timer("page_render_seconds", page="admin_dashboard"):
+        admin_dashboard()
+
+``start_metrics_server`` optionally serves the Prometheus text format on a
+local port (see METRICS_PORT in config.py).
+"""
+
+import bisect
+import functools
+import threading
+import time
+import logging
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import METRICS_HOST, METRICS_PORT, METRICS_SAMPLE_WINDOW
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers cache hits (sub-ms) through slow warehouse queries
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Counter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    """Cumulative buckets for export plus recent (timestamp, value) samples"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+                 window: int = METRICS_SAMPLE_WINDOW):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._bucket_counts = [0] * (len(self.buckets) + 1)
+        self._samples: deque = deque(maxlen=window)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        with self._lock:
+            self._bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._samples.append((time.time(), value))
+            self.count += 1
+            self.sum += value
+
+    def samples(self) -> List[Tuple[float, float]]:
+        with self._lock:
+            return list(self._samples)
+
+    def summary(self) -> Dict[str, float]:
+        with self._lock:
+            ordered = sorted(v for _, v in self._samples)
+            count, total = self.count, self.sum
+        return {
+            "count": count,
+            "mean": total / count if count else 0.0,
+            "p50": _percentile(ordered, 0.50),
+            "p95": _percentile(ordered, 0.95),
+            "p99": _percentile(ordered, 0.99),
+            "max": ordered[-1] if ordered else 0.0,
+        }
+
+    def cumulative_buckets(self) -> List[Tuple[str, int]]:
+        with self._lock:
+            counts = list(self._bucket_counts)
+        out, running = [], 0
+        for bound, n in zip(self.buckets + (float("inf"),), counts):
+            running += n
+            out.append(("+Inf" if bound == float("inf") else repr(bound), running))
+        return out
+
+
+class MetricsRegistry:
+    """Named, labelled counters and histograms plus gauge collectors"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, LabelKey], Counter] = {}
+        self._histograms: Dict[Tuple[str, LabelKey], Histogram] = {}
+        self._collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+    def counter(self, name: str, **labels) -> Counter:
+        key = (name, _label_key(labels))
+        counter = self._counters.get(key)
+        if counter is None:
+            with self._lock:
+                counter = self._counters.setdefault(key, Counter())
+        return counter
+
+    def histogram(self, name: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, **labels) -> Histogram:
+        """``buckets`` only applies when the histogram is first created"""
+        key = (name, _label_key(labels))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram(buckets))
+        return histogram
+
+    def inc(self, name: str, amount: float = 1.0, **labels):
+        self.counter(name, **labels).inc(amount)
+
+    def observe(self, name: str, value: float, **labels):
+        self.histogram(name, **labels).observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Time the block into histogram ``name``, including when it raises"""
+        histogram = self.histogram(name, **labels)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            histogram.observe(time.perf_counter() - started)
+
+    def timed(self, name: str, **labels):
+        """Decorator form of ``timer``"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, **labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def register_collector(self, prefix: str, collect: Callable[[], Dict[str, Any]]):
+        """Export ``collect()``'s numeric values as ``<prefix>_<key>`` gauges at read time"""
+        with self._lock:
+            self._collectors[prefix] = collect
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+    def histogram_summaries(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = list(self._histograms.items())
+        rows = []
+        for (name, labels), histogram in sorted(items, key=lambda item: item[0]):
+            rows.append(dict(name=name, labels=dict(labels), **histogram.summary()))
+        return rows
+
+    def histogram_samples(self, name: str) -> Dict[LabelKey, List[Tuple[float, float]]]:
+        with self._lock:
+            items = [(labels, h) for (n, labels), h in self._histograms.items() if n == name]
+        return {labels: h.samples() for labels, h in items}
+
+    def counter_values(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = list(self._counters.items())
+        return [{"name": name, "labels": dict(labels), "value": c.value}
+                for (name, labels), c in sorted(items, key=lambda item: item[0])]
+
+    def gauge_values(self) -> Dict[str, float]:
+        with self._lock:
+            collectors = list(self._collectors.items())
+        gauges: Dict[str, float] = {}
+        for prefix, collect in collectors:
+            try:
+                values = collect()
+            except Exception as e:
+                logger.warning(f"⚠️ Metrics collector {prefix} failed: {e}")
+                continue
+            self._flatten(prefix, values, gauges)
+        return gauges
+
+    @classmethod
+    def _flatten(cls, prefix: str, values: Dict[str, Any], out: Dict[str, float]):
+        for key, value in values.items():
+            name = f"{prefix}_{key}"
+            if isinstance(value, dict):
+                cls._flatten(name, value, out)
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                out[name] = float(value)
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines: List[str] = []
+        with self._lock:
+            counters = sorted(self._counters.items(), key=lambda item: item[0])
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+        seen = set()
+        for (name, labels), counter in counters:
+            if name not in seen:
+                lines.append(f"# TYPE {name} counter")
+                seen.add(name)
+            lines.append(f"{name}{_format_labels(labels)} {counter.value}")
+        for (name, labels), histogram in histograms:
+            if name not in seen:
+                lines.append(f"# TYPE {name} histogram")
+                seen.add(name)
+            for bound, count in histogram.cumulative_buckets():
+                lines.append(f"{name}_bucket{_format_labels(labels, (('le', bound),))} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        for name, value in sorted(self.gauge_values().items()):
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+# ============================================
+# PROMETHEUS ENDPOINT
+# ============================================
+_server_lock = threading.Lock()
+_server: Optional[ThreadingHTTPServer] = None
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: Optional[int] = METRICS_PORT, host: str = METRICS_HOST) -> Optional[int]:
+    """Serve /metrics once per process; a no-op when ``port`` is unset"""
+    global _server
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+            except OSError as e:
+                logger.warning(f"⚠️ Metrics endpoint not started on {host}:{port}: {e}")
+                return None
+            threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+            logger.info(f"📈 Prometheus metrics on http://{host}:{port}/metrics")
+        return _server.server_address[1]
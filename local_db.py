@@ -0,0 +1,136 @@
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+import logging
+from typing import Any, Dict, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def connect_sqlite(path: str, check_same_thread: bool = False,
+                   cached_statements: int = 128) -> sqlite3.Connection:
+    """Open a long-lived SQLite connection tuned for concurrent local state.
+
+    WAL lets readers proceed while a writer holds the lock, ``synchronous=NORMAL``
+    is durable across application crashes in WAL mode, and the enlarged
+    statement cache keeps the prepared form of every query we issue.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=check_same_thread,
+                           cached_statements=cached_statements, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    return conn
+
+
+class WriteBehindQueue:
+    """Batches bookkeeping writes onto a background thread.
+
+    Statements are queued with ``submit`` and applied by a dedicated writer
+    connection in a single transaction, either every ``flush_interval``
+    seconds or as soon as ``max_batch`` statements are waiting. Callers never
+    wait on the SQLite write lock.
+    """
+
+    def __init__(self, db_path: str, flush_interval: float = 1.0, max_batch: int = 100,
+                 name: str = "write-behind"):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[Tuple[str, Sequence[Any]]]" = queue.Queue()
+        self._wake = threading.Event()
+        self._flushed = threading.Condition()
+        self._submitted = 0
+        self._applied = 0
+        self._closed = False
+        self.batches = 0
+        self.errors = 0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, sql: str, params: Sequence[Any] = ()):
+        """Queue a write; returns immediately"""
+        if self._closed:
+            raise RuntimeError("Write-behind queue is closed")
+        with self._flushed:
+            self._submitted += 1
+        self._queue.put((sql, tuple(params)))
+        if self._queue.qsize() >= self.max_batch:
+            self._wake.set()
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Block until everything submitted so far has been applied"""
+        with self._flushed:
+            target = self._submitted
+            self._wake.set()
+            return self._flushed.wait_for(lambda: self._applied >= target, timeout)
+
+    def close(self):
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        self._wake.set()
+        self._thread.join(timeout=5)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._flushed:
+            return {
+                "pending": self._submitted - self._applied,
+                "applied": self._applied,
+                "batches": self.batches,
+                "errors": self.errors,
+            }
+
+    def _drain(self) -> List[Tuple[str, Sequence[Any]]]:
+        items = []
+        while True:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                return items
+
+    def _run(self):
+        conn = connect_sqlite(self.db_path, check_same_thread=True)
+        try:
+            while True:
+                self._wake.wait(self.flush_interval)
+                self._wake.clear()
+                items = self._drain()
+                if items:
+                    self._apply(conn, items)
+                elif self._closed:
+                    return
+        finally:
+            conn.close()
+
+    def _apply(self, conn: sqlite3.Connection, items: List[Tuple[str, Sequence[Any]]]):
+        # Runs of the same statement become one executemany; order is kept
+        runs: List[Tuple[str, List[Sequence[Any]]]] = []
+        for sql, params in items:
+            if runs and runs[-1][0] == sql:
+                runs[-1][1].append(params)
+            else:
+                runs.append((sql, [params]))
+        started = time.perf_counter()
+        try:
+            with conn:
+                for sql, rows in runs:
+                    conn.executemany(sql, rows)
+            self.batches += 1
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"❌ Write-behind batch of {len(items)} failed: {e}")
+        finally:
+            with self._flushed:
+                self._applied += len(items)
+                self._flushed.notify_all()
+        logger.debug(f"Write-behind applied {len(items)} writes in "
+                     f"{(time.perf_counter() - started) * 1000:.1f}ms")
@@ -0,0 +1,292 @@
+import sqlite3
+import threading
+import time
+import logging
+from contextlib import closing
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+from config import (
+    DB_POOL_IDLE_TIMEOUT_SECONDS,
+    DB_POOL_CHECKOUT_TIMEOUT_SECONDS,
+    MIRROR_MAX_STALENESS_SECONDS,
+    MIRROR_SYNC_SECONDS,
+    MIRROR_LOOKBACK_DAYS,
+    MIRROR_FULL_RESYNC_HOURS,
+    MIRROR_SYNC_BATCH_ROWS,
+    MIRROR_POOL_MAX_SIZE,
+    WAREHOUSE_CHANGE_COLUMN,
+)
+from db_pool import ConnectionPool
+from local_db import connect_sqlite
+
+logger = logging.getLogger(__name__)
+
+# Columns the app reads from the warehouse table, besides the claim id
+MIRROR_COLUMNS = (
+    ("EmployeeID", "TEXT"),
+    ("FirstName", "TEXT"),
+    ("LastName", "TEXT"),
+    ("Email", "TEXT"),
+    ("PolicyNumber", "TEXT"),
+    ("PolicyStatus", "TEXT"),
+    ("CoverageAmountUSD", "REAL"),
+    ("ClaimDate", "DATE"),
+    ("ClaimType", "TEXT"),
+    ("ClaimStatus", "TEXT"),
+    ("LastClaimAmountUSD", "REAL"),
+    ("FraudRisk", "TEXT"),
+)
+
+
+def _parse_date(raw: bytes):
+    text = raw.decode()
+    return datetime.fromisoformat(text) if len(text) > 10 else date.fromisoformat(text)
+
+
+# Readers hand ClaimDate back as date objects, the same type the warehouse
+# returns, and keyset cursors built from them bind back as ISO strings
+sqlite3.register_converter("DATE", _parse_date)
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(sep=" "))
+
+
+def _local_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+class LocalMirror:
+    """SQLite copy of the warehouse table for profile and claim reads.
+
+    With a ``change_column`` (a timestamp the warehouse sets on every insert
+    and update) ``sync`` upserts every row changed since the last one, so
+    the mirror is as fresh as its last sync; a periodic full resync picks
+    up deletions. Without one, ``sync`` pulls only rows whose ClaimDate is
+    at or after the watermark minus a lookback window (recent claims still
+    change status), which misses edits to older rows such as PolicyStatus,
+    Email or coverage. The mirror then counts as fresh only as of its last
+    full resync, and full resyncs run often enough to stay within
+    ``max_staleness``. Readers get their own pool of
+    connections with the mirror attached read-only under the warehouse
+    database name, so ``DatabricksDatabase`` runs the same SQL against
+    either side. WAL keeps readers on the previous snapshot while a sync
+    is writing.
+    """
+
+    def __init__(self, db, path: str, watermark_column: str = "ClaimDate",
+                 change_column: Optional[str] = WAREHOUSE_CHANGE_COLUMN,
+                 max_staleness: float = MIRROR_MAX_STALENESS_SECONDS,
+                 sync_interval: float = MIRROR_SYNC_SECONDS,
+                 lookback_days: int = MIRROR_LOOKBACK_DAYS,
+                 full_resync_hours: float = MIRROR_FULL_RESYNC_HOURS,
+                 batch_rows: int = MIRROR_SYNC_BATCH_ROWS,
+                 pool_size: int = MIRROR_POOL_MAX_SIZE):
+        self.db = db
+        self.path = path
+        self.table = db.table
+        self.key_column = db.claim_id_column
+        self.watermark_column = watermark_column
+        self.change_column = change_column
+        self.max_staleness = max_staleness
+        self.sync_interval = sync_interval
+        self.lookback_days = lookback_days
+        self.full_resync_seconds = full_resync_hours * 3600
+        self.batch_rows = batch_rows
+        mirrored = MIRROR_COLUMNS + (((change_column, "TEXT"),) if change_column else ())
+        self.columns = (self.key_column,) + tuple(name for name, _ in mirrored)
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.syncs = 0
+        self.sync_errors = 0
+        self.last_sync_rows = 0
+        self.last_sync_seconds = 0.0
+
+        self._conn = connect_sqlite(path)
+        with self._conn:
+            columns = ",\n".join(f"{name} {kind}" for name, kind in mirrored)
+            self._conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {self.table} (
+                {self.key_column} TEXT PRIMARY KEY,
+                {columns}
+            )
+            ''')
+            self._conn.execute(f'CREATE INDEX IF NOT EXISTS idx_mirror_employee_claims '
+                               f'ON {self.table} (EmployeeID, ClaimDate DESC, {self.key_column} DESC)')
+            self._conn.execute(f'CREATE INDEX IF NOT EXISTS idx_mirror_email ON {self.table} (Email)')
+            self._conn.execute(f'CREATE INDEX IF NOT EXISTS idx_mirror_policy ON {self.table} (PolicyNumber)')
+            self._conn.execute(f'CREATE INDEX IF NOT EXISTS idx_mirror_watermark '
+                               f'ON {self.table} ({watermark_column})')
+            if change_column:
+                existing = [row[1] for row in self._conn.execute(f"PRAGMA table_info({self.table})")]
+                if change_column not in existing:
+                    self._conn.execute(f"ALTER TABLE {self.table} ADD COLUMN {change_column} TEXT")
+            self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS mirror_state (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+            ''')
+        # Without a change column only a full resync brings every row up to date
+        fresh_at = self._get_state("synced_at" if change_column else "full_sync_at")
+        self._synced_at = float(fresh_at) if fresh_at else None
+
+        self.pool = ConnectionPool(
+            self._connect_reader,
+            max_size=pool_size,
+            idle_timeout=DB_POOL_IDLE_TIMEOUT_SECONDS,
+            checkout_timeout=DB_POOL_CHECKOUT_TIMEOUT_SECONDS,
+        )
+
+    def _connect_reader(self):
+        conn = sqlite3.connect(":memory:", uri=True, check_same_thread=False,
+                               detect_types=sqlite3.PARSE_DECLTYPES)
+        conn.execute("PRAGMA busy_timeout=30000")
+        conn.execute(f"ATTACH DATABASE ? AS {self.db.database}", (f"file:{self.path}?mode=ro",))
+        return conn
+
+    def _get_state(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM mirror_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def staleness(self) -> Optional[float]:
+        """Seconds since the last sync that brought every row up to date
+        (any sync with a change column, else a full resync), None before
+        the first"""
+        if self._synced_at is None:
+            return None
+        return time.time() - self._synced_at
+
+    def is_fresh(self, max_staleness: Optional[float] = None) -> bool:
+        staleness = self.staleness()
+        limit = self.max_staleness if max_staleness is None else max_staleness
+        return staleness is not None and staleness <= limit
+
+    def connection(self):
+        """Pooled read-only connection to the mirror"""
+        return self.pool.connection()
+
+    def stats(self) -> Dict[str, Any]:
+        # Read through the pool: the writer connection is busy for a whole sync
+        with self.connection() as conn:
+            rows = conn.execute(f"SELECT COUNT(*) FROM {self.db.database}.{self.table}").fetchone()[0]
+        return {
+            "rows": rows,
+            "staleness_seconds": self.staleness(),
+            "fresh": self.is_fresh(),
+            "syncs": self.syncs,
+            "sync_errors": self.sync_errors,
+            "last_sync_rows": self.last_sync_rows,
+            "last_sync_seconds": self.last_sync_seconds,
+            "pool": self.pool.stats(),
+        }
+
+    # ------------------------------------------------------------------
+    # Sync
+    # ------------------------------------------------------------------
+    def sync(self, full: Optional[bool] = None) -> int:
+        """Pull changed rows from the warehouse; returns rows written.
+
+        Only one sync runs at a time; concurrent callers return 0 right away.
+        """
+        if not self._sync_lock.acquire(blocking=False):
+            return 0
+        try:
+            started = time.perf_counter()
+            mode = self.change_column or self.watermark_column
+            watermark = self._get_state("watermark") if self._get_state("watermark_column") == mode else None
+            full_at = float(self._get_state("full_sync_at") or 0)
+            if full is None:
+                since_full = time.time() - full_at
+                full = not watermark or since_full > self.full_resync_seconds or (
+                    # Resync before the mirror would stop counting as fresh
+                    not self.change_column and since_full + self.sync_interval > self.max_staleness
+                )
+            since = None
+            if not full:
+                since = watermark if self.change_column else (
+                    date.fromisoformat(watermark[:10]) - timedelta(days=self.lookback_days)
+                ).isoformat()
+
+            source = f"{self.db.database}.{self.db.table}"
+            query = f"SELECT {', '.join(self.columns)} FROM {source}"
+            params = ()
+            if since is not None:
+                query += f" WHERE {mode} {'>' if self.change_column else '>='} ?"
+                params = (since,)
+            insert = (f"INSERT OR REPLACE INTO {self.table} ({', '.join(self.columns)}) "
+                      f"VALUES ({', '.join('?' * len(self.columns))})")
+            mark = self.columns.index(mode)
+
+            written, newest = 0, watermark
+            synced_at = time.time()
+            with self.db.connection() as remote, closing(remote.cursor()) as cursor:
+                cursor.execute(query, params)
+                with self._lock, self._conn:
+                    if since is None:
+                        self._conn.execute(f"DELETE FROM {self.table}")
+                    elif not self.change_column:
+                        # Rows that left the window are gone upstream too
+                        self._conn.execute(f"DELETE FROM {self.table} WHERE {self.watermark_column} >= ?",
+                                           (since,))
+                    while True:
+                        batch = cursor.fetchmany(self.batch_rows)
+                        if not batch:
+                            break
+                        rows = [tuple(_local_value(v) for v in row) for row in batch]
+                        self._conn.executemany(insert, rows)
+                        written += len(rows)
+                        batch_newest = max((r[mark] for r in rows if r[mark] is not None), default=None)
+                        if batch_newest is not None and (newest is None or batch_newest > newest):
+                            newest = batch_newest
+                    state = {"watermark": newest or "", "watermark_column": mode, "synced_at": str(synced_at)}
+                    if full:
+                        state["full_sync_at"] = str(synced_at)
+                    self._conn.executemany("INSERT OR REPLACE INTO mirror_state (key, value) VALUES (?, ?)",
+                                           state.items())
+            if full or self.change_column:
+                self._synced_at = synced_at
+            self.syncs += 1
+            self.last_sync_rows = written
+            self.last_sync_seconds = time.perf_counter() - started
+            logger.info(f"✅ Warehouse mirror synced ({'full' if full else 'from ' + since}): "
+                        f"{written} rows in {self.last_sync_seconds:.1f}s")
+            return written
+        except Exception:
+            self.sync_errors += 1
+            raise
+        finally:
+            self._sync_lock.release()
+
+    def start(self):
+        """Sync now and then every ``sync_interval`` seconds on a daemon thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._sync_loop, name="warehouse-mirror", daemon=True)
+            self._thread.start()
+
+    def _sync_loop(self):
+        while True:
+            try:
+                self.sync()
+            except Exception as e:
+                logger.error(f"❌ Warehouse mirror sync failed: {e}")
+            if self._stop.wait(self.sync_interval):
+                return
+
+    def close(self):
+        self._stop.set()
+        self.pool.close()
+        with self._lock:
+            self._conn.close()
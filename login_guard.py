@@ -0,0 +1,198 @@
+import threading
+import time
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Deque, Dict, Optional
+
+import bcrypt
+
+from instrumentation import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class LoginRejected(Exception):
+    """Raised when a login is turned away before the password is checked"""
+
+
+class SlidingWindowLimiter:
+    """Counts attempts per key over a sliding time window"""
+
+    def __init__(self, max_attempts: int, window_seconds: float, max_keys: int = 100000):
+        self.max_attempts = max_attempts
+        self.window_seconds = window_seconds
+        self.max_keys = max_keys
+        self._attempts: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected = 0
+
+    def _prune_locked(self, key: str, now: float) -> Deque[float]:
+        attempts = self._attempts.get(key)
+        if attempts is None:
+            return deque()
+        cutoff = now - self.window_seconds
+        while attempts and attempts[0] <= cutoff:
+            attempts.popleft()
+        if not attempts:
+            del self._attempts[key]
+        return attempts
+
+    def try_acquire(self, key: str) -> bool:
+        """Record an attempt for ``key``; False if the window is already full"""
+        now = time.monotonic()
+        with self._lock:
+            attempts = self._prune_locked(key, now)
+            if len(attempts) >= self.max_attempts:
+                self.rejected += 1
+                return False
+            if key not in self._attempts:
+                if len(self._attempts) >= self.max_keys:
+                    self._sweep_locked(now)
+                self._attempts[key] = attempts
+            attempts.append(now)
+            self.allowed += 1
+            return True
+
+    def retry_after(self, key: str) -> float:
+        """Seconds until ``key`` gets a free slot again"""
+        now = time.monotonic()
+        with self._lock:
+            attempts = self._prune_locked(key, now)
+            if len(attempts) < self.max_attempts:
+                return 0.0
+            return max(0.0, attempts[0] + self.window_seconds - now)
+
+    def reset(self, key: str):
+        with self._lock:
+            self._attempts.pop(key, None)
+
+    def _sweep_locked(self, now: float):
+        for key in list(self._attempts):
+            self._prune_locked(key, now)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "tracked_keys": len(self._attempts),
+                "max_attempts": self.max_attempts,
+                "window_seconds": self.window_seconds,
+                "allowed": self.allowed,
+                "rejected": self.rejected,
+            }
+
+
+class PasswordVerifier:
+    """Runs bcrypt checks on a small worker pool with a bounded queue.
+
+    bcrypt releases the GIL while hashing, so a thread pool is enough to keep
+    the work off the Streamlit script thread while capping the number of
+    cores a login burst can occupy.
+    """
+
+    def __init__(self, max_workers: int = 2, max_queue: int = 8, timeout: float = 10.0):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self._busy_seconds = 0.0
+
+    def _check(self, password: bytes, password_hash: bytes) -> bool:
+        started = time.perf_counter()
+        try:
+            return bcrypt.checkpw(password, password_hash)
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.observe("bcrypt_verify_seconds", elapsed)
+            with self._lock:
+                self._busy_seconds += elapsed
+                self.completed += 1
+
+    def verify(self, password: str, password_hash: str) -> bool:
+        """Check a password on the pool; raises LoginRejected when saturated
+        or when the check does not finish within ``timeout``"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise LoginRejected("Login service is busy, please try again shortly")
+        with self._lock:
+            self._pending += 1
+        try:
+            future = self._executor.submit(self._check, password.encode(), password_hash.encode())
+        except Exception:
+            self._release()
+            raise
+        # The slot is held until the hash finishes, not until we stop waiting,
+        # so timed-out checks still count against the pool
+        future.add_done_callback(self._release)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            with self._lock:
+                self.timeouts += 1
+            logger.warning("⚠️ Password verification timed out")
+            raise LoginRejected("Login check timed out, please try again shortly")
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "pending": self._pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "avg_verify_ms": (self._busy_seconds / self.completed * 1000)
+                                 if self.completed else 0.0,
+            }
+
+
+class LoginGuard:
+    """Admission control in front of password verification"""
+
+    def __init__(self, verifier: PasswordVerifier,
+                 user_limiter: SlidingWindowLimiter,
+                 client_limiter: SlidingWindowLimiter):
+        self.verifier = verifier
+        self.user_limiter = user_limiter
+        self.client_limiter = client_limiter
+
+    def admit(self, username: str, client_id: Optional[str] = None):
+        """Raise LoginRejected if the user or client has used up its window"""
+        # Client first: a throttled client must not eat into the target
+        # account's window and extend the real user's lockout
+        if client_id and not self.client_limiter.try_acquire(client_id):
+            wait = self.client_limiter.retry_after(client_id)
+            raise LoginRejected(
+                f"Too many login attempts from this client. Try again in {int(wait) + 1}s"
+            )
+        user_key = username.strip().lower()
+        if not self.user_limiter.try_acquire(user_key):
+            wait = self.user_limiter.retry_after(user_key)
+            raise LoginRejected(
+                f"Too many login attempts for this account. Try again in {int(wait) + 1}s"
+            )
+
+    def succeeded(self, username: str):
+        """Clear the per-user window after a successful login"""
+        self.user_limiter.reset(username.strip().lower())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "user_limiter": self.user_limiter.stats(),
+            "client_limiter": self.client_limiter.stats(),
+            "verifier": self.verifier.stats(),
+        }
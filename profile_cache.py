@@ -0,0 +1,118 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+from config import PROFILE_CACHE_MAX_ENTRIES, PROFILE_CACHE_TTL_SECONDS
+from instrumentation import metrics
+
+
+class ProfileCache:
+    """Process-wide LRU cache of policyholder profiles with per-entry TTL.
+
+    Entries are stored once under a canonical key (the EmployeeID) and every
+    identifier a user can log in with (EmployeeID, Email, PolicyNumber) is an
+    alias pointing at that entry, so all three lookups share one slot.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, profile, aliases)
+        self._aliases: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def _norm(identifier: str) -> str:
+        return identifier.strip()
+
+    def get(self, identifier: str) -> Optional[Dict[str, Any]]:
+        """Return a cached profile for any of its identifiers, or None"""
+        if not identifier:
+            return None
+        alias = self._norm(identifier)
+        with self._lock:
+            key = self._aliases.get(alias)
+            entry = self._entries.get(key) if key is not None else None
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] <= time.monotonic():
+                self._remove_locked(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+
+    def put(self, profile: Dict[str, Any], identifiers: Iterable[str] = (),
+            ttl_seconds: Optional[float] = None):
+        """Cache ``profile`` under its employee_id, email and policy_number"""
+        key = self._norm(str(profile["employee_id"]))
+        aliases = {key}
+        for field in ("email", "policy_number"):
+            if profile.get(field):
+                aliases.add(self._norm(str(profile[field])))
+        aliases.update(self._norm(i) for i in identifiers if i)
+
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            if key in self._entries:
+                self._remove_locked(key)
+            self._entries[key] = (time.monotonic() + ttl, dict(profile), frozenset(aliases))
+            for alias in aliases:
+                previous = self._aliases.get(alias)
+                if previous is not None and previous != key and previous in self._entries:
+                    # The identifier moved to another user; drop the stale owner
+                    self._remove_locked(previous)
+                self._aliases[alias] = key
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove_locked(oldest)
+                self.evictions += 1
+
+    def invalidate(self, identifier: str) -> bool:
+        """Drop the entry reachable through ``identifier``; True if one existed"""
+        alias = self._norm(identifier)
+        with self._lock:
+            key = self._aliases.get(alias)
+            if key is None or key not in self._entries:
+                return False
+            self._remove_locked(key)
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._aliases.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _remove_locked(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for alias in entry[2]:
+            if self._aliases.get(alias) == key:
+                del self._aliases[alias]
+
+
+# Shared by every Streamlit session in this process
+profile_cache = ProfileCache(PROFILE_CACHE_MAX_ENTRIES, PROFILE_CACHE_TTL_SECONDS)
+metrics.register_collector("profile_cache", profile_cache.stats)
@@ -0,0 +1,219 @@
+import functools
+import os
+import pickle
+import threading
+import time
+import logging
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from config import (
+    LOCAL_DATA_DIR,
+    CLAIMS_CACHE_TTL_SECONDS,
+    CLAIMS_CACHE_MAX_VALUE_BYTES,
+    CLAIMS_CACHE_SWEEP_SECONDS,
+)
+from instrumentation import metrics
+from local_db import connect_sqlite
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Concurrent calls for the same key share one execution.
+
+    The first caller runs ``fn``; callers arriving while it is in flight
+    wait for and receive the same result (or exception). Results are shared
+    objects, so callers must not mutate them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Hashable, Future] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+
+class SharedQueryCache:
+    """Per-employee query results shared by every server process on the host.
+
+    A SQLite WAL file under LOCAL_DATA_DIR holds pickled results with an
+    expiry, keyed by the query and indexed by employee. Lookups go through
+    a ``SingleFlight``, so within a process identical concurrent queries
+    cost one cache read and at most one warehouse query; across processes
+    the first to load a result serves the rest until it expires or the
+    employee's claims change (``invalidate_employee``). A load that started
+    before an invalidation does not write its possibly stale result.
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl_seconds: float = CLAIMS_CACHE_TTL_SECONDS,
+                 max_value_bytes: int = CLAIMS_CACHE_MAX_VALUE_BYTES,
+                 sweep_interval: float = CLAIMS_CACHE_SWEEP_SECONDS):
+        self.path = path or os.path.join(LOCAL_DATA_DIR, "query_cache.db")
+        self.ttl_seconds = ttl_seconds
+        self.max_value_bytes = max_value_bytes
+        self.sweep_interval = sweep_interval
+        self.flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._stats = {"hits": 0, "cross_process_hits": 0, "misses": 0, "stores": 0,
+                       "invalidations": 0, "expired": 0, "errors": 0}
+        self._conn = connect_sqlite(self.path)
+        with self._conn:
+            self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS query_cache (
+                cache_key TEXT PRIMARY KEY,
+                employee_id TEXT NOT NULL,
+                value BLOB NOT NULL,
+                writer_pid INTEGER NOT NULL,
+                expires_at REAL NOT NULL
+            )
+            ''')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_query_cache_employee ON query_cache (employee_id)')
+            self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS query_cache_invalidations (
+                employee_id TEXT PRIMARY KEY,
+                invalidated_at REAL NOT NULL
+            )
+            ''')
+        self._stop = threading.Event()
+        if sweep_interval:
+            threading.Thread(target=self._sweep_loop, name="query-cache-sweeper", daemon=True).start()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def get_or_load(self, key: str, employee_id: str, load: Callable[[], Any]) -> Any:
+        """Cached result for ``key``, else ``load()`` once for all concurrent callers"""
+        return self.flight.do(key, lambda: self._lookup_or_load(key, employee_id, load))
+
+    def invalidate_employee(self, employee_id: str):
+        """Drop every cached result for ``employee_id`` in all processes"""
+        if not employee_id:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM query_cache WHERE employee_id = ?", (employee_id,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO query_cache_invalidations (employee_id, invalidated_at) VALUES (?, ?)",
+                (employee_id, now)
+            )
+            self._stats["invalidations"] += 1
+
+    def sweep(self) -> int:
+        """Delete expired entries and invalidation markers older than the TTL"""
+        now = time.time()
+        with self._lock, self._conn:
+            removed = self._conn.execute("DELETE FROM query_cache WHERE expires_at <= ?", (now,)).rowcount
+            self._conn.execute("DELETE FROM query_cache_invalidations WHERE invalidated_at <= ?",
+                               (now - self.ttl_seconds,))
+        if removed:
+            logger.info(f"🧹 Swept {removed} expired query cache entries")
+        return removed
+
+    def _sweep_loop(self):
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"❌ Query cache sweep failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["coalesced"] = self.flight.coalesced
+        return stats
+
+    def close(self):
+        self._stop.set()
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _lookup_or_load(self, key: str, employee_id: str, load: Callable[[], Any]) -> Any:
+        now = time.time()
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT value, writer_pid, expires_at FROM query_cache WHERE cache_key = ?", (key,)
+                ).fetchone()
+        except Exception as e:
+            logger.warning(f"⚠️ Query cache read failed: {e}")
+            self._count("errors")
+            row = None
+        if row is not None:
+            if row[2] > now:
+                self._count("hits")
+                if row[1] != self._pid:
+                    self._count("cross_process_hits")
+                return pickle.loads(row[0])
+            self._count("expired")
+        self._count("misses")
+
+        started = time.time()
+        result = load()
+        self._store(key, employee_id, result, started)
+        return result
+
+    def _store(self, key: str, employee_id: str, result: Any, started: float):
+        try:
+            value = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+            if len(value) > self.max_value_bytes:
+                return
+            with self._lock, self._conn:
+                # Skip the write if the employee was invalidated while we loaded
+                stored = self._conn.execute('''
+                INSERT OR REPLACE INTO query_cache (cache_key, employee_id, value, writer_pid, expires_at)
+                SELECT ?, ?, ?, ?, ?
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM query_cache_invalidations WHERE employee_id = ? AND invalidated_at >= ?
+                )
+                ''', (key, employee_id, value, self._pid, time.time() + self.ttl_seconds,
+                      employee_id, started)).rowcount
+                if stored:
+                    self._stats["stores"] += 1
+        except Exception as e:
+            logger.warning(f"⚠️ Query cache write failed: {e}")
+            self._count("errors")
+
+
+@functools.lru_cache(maxsize=None)
+def get_claims_cache() -> SharedQueryCache:
+    """Process-wide instance, created on first use"""
+    cache = SharedQueryCache()
+    metrics.register_collector("claims_cache", cache.stats)
+    return cache
+
+
+def __getattr__(name):
+    # Keeps ``from query_cache import claims_cache`` working without import-time setup
+    if name == "claims_cache":
+        return get_claims_cache()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
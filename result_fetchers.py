@@ -0,0 +1,108 @@
+"""
+Result fetch modes for DB-API cursors.
+
+Every fetcher turns an executed cursor into one result shape, so a query
+method can be written once and serve dict rows to existing callers and
+Arrow tables or DataFrames to views that render large results.
+"""
+
+from typing import Any, Dict, List, Sequence
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+def _fetch_arrow(cursor) -> pa.Table:
+    """Pull the whole result as an Arrow table without per-row Python objects"""
+    if hasattr(cursor, "fetchall_arrow"):        # databricks-sql-connector
+        return cursor.fetchall_arrow()
+    if hasattr(cursor, "fetch_arrow_table"):     # duckdb
+        return cursor.fetch_arrow_table()
+    # Plain DB-API drivers (sqlite3): transpose once into columns
+    names = [d[0] for d in cursor.description]
+    rows = cursor.fetchall()
+    columns = list(zip(*rows)) if rows else [[] for _ in names]
+    return pa.Table.from_arrays([pa.array(col) for col in columns], names=names)
+
+
+class DictFetcher:
+    """List of dicts, one per row (the original API shape)"""
+
+    def __init__(self, names: Sequence[str], floats: Sequence[str] = ()):
+        self.names = list(names)
+        self.floats = set(floats)
+
+    def fetch(self, cursor) -> List[Dict[str, Any]]:
+        rows = []
+        for row in cursor.fetchall():
+            item = dict(zip(self.names, row))
+            for name in self.floats:
+                item[name] = float(item[name]) if item[name] else 0
+            rows.append(item)
+        return rows
+
+    def empty(self) -> List[Dict[str, Any]]:
+        return []
+
+    @staticmethod
+    def head(result, n: int):
+        return result[:n]
+
+    @staticmethod
+    def last(result, fields: Sequence[str]) -> tuple:
+        return tuple(result[-1][f] for f in fields)
+
+
+class ArrowFetcher:
+    """pyarrow.Table with columns renamed to ``names``; float columns null-filled"""
+
+    def __init__(self, names: Sequence[str], floats: Sequence[str] = ()):
+        self.names = list(names)
+        self.floats = set(floats)
+
+    def fetch(self, cursor) -> pa.Table:
+        table = _fetch_arrow(cursor).rename_columns(self.names)
+        for name in self.floats:
+            i = table.schema.get_field_index(name)
+            column = pc.fill_null(pc.cast(table.column(i), pa.float64()), 0.0)
+            table = table.set_column(i, name, column)
+        return table
+
+    def empty(self) -> pa.Table:
+        return pa.table({name: pa.array([], type=pa.float64() if name in self.floats else pa.string())
+                         for name in self.names})
+
+    @staticmethod
+    def head(result, n: int):
+        return result.slice(0, n)
+
+    @staticmethod
+    def last(result, fields: Sequence[str]) -> tuple:
+        return tuple(result.column(f)[-1].as_py() for f in fields)
+
+
+class PandasFetcher(ArrowFetcher):
+    """pandas.DataFrame built from the Arrow table in one columnar conversion"""
+
+    def fetch(self, cursor):
+        return super().fetch(cursor).to_pandas()
+
+    def empty(self):
+        return super().empty().to_pandas()
+
+    @staticmethod
+    def head(result, n: int):
+        return result.iloc[:n]
+
+    @staticmethod
+    def last(result, fields: Sequence[str]) -> tuple:
+        row = result.iloc[-1]
+        return tuple(row[f].item() if hasattr(row[f], "item") else row[f] for f in fields)
+
+
+def get_fetcher(mode: str, names: Sequence[str], floats: Sequence[str] = ()):
+    """Fetcher for ``mode``: 'dicts', 'arrow' or 'pandas'"""
+    fetchers = {"dicts": DictFetcher, "arrow": ArrowFetcher, "pandas": PandasFetcher}
+    if mode not in fetchers:
+        raise ValueError(f"Unknown fetch mode: {mode}")
+    return fetchers[mode](names, floats)
@@ -0,0 +1,14 @@
+"""
+Server entry point: the Streamlit app plus the session cookie routes.
+
+    streamlit run server.py
+
+Running app.py directly still works, but logins then last only until the
+page is reloaded, since nothing can set the session cookie.
+"""
+
+import streamlit as st
+
+from session_routes import session_routes
+
+app = st.App("app.py", routes=session_routes())
@@ -0,0 +1,61 @@
+"""
+HTTP routes that keep the login session token in an HttpOnly cookie.
+
+Streamlit scripts cannot set cookies, and a token in the URL leaks through
+shared links, history, Referer headers and proxy logs. After a login the
+page posts a single-use hand-off code (``SessionStore.hand_off``) to
+``/session/start``, which sets the cookie; ``/session/end`` clears it on
+logout. The cookie is HttpOnly and SameSite=Strict, so page scripts and
+cross-site requests never see it; ``st.context.cookies`` reads it from the
+websocket handshake. Mounted by server.py.
+"""
+
+import logging
+
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+from config import SESSION_COOKIE_NAME
+from session_store import get_session_store
+
+logger = logging.getLogger(__name__)
+
+START_PATH = "/session/start"
+END_PATH = "/session/end"
+
+
+def _secure(request: Request) -> bool:
+    return request.url.scheme == "https" or request.headers.get("x-forwarded-proto") == "https"
+
+
+async def _start(request: Request) -> Response:
+    try:
+        code = (await request.json()).get("code")
+    except Exception:
+        code = None
+    token = get_session_store().redeem(code) if isinstance(code, str) else None
+    if token is None:
+        return Response(status_code=403)
+    response = Response(status_code=204, headers={"Cache-Control": "no-store"})
+    # No max-age: the server-side sliding expiry decides how long it is valid
+    response.set_cookie(SESSION_COOKIE_NAME, token, path="/", httponly=True,
+                        samesite="strict", secure=_secure(request))
+    return response
+
+
+async def _end(request: Request) -> Response:
+    token = request.cookies.get(SESSION_COOKIE_NAME)
+    if token:
+        get_session_store().revoke(token)
+    response = Response(status_code=204, headers={"Cache-Control": "no-store"})
+    response.delete_cookie(SESSION_COOKIE_NAME, path="/", httponly=True,
+                           samesite="strict", secure=_secure(request))
+    return response
+
+
+def session_routes():
+    return [
+        Route(START_PATH, _start, methods=["POST"]),
+        Route(END_PATH, _end, methods=["POST"]),
+    ]
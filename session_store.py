@@ -0,0 +1,257 @@
+import base64
+import functools
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from config import (
+    LOCAL_DATA_DIR,
+    DEFAULT_SECRET_KEY,
+    SECRET_KEY,
+    SESSION_TIMEOUT_MINUTES,
+    SESSION_TOUCH_SECONDS,
+    SESSION_SWEEP_SECONDS,
+    SESSION_HANDOFF_SECONDS,
+)
+from instrumentation import metrics
+from local_db import WriteBehindQueue, connect_sqlite
+
+logger = logging.getLogger(__name__)
+
+TOUCH_SESSION_SQL = "UPDATE sessions SET expires_at = ?, last_seen = ? WHERE session_id = ?"
+
+
+class SessionStore:
+    """Server-side login sessions behind signed, sliding-expiry tokens.
+
+    A token is ``<session id>.<HMAC-SHA256(SECRET_KEY, session id)>``, so a
+    forged or mangled token is rejected before any lookup. Sessions live in
+    memory with a SQLite copy for server restarts; resuming one is a dict
+    lookup (or one indexed SQLite read after a restart) and never touches
+    the warehouse or bcrypt. Each resume pushes expiry out by the timeout;
+    the new expiry is persisted through a write-behind queue at most every
+    ``touch_interval`` seconds per session. The SQLite row is the record of
+    a live session: a memory copy is re-checked against it at least that
+    often, so a logout or revoke in another server process takes effect
+    here within ``touch_interval`` seconds.
+
+    Tokens never go to the browser through the page: ``hand_off`` swaps one
+    for a short-lived, single-use code, which the page posts to the
+    session route, and the route ``redeem``s it into an HttpOnly cookie.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, secret_key: str = SECRET_KEY,
+                 timeout_seconds: float = SESSION_TIMEOUT_MINUTES * 60,
+                 touch_interval: float = SESSION_TOUCH_SECONDS,
+                 sweep_interval: float = SESSION_SWEEP_SECONDS,
+                 handoff_seconds: float = SESSION_HANDOFF_SECONDS):
+        self.db_path = db_path or os.path.join(LOCAL_DATA_DIR, "sessions.db")
+        self._key = secret_key.encode()
+        self.timeout_seconds = timeout_seconds
+        self.touch_interval = touch_interval
+        self.sweep_interval = sweep_interval
+        self.handoff_seconds = handoff_seconds
+        self._lock = threading.Lock()
+        # session id -> {"user", "is_admin", "expires_at", "persisted_expires_at", "checked_at"}
+        self._sessions: Dict[str, Dict[str, Any]] = {}
+        # hand-off code -> (token, expires_at); in memory, the route runs in this process
+        self._handoffs: Dict[str, Tuple[str, float]] = {}
+        self._stats = {"created": 0, "resumed_memory": 0, "resumed_sqlite": 0,
+                       "bad_signature": 0, "expired": 0, "unknown": 0, "revoked": 0, "revoked_elsewhere": 0, "swept": 0,
+                       "handoffs": 0, "handoffs_redeemed": 0}
+        self._conn = connect_sqlite(self.db_path)
+        with self._conn:
+            self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                user TEXT NOT NULL,
+                is_admin INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_seen REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )
+            ''')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at)')
+        self.writer = WriteBehindQueue(self.db_path, name="session-writer")
+        self._stop = threading.Event()
+        self._sweeper = threading.Thread(target=self._sweep_loop, name="session-sweeper", daemon=True)
+        self._sweeper.start()
+
+    # ------------------------------------------------------------------
+    # Tokens
+    # ------------------------------------------------------------------
+    def _sign(self, session_id: str) -> str:
+        digest = hmac.new(self._key, session_id.encode(), hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+    def _verify(self, token: str) -> Optional[str]:
+        if not isinstance(token, str):
+            return None
+        session_id, _, signature = token.partition(".")
+        if not session_id or not signature or not hmac.compare_digest(signature, self._sign(session_id)):
+            return None
+        return session_id
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def create(self, user: Dict[str, Any], is_admin: bool) -> str:
+        """Start a session for an authenticated user; returns the token"""
+        session_id = secrets.token_urlsafe(24)
+        now = time.time()
+        expires_at = now + self.timeout_seconds
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT INTO sessions VALUES (?, ?, ?, ?, ?, ?)",
+                    (session_id, json.dumps(user, default=str), int(is_admin), now, now, expires_at),
+                )
+            self._sessions[session_id] = {"user": user, "is_admin": bool(is_admin), "expires_at": expires_at,
+                                          "persisted_expires_at": expires_at, "checked_at": now}
+            self._stats["created"] += 1
+        return f"{session_id}.{self._sign(session_id)}"
+
+    def resume(self, token: str) -> Optional[Dict[str, Any]]:
+        """User and role for a valid, unexpired token, sliding its expiry"""
+        session_id = self._verify(token)
+        now = time.time()
+        with self._lock:
+            if session_id is None:
+                self._stats["bad_signature"] += 1
+                return None
+            session = self._sessions.get(session_id)
+            if session is None:
+                row = self._conn.execute(
+                    "SELECT user, is_admin, expires_at FROM sessions WHERE session_id = ?", (session_id,)
+                ).fetchone()
+                if row is None:
+                    self._stats["unknown"] += 1
+                    return None
+                session = {"user": json.loads(row[0]), "is_admin": bool(row[1]),
+                           "expires_at": row[2], "persisted_expires_at": row[2], "checked_at": now}
+                self._sessions[session_id] = session
+                self._stats["resumed_sqlite"] += 1
+            else:
+                if now - session["checked_at"] >= self.touch_interval:
+                    row = self._conn.execute(
+                        "SELECT 1 FROM sessions WHERE session_id = ?", (session_id,)
+                    ).fetchone()
+                    if row is None:
+                        # Logged out or revoked by another process
+                        del self._sessions[session_id]
+                        self._stats["revoked_elsewhere"] += 1
+                        return None
+                    session["checked_at"] = now
+                self._stats["resumed_memory"] += 1
+            if session["expires_at"] <= now:
+                self._sessions.pop(session_id, None)
+                self._stats["expired"] += 1
+                return None
+            session["expires_at"] = now + self.timeout_seconds
+            persist = session["expires_at"] - session["persisted_expires_at"] >= self.touch_interval
+            if persist:
+                session["persisted_expires_at"] = session["expires_at"]
+            result = {"user": session["user"], "is_admin": session["is_admin"]}
+        if persist:
+            self.writer.submit(TOUCH_SESSION_SQL, (session["expires_at"], now, session_id))
+        return result
+
+    def hand_off(self, token: str) -> str:
+        """Single-use code the session route exchanges for ``token``"""
+        code = secrets.token_urlsafe(24)
+        now = time.time()
+        with self._lock:
+            for stale in [c for c, (_, expires_at) in self._handoffs.items() if expires_at <= now]:
+                del self._handoffs[stale]
+            self._handoffs[code] = (token, now + self.handoff_seconds)
+            self._stats["handoffs"] += 1
+        return code
+
+    def redeem(self, code: str) -> Optional[str]:
+        """The token behind an unexpired hand-off code; the code is spent"""
+        with self._lock:
+            token, expires_at = self._handoffs.pop(code or "", (None, 0.0))
+            if token is None or expires_at <= time.time():
+                return None
+            self._stats["handoffs_redeemed"] += 1
+        return token
+
+    def revoke(self, token: str):
+        session_id = self._verify(token)
+        if session_id is None:
+            return
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._stats["revoked"] += 1
+            with self._conn:
+                self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def sweep(self) -> int:
+        """Drop expired sessions from memory and SQLite, and memory copies of
+        sessions revoked elsewhere"""
+        now = time.time()
+        with self._lock:
+            expired = [sid for sid, s in self._sessions.items() if s["expires_at"] <= now]
+            for sid in expired:
+                del self._sessions[sid]
+            # Expiry slid in memory but not yet persisted must not be swept
+            live = [(s["expires_at"], sid) for sid, s in self._sessions.items()
+                    if s["expires_at"] > s["persisted_expires_at"]]
+        if live:
+            for expires_at, sid in live:
+                self.writer.submit(TOUCH_SESSION_SQL, (expires_at, now, sid))
+            with self._lock:
+                for expires_at, sid in live:
+                    session = self._sessions.get(sid)
+                    if session is not None:
+                        session["persisted_expires_at"] = max(session["persisted_expires_at"], expires_at)
+        self.writer.flush()
+        with self._lock, self._conn:
+            removed = self._conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,)).rowcount
+            self._stats["swept"] += removed
+            # Drop memory copies whose rows another process revoked
+            persisted = {r[0] for r in self._conn.execute("SELECT session_id FROM sessions")}
+            for sid in [sid for sid in self._sessions if sid not in persisted]:
+                del self._sessions[sid]
+                self._stats["revoked_elsewhere"] += 1
+        if removed:
+            logger.info(f"🧹 Swept {removed} expired sessions")
+        return removed
+
+    def _sweep_loop(self):
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"❌ Session sweep failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats, active_in_memory=len(self._sessions))
+
+    def close(self):
+        self._stop.set()
+        self.writer.close()
+
+
+@functools.lru_cache(maxsize=None)
+def get_session_store() -> SessionStore:
+    """Process-wide instance, created on first use"""
+    if SECRET_KEY == DEFAULT_SECRET_KEY:
+        logger.warning("⚠️ STREAMLIT_SECRET_KEY is not set; session tokens use the default key")
+    store = SessionStore()
+    metrics.register_collector("sessions", store.stats)
+    return store
+
+
+def __getattr__(name):
+    # Keeps ``from session_store import session_store`` working without import-time setup
+    if name == "session_store":
+        return get_session_store()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,76 @@
+"""
+Stylesheet for the Streamlit app.
+
+Kept out of app.py so the block is compiled once per process on import
+instead of being re-parsed with the script on every rerun.
+"""
+
+APP_CSS = """
+<style>
+    /* Main Header */
+    .main-header {
+        font-size: 3rem;
+        background: linear-gradient(135deg, #175CFF, #00A3FF);
+        -webkit-background-clip: text;
+        -webkit-text-fill-color: transparent;
+        text-align: center;
+        font-weight: 700;
+        margin: 1.5rem 0 2rem 0;
+    }
+    
+    /* Card Design */
+    .card {
+        background: white;
+        border-radius: 12px;
+        padding: 1.5rem;
+        box-shadow: 0 4px 12px rgba(23, 92, 255, 0.08);
+        border-left: 4px solid #175CFF;
+        margin-bottom: 1rem;
+        transition: transform 0.2s;
+    }
+    
+    .card:hover {
+        transform: translateY(-2px);
+        box-shadow: 0 6px 20px rgba(23, 92, 255, 0.12);
+    }
+    
+    /* Admin Card */
+    .admin-card {
+        border-left: 4px solid #FF6B6B;
+    }
+    
+    /* Policyholder Card */
+    .policy-card {
+        border-left: 4px solid #4ECDC4;
+    }
+    
+    /* Buttons */
+    .stButton > button {
+        background: linear-gradient(135deg, #175CFF, #00A3FF);
+        color: white;
+        border: none;
+        padding: 0.75rem 1.5rem;
+        border-radius: 8px;
+        font-weight: 600;
+        width: 100%;
+    }
+    
+    .stButton > button:hover {
+        background: linear-gradient(135deg, #1348CC, #0088CC);
+    }
+    
+    /* Metrics */
+    .metric {
+        background: linear-gradient(135deg, #175CFF, #00A3FF);
+        color: white;
+        padding: 1.5rem;
+        border-radius: 12px;
+        text-align: center;
+    }
+    
+    /* Hide Streamlit defaults */
+    #MainMenu {visibility: hidden;}
+    footer {visibility: hidden;}
+    header {visibility: hidden;}
+</style>
+"""